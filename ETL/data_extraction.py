@@ -1,29 +1,105 @@
-import soccerdata as sd
+import os
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from src.logger import logging
 from src.exception import MyException
+from src.constants import ETL_LEAGUES, ETL_EXTRACT_MAX_WORKERS, ETL_EXTRACT_CACHE_DIR, ETL_SEASON_COMPLETE_AFTER_DAYS
 import sys
 import warnings
 warnings.filterwarnings('ignore')
 
 
 class DataExtraction:
-    def __init__(self, seasons:list):
+    """
+    Extracts match history per (league, season).
+
+    Seasons are fetched concurrently on a bounded thread pool and every parsed season is
+    cached on disk under cache_dir/<league>/<season>.pkl. A cached season whose last match
+    is more than ETL_SEASON_COMPLETE_AFTER_DAYS old is finished and is reused as is; the
+    running season is fetched again unless it is read offline.
+
+    offline=True never touches the network: seasons come from the cache, or from
+    fixture_dir/<league>/<season>.csv when they are not cached.
+    """
+    def __init__(self, seasons:list, leagues: list = None, max_workers: int = ETL_EXTRACT_MAX_WORKERS,
+                 cache_dir: str = ETL_EXTRACT_CACHE_DIR, refresh: bool = False, offline: bool = False,
+                 fixture_dir: str = None):
         self.seasons = seasons
+        self.leagues = leagues or ETL_LEAGUES
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.refresh = refresh
+        self.offline = offline
+        self.fixture_dir = fixture_dir
+
+    def season_keys(self) -> list:
+        return [(league, season) for league in self.leagues for season in self.seasons]
+
+    def _cache_path(self, league, season) -> str:
+        return os.path.join(self.cache_dir, str(league), f"{season}.pkl")
+
+    def _fixture_path(self, league, season) -> str:
+        return os.path.join(self.fixture_dir, str(league), f"{season}.csv")
+
+    @staticmethod
+    def _is_complete(games_df) -> bool:
+        if not len(games_df):
+            return False
+        last_match = pd.to_datetime(games_df["date"]).max()
+        return last_match < datetime.now() - timedelta(days=ETL_SEASON_COMPLETE_AFTER_DAYS)
+
+    def _save_cache(self, league, season, games_df) -> None:
+        cache_path = self._cache_path(league, season)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.tmp.{os.getpid()}"
+        games_df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+
+    def _fetch(self, league, season):
+        # Imported here so offline runs work without soccerdata
+        import soccerdata as sd
+        mh = sd.MatchHistory(leagues=league, seasons=season)
+        return mh.read_games()
+
+    def extract_season(self, league, season):
+        """
+        Returns the games of one season, from the cache when it holds a finished season
+        (or always, offline), otherwise fetched and cached.
+        """
+        try:
+            cache_path = self._cache_path(league, season)
+            if os.path.exists(cache_path) and not self.refresh:
+                games_df = pd.read_pickle(cache_path)
+                if self.offline or self._is_complete(games_df):
+                    logging.info("Loaded season {} of {} from cache: {} records".format(season, league, len(games_df)))
+                    return games_df
+
+            if self.offline:
+                if self.fixture_dir is None or not os.path.exists(self._fixture_path(league, season)):
+                    raise FileNotFoundError("Season {} of {} is neither cached nor in the fixture dir".format(season, league))
+                games_df = pd.read_csv(self._fixture_path(league, season), parse_dates=["date"])
+                logging.info("Loaded season {} of {} from fixture: {} records".format(season, league, len(games_df)))
+                return games_df
+
+            logging.info("Extracting data for season: {} of {}".format(season, league))
+            games_df = self._fetch(league, season)
+            self._save_cache(league, season, games_df)
+            logging.info("Successfully extracted data for season: {} of {}".format(season, league))
+            return games_df
+        except Exception as e:
+            raise MyException(e, sys)
 
     def extract_pl_data(self):
         """
         This method is used to extrct pl data using the seasons parameter
         """
         try:
-            logging.info("Starting data extraction for seasons: {}".format(self.seasons))
-            all_games_df = []
-            for x in self.seasons:
-                logging.info("Extracting data for season: {}".format(x))
-                mh = sd.MatchHistory(leagues="ENG-Premier League", seasons=x)
-                games_df = mh.read_games()
-                all_games_df.append(games_df)
-                logging.info("Successfully extracted data for season: {}".format(x))
+            logging.info("Starting data extraction for leagues {} and seasons: {}".format(self.leagues, self.seasons))
+            keys = self.season_keys()
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(keys)))) as executor:
+                # map keeps the (league, season) order, whatever order the fetches finish in
+                all_games_df = list(executor.map(lambda key: self.extract_season(*key), keys))
 
             df = pd.concat(all_games_df)
             logging.info("Data extraction completed. Total records: {}".format(len(df)))
@@ -1,50 +1,158 @@
 import pandas as pd
 import sys
+import datetime
 from src.logger import logging
 from src.exception import MyException
-import pymongo
-import os
 
-
-from src.constants import DATABASE_NAME, COLLECTION_NAME
+from src.data_access.warehouse import get_warehouse
+from src.constants import (
+    DATABASE_NAME, COLLECTION_NAME, CHANGES_COLLECTION_NAME, MATCH_KEY_FIELDS, ROW_HASH_FIELD, ETL_LOAD_BATCH_SIZE
+)
 
 
 class DataLoad:
     """
-    This Class iuse to load the data into Dataware house for future ML work
+    This Class iuse to load the data into Dataware house for future ML work.
+
+    Matches are upserted on MATCH_KEY_FIELDS, so loading the same extract twice leaves
+    the warehouse unchanged instead of duplicating every match. Each match also stores a
+    hash of its values (ROW_HASH_FIELD); rows whose hash matches the stored one are not
+    written at all, and the dates and teams of the rows that were written are recorded in
+    CHANGES_COLLECTION_NAME for ingestion and feature recomputation.
+
+    The warehouse is MongoDB or the embedded sqlite file, chosen by `backend`
+    (WAREHOUSE_BACKEND by default).
     """
-    def __init__(self,df):
+    def __init__(self, df, batch_size: int = ETL_LOAD_BATCH_SIZE, backend: str = None):
         self.df = df
+        self.batch_size = batch_size
+        self.backend = backend
+
+    @staticmethod
+    def ensure_match_index(warehouse) -> None:
+        warehouse.ensure_index(COLLECTION_NAME, MATCH_KEY_FIELDS, unique=True, name="match_key")
+
+    @staticmethod
+    def _iso_strings(column: pd.Series) -> pd.Series:
+        """
+        The column as the ISO strings the warehouse stores, converted as a whole column;
+        columns that hold no dates or times are returned as they are.
+        """
+        if pd.api.types.is_datetime64_any_dtype(column):
+            return column.dt.strftime("%Y-%m-%dT%H:%M:%S")
+        if column.dtype != object:
+            return column
+        values = column.dropna()
+        if not len(values):
+            return column
+        first = values.iloc[0]
+        if isinstance(first, datetime.datetime):
+            return pd.to_datetime(column).dt.strftime("%Y-%m-%dT%H:%M:%S")
+        if isinstance(first, datetime.date):
+            return pd.to_datetime(column).dt.strftime("%Y-%m-%d")
+        if isinstance(first, datetime.time):
+            # str(time) is its isoformat()
+            return column.astype(str).mask(column.isna())
+        return column
+
+    def prepare_frame(self) -> pd.DataFrame:
+        """Converts date/time columns to ISO strings and drops rows repeating a match key."""
+        logging.info("Converting datetime columns to strings for the warehouse...")
+        df = self.df.apply(self._iso_strings)
+
+        # Upserts of the same key inside one unordered batch would race, keep the last row of each match
+        n_rows = len(df)
+        df = df.drop_duplicates(subset=MATCH_KEY_FIELDS, keep="last")
+        if len(df) < n_rows:
+            logging.warning("Dropped {} rows repeating a match key".format(n_rows - len(df)))
+        return df
 
-    def load_data_MongoDB(self):
+    @staticmethod
+    def row_hashes(df: pd.DataFrame) -> pd.Series:
         """
-        This method is used to the Load the extract data in our Dataware house that is MongoDB
+        Hash of every row's values outside the match key, as 16 hex digits. Numbers are hashed
+        as float64 and everything else as text, so an int column turned float by a missing
+        value elsewhere in the extract does not change the hashes of the other rows.
+        """
+        value_columns = sorted(column for column in df.columns
+                               if column not in MATCH_KEY_FIELDS and column not in ("_id", ROW_HASH_FIELD))
+        canonical = pd.DataFrame({
+            column: df[column].astype("float64") if pd.api.types.is_numeric_dtype(df[column])
+            else df[column].astype(str).where(df[column].notna(), "")
+            for column in value_columns
+        }, index=df.index)
+        return pd.util.hash_pandas_object(canonical, index=False).map("{:016x}".format)
+
+    @staticmethod
+    def stored_hashes(warehouse, df: pd.DataFrame) -> dict:
+        """Row hashes already in the warehouse for the dates of df, by match key."""
+        if not len(df):
+            return {}
+        stored = warehouse.find(COLLECTION_NAME, {"date": {"$gte": df["date"].min(), "$lte": df["date"].max()}},
+                                fields=MATCH_KEY_FIELDS + [ROW_HASH_FIELD])
+        return {tuple(document.get(field) for field in MATCH_KEY_FIELDS): document.get(ROW_HASH_FIELD)
+                for document in stored}
+
+    @staticmethod
+    def record_changes(warehouse, changed_df: pd.DataFrame, summary: dict) -> None:
+        warehouse.insert(CHANGES_COLLECTION_NAME, {
+            "loaded_at": datetime.datetime.now(datetime.timezone.utc),
+            "collection_name": COLLECTION_NAME,
+            "changed_dates": summary["changed_dates"],
+            "changed_teams": summary["changed_teams"],
+            "inserted": summary["inserted"],
+            "updated": summary["updated"]
+        })
+
+    def iter_documents(self, df: pd.DataFrame):
+        """Yields the documents batch by batch, so only one bulk write worth of dicts exists at a time."""
+        names = df.columns.tolist()
+        for start in range(0, len(df), self.batch_size):
+            batch = df.iloc[start:start + self.batch_size]
+            # tolist() turns each column into Python values at once, cheaper than to_dict per row
+            columns = [batch[name].tolist() for name in names]
+            yield [dict(zip(names, values)) for values in zip(*columns)]
+
+    def load_data_MongoDB(self) -> dict:
+        """
+        This method is used to the Load the extract data in our Dataware house (MongoDB or sqlite).
+
+        Returns the number of matches inserted, updated (stored values changed) and unchanged,
+        and the dates and teams of the inserted or updated matches.
         """
         try:
-            logging.info("Converting the data into the Dictionary....")
-            data = self.df.to_dict(orient='records')
-            
-            # Convert datetime.date and datetime.time objects to strings for MongoDB compatibility
-            logging.info("Converting datetime objects to strings for MongoDB compatibility...")
-            for record in data:
-                for key, value in record.items():
-                    # Convert date objects to ISO format string
-                    if hasattr(value, 'isoformat'):
-                        record[key] = value.isoformat()
-            
-            logging.info("Make a connection with the MONGODB...")
-            logging.info("Making a database and Collection...")
-
-            CONNECTION_URL = os.getenv("MONGODB_URL")
-
-            client = pymongo.MongoClient(CONNECTION_URL)
-            data_base = client[DATABASE_NAME]
-            collection = data_base[COLLECTION_NAME]
-
-            logging.info("Push the data into Database")
-            rec = collection.insert_many(data)
-            logging.info("Successfully inserted {} records into MongoDB".format(len(rec.inserted_ids)))
-                    
+            df = self.prepare_frame()
+
+            df = df.assign(**{ROW_HASH_FIELD: self.row_hashes(df)})
+
+            logging.info("Make a connection with the {} warehouse...".format(self.backend or "default"))
+            with get_warehouse(backend=self.backend, database_name=DATABASE_NAME) as warehouse:
+                self.ensure_match_index(warehouse)
+
+                # Only matches that are new or whose values changed are written
+                stored = self.stored_hashes(warehouse, df)
+                keys = list(zip(*(df[field] for field in MATCH_KEY_FIELDS)))
+                changed = pd.Series([stored.get(key) != row_hash for key, row_hash in zip(keys, df[ROW_HASH_FIELD])],
+                                    index=df.index, dtype=bool)
+                changed_df = df[changed]
+
+                logging.info("Upserting {} new or changed of {} records in batches of {}".format(
+                    len(changed_df), len(df), self.batch_size))
+                summary = {"inserted": 0, "updated": 0, "unchanged": int((~changed).sum())}
+                for records in self.iter_documents(changed_df):
+                    for key, value in warehouse.upsert(COLLECTION_NAME, MATCH_KEY_FIELDS, records).items():
+                        summary[key] += value
+
+                summary["changed_dates"] = sorted(changed_df["date"].unique().tolist())
+                summary["changed_teams"] = sorted(set(changed_df["home_team"]).union(changed_df["away_team"]))
+                if len(changed_df):
+                    self.record_changes(warehouse, changed_df, summary)
+
+            logging.info("Loaded {} records into the warehouse: {} inserted, {} updated, {} unchanged; {} dates and {} teams changed".format(
+                len(df), summary["inserted"], summary["updated"], summary["unchanged"],
+                len(summary["changed_dates"]), len(summary["changed_teams"])))
+            return summary
+
         except Exception as e:
-            logging.error("Error occurred during MongoDB data load: {}".format(str(e)))
+            logging.error("Error occurred during warehouse data load: {}".format(str(e)))
             raise MyException(str(e), sys)
@@ -1,6 +1,9 @@
 import pandas as pd
 import sys
+import queue
+import threading
 from src.logger import logging
+from src.constants import ETL_STREAM_QUEUE_SIZE
 from src.exception import MyException
 from ETL.data_extraction import DataExtraction
 from ETL.data_transformation import DataTransformation
@@ -9,6 +12,51 @@ import warnings
 
 warnings.filterwarnings('ignore')
 
+_END_OF_STREAM = object()
+
+
+def bounded_stream(chunks, maxsize: int = ETL_STREAM_QUEUE_SIZE):
+    """
+    Runs the generator `chunks` in a background thread and yields its items through a queue
+    of maxsize items. The producer blocks while the queue is full, so a slow consumer holds
+    back the stages before it (back-pressure) and at most maxsize chunks wait in between.
+    Exceptions of the producer are raised in the consumer; closing the consumer stops the producer.
+    """
+    buffer = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+            put(_END_OF_STREAM)
+        except BaseException as e:
+            put(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END_OF_STREAM:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
+
 
 class ETLPipeline:
     """
@@ -16,22 +64,50 @@ class ETLPipeline:
     for Premier League match data processing.
     """
 
-    def __init__(self, seasons: list):
+    def __init__(self, seasons: list, leagues: list = None, refresh: bool = False, offline: bool = False,
+                 fixture_dir: str = None, streaming: bool = False, queue_size: int = ETL_STREAM_QUEUE_SIZE,
+                 warehouse_backend: str = None):
         """
         Initialize the ETL Pipeline with seasons
 
         Args:
             seasons (list): List of seasons to extract data for
+            leagues (list): Leagues to extract, ETL_LEAGUES by default
+            refresh (bool): Fetch every season again, even finished ones already cached
+            offline (bool): Read seasons only from the extraction cache or fixture_dir
+            fixture_dir (str): Directory of <league>/<season>.csv files used offline
+            streaming (bool): Run extract -> transform -> load one (league, season) chunk at a time
+            queue_size (int): Chunks buffered between two streaming stages
+            warehouse_backend (str): "mongodb" or "sqlite" warehouse to load into, WAREHOUSE_BACKEND by default
         """
         try:
             logging.info("Initializing ETL Pipeline with seasons: {}".format(seasons))
             self.seasons = seasons
+            self.leagues = leagues
+            self.refresh = refresh
+            self.offline = offline
+            self.fixture_dir = fixture_dir
+            self.streaming = streaming
+            self.queue_size = queue_size
+            self.warehouse_backend = warehouse_backend
             self.extracted_df = None
             self.transformed_df = None
+            self.load_summary = None
+            self.extracted_records = None
+            self.transformed_records = None
         except Exception as e:
             logging.error("Error occurred during ETL Pipeline initialization: {}".format(str(e)))
             raise MyException(str(e), sys)
 
+    def _data_extraction(self) -> DataExtraction:
+        return DataExtraction(
+            seasons=self.seasons,
+            leagues=self.leagues,
+            refresh=self.refresh,
+            offline=self.offline,
+            fixture_dir=self.fixture_dir
+        )
+
     def extract_data(self):
         """
         Execute the data extraction step
@@ -41,7 +117,7 @@ class ETLPipeline:
         """
         try:
             logging.info("Starting data extraction step...")
-            data_extraction = DataExtraction(seasons=self.seasons)
+            data_extraction = self._data_extraction()
             self.extracted_df = data_extraction.extract_pl_data()
             logging.info("Data extraction step completed successfully")
             return self.extracted_df
@@ -83,8 +159,8 @@ class ETLPipeline:
                 self.transform_data()
 
             logging.info("Starting data load step...")
-            data_load = DataLoad(df=self.transformed_df)
-            data_load.load_data_MongoDB()
+            data_load = DataLoad(df=self.transformed_df, backend=self.warehouse_backend)
+            self.load_summary = data_load.load_data_MongoDB()
             logging.info("Data load step completed successfully")
             return True
         except Exception as e:
@@ -103,6 +179,9 @@ class ETLPipeline:
             logging.info("Starting ETL Pipeline execution...")
             logging.info("=" * 60)
 
+            if self.streaming:
+                return self.run_streaming()
+
             # Step 1: Extract
             logging.info("STEP 1: Data Extraction")
             logging.info("-" * 60)
@@ -126,6 +205,7 @@ class ETLPipeline:
                 "status": "SUCCESS",
                 "extracted_records": len(self.extracted_df),
                 "transformed_records": len(self.transformed_df),
+                "load_summary": self.load_summary,
                 "message": "ETL Pipeline completed successfully"
             }
 
@@ -136,6 +216,55 @@ class ETLPipeline:
             logging.error("=" * 60)
             raise MyException(str(e), sys)
 
+    def run_streaming(self):
+        """
+        Execute the pipeline one (league, season) chunk at a time. Extraction, transformation and
+        loading run concurrently on different chunks, linked by bounded queues, so memory holds
+        at most a few chunks instead of the full extracted and transformed frames.
+
+        Returns:
+            dict: The same summary as run()
+        """
+        data_extraction = self._data_extraction()
+        counts = {"extracted_records": 0, "transformed_records": 0}
+        load_summary = {"inserted": 0, "updated": 0, "unchanged": 0, "changed_dates": [], "changed_teams": []}
+
+        def extract_chunks():
+            for league, season in data_extraction.season_keys():
+                extracted_df = data_extraction.extract_season(league, season)
+                counts["extracted_records"] += len(extracted_df)
+                yield extracted_df
+
+        def transform_chunks():
+            for extracted_df in bounded_stream(extract_chunks(), self.queue_size):
+                transformed_df = DataTransformation(df=extracted_df).transform_pl_data()
+                counts["transformed_records"] += len(transformed_df)
+                yield transformed_df
+
+        for transformed_df in bounded_stream(transform_chunks(), self.queue_size):
+            for key, value in DataLoad(df=transformed_df, backend=self.warehouse_backend).load_data_MongoDB().items():
+                if isinstance(value, list):
+                    load_summary[key] = sorted(set(load_summary[key]).union(value))
+                else:
+                    load_summary[key] += value
+            logging.info("Streamed chunk of {} records, totals so far: {}".format(len(transformed_df), counts))
+
+        self.load_summary = load_summary
+        self.extracted_records = counts["extracted_records"]
+        self.transformed_records = counts["transformed_records"]
+
+        logging.info("=" * 60)
+        logging.info("ETL Pipeline execution completed successfully!")
+        logging.info("=" * 60)
+
+        return {
+            "status": "SUCCESS",
+            "extracted_records": self.extracted_records,
+            "transformed_records": self.transformed_records,
+            "load_summary": self.load_summary,
+            "message": "ETL Pipeline completed successfully"
+        }
+
     def get_extracted_data(self):
         """
         Get the extracted data
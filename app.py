@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -9,15 +10,17 @@ import pickle
 import os
 from datetime import datetime
 from typing import Optional, Dict, List
-import logging
 from src.utils.prediction_preprocessor import EPLMatchPredictorPreprocessor
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from src.entity.model_registry import ModelRegistry
+from src.constants import (
+    MODEL_REGISTRY_DIR, PREDICTION_HISTORY_SEASONS, LOG_API_MAX_PER_SECOND, TRACE_REQUEST_ID_HEADER
 )
-logger = logging.getLogger(__name__)
+from src.logger import get_logger
+from src.utils import tracing
+
+# Records go through the queue of src.logger and are written by its background thread;
+# messages logged on every request are rate limited
+logger = get_logger(__name__, max_per_second=LOG_API_MAX_PER_SECOND)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -38,15 +41,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TRACE_REQUEST_ID_HEADER],
 )
 
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """
+    Every request is the root span of a trace (recorded for TRACE_SAMPLE_RATE of them); its id is
+    the request's correlation id, taken from the X-Request-ID header when the client sends one
+    and returned in the same header
+    """
+    request_id = request.headers.get(TRACE_REQUEST_ID_HEADER)
+    if request_id is not None and len(request_id) > 128:
+        request_id = None
+    with tracing.span("http_request", trace_id=request_id, method=request.method, path=request.url.path) as request_span:
+        response = await call_next(request)
+        request_span.set(status_code=response.status_code)
+    response.headers[TRACE_REQUEST_ID_HEADER] = request_span.trace_id
+    return response
+
 # Global variable to cache the model
 _cached_model = None
 _cached_preprocessor = None
 
+# Production model versions are looked up in the registry; versions are immutable,
+# so a loaded model is cached by version and a promotion or rollback is picked up
+# on the next request
+model_registry = ModelRegistry(registry_dir=MODEL_REGISTRY_DIR)
+
 
 def get_model_path():
-    """Get the path to the trained model"""
+    """Get the path to the trained model used when the registry has no production version"""
     model_path = os.path.join('saved_models', 'model.pkl')
     
     if not os.path.exists(model_path):
@@ -56,16 +82,20 @@ def get_model_path():
 
 
 def load_model():
-    """Load the trained model with caching"""
+    """Load the production model with caching"""
     global _cached_model
     
-    if _cached_model is not None:
-        logger.info("Using cached model")
-        return _cached_model
-    
     try:
+        if model_registry.current_version() is not None:
+            model_version, model = model_registry.load_model()
+            return model
+
+        if _cached_model is not None:
+            logger.info("Using cached model")
+            return _cached_model
+
         model_path = get_model_path()
-        logger.info(f"Loading model from {model_path}")
+        logger.info(f"No production version in the model registry, loading model from {model_path}")
         
         with open(model_path, 'rb') as file:
             _cached_model = pickle.load(file)
@@ -82,19 +112,19 @@ def load_model():
 
 
 def get_preprocessor():
-    """Get or create the preprocessor with caching"""
+    """Get the preprocessor attached to the match history shared by all workers"""
     global _cached_preprocessor
     
-    if _cached_preprocessor is not None:
+    if _cached_preprocessor is not None and not _cached_preprocessor.needs_refresh():
         return _cached_preprocessor
     
     try:
-        # Initialize preprocessor with historical seasons for data
-        _cached_preprocessor = EPLMatchPredictorPreprocessor(
-            seasons=['2025']
+        # The first worker loads the seasons and publishes them to a memory-mapped file;
+        # every other worker, and every worker started later, only attaches to it
+        _cached_preprocessor = EPLMatchPredictorPreprocessor.shared(
+            seasons=PREDICTION_HISTORY_SEASONS
         )
-        _cached_preprocessor.load_data()
-        logger.info("Preprocessor initialized and data loaded")
+        logger.info("Preprocessor attached to the shared match history")
         return _cached_preprocessor
     
     except Exception as e:
@@ -156,6 +186,7 @@ class HealthResponse(BaseModel):
     model_loaded: bool
     preprocessor_loaded: bool
     timestamp: str
+    model_version: Optional[str] = None
 
 
 # API Endpoints
@@ -191,7 +222,8 @@ async def health_check():
             status="healthy",
             model_loaded=model is not None,
             preprocessor_loaded=preprocessor is not None,
-            timestamp=datetime.now().isoformat()
+            timestamp=datetime.now().isoformat(),
+            model_version=model_registry.current_version()
         )
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -218,30 +250,35 @@ async def predict_match(data: MatchPredictionRequest):
     - Away Win
     """
     try:
-        logger.info(f"Prediction request: {data.home_team} vs {data.away_team} on {data.match_date}")
+        logger.info("Prediction request %s: %s vs %s on %s", tracing.current_trace_id(),
+                    data.home_team, data.away_team, data.match_date)
         
         # Load model
-        model = load_model()
+        with tracing.span("load_model"):
+            model = load_model()
         
         # Get preprocessor
-        preprocessor = get_preprocessor()
+        with tracing.span("load_preprocessor"):
+            preprocessor = get_preprocessor()
         
         # Prepare prediction data
         try:
-            df = preprocessor.make_prediction_row(
-                home_team=data.home_team,
-                away_team=data.away_team,
-                match_date=data.match_date
-            )
+            with tracing.span("feature_build"):
+                df = preprocessor.make_prediction_row(
+                    home_team=data.home_team,
+                    away_team=data.away_team,
+                    match_date=data.match_date
+                )
         except ValueError as e:
-            logger.warning(f"Preprocessor error: {str(e)}")
+            logger.warning("Preprocessor error %s: %s", tracing.current_trace_id(), e)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Unable to prepare prediction data: {str(e)}. Please ensure the teams have sufficient match history."
             )
         
         # Make prediction
-        probabilities = model.predict_proba(df)[0]
+        with tracing.span("inference"):
+            probabilities = model.predict_proba(df)[0]
         
         # Get class labels (assuming standard order: Away Win, Draw, Home Win)
         # Adjust based on your model's actual class order
@@ -258,23 +295,24 @@ async def predict_match(data: MatchPredictionRequest):
         prediction = outcome_labels[max_prob_idx]
         confidence = float(round(probabilities[max_prob_idx], 4))
         
-        logger.info(f"Prediction: {prediction} with confidence {confidence}")
+        logger.info("Prediction %s: %s with confidence %s", tracing.current_trace_id(), prediction, confidence)
         
-        result = PredictionResult(
-            home_team=data.home_team,
-            away_team=data.away_team,
-            match_date=data.match_date,
-            prediction=prediction,
-            probabilities=prob_dict,
-            confidence=confidence
-        )
-        
-        return result
+        # The result is validated and encoded here, inside the trace, instead of again by FastAPI
+        with tracing.span("serialization"):
+            result = PredictionResult(
+                home_team=data.home_team,
+                away_team=data.away_team,
+                match_date=data.match_date,
+                prediction=prediction,
+                probabilities=prob_dict,
+                confidence=confidence
+            )
+            return JSONResponse(content=jsonable_encoder(result))
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Prediction error: {str(e)}", exc_info=True)
+        logger.error("Prediction error %s: %s", tracing.current_trace_id(), e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Prediction failed: {str(e)}"
@@ -287,16 +325,14 @@ async def get_available_teams():
     try:
         preprocessor = get_preprocessor()
         
-        if preprocessor.df is None:
+        if not preprocessor.teams:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Preprocessor data not loaded"
             )
         
         # Get unique teams
-        home_teams = set(preprocessor.df['home_team'].unique())
-        away_teams = set(preprocessor.df['away_team'].unique())
-        all_teams = sorted(list(home_teams.union(away_teams)))
+        all_teams = list(preprocessor.teams)
         
         return {
             "teams": all_teams,
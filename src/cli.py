@@ -0,0 +1,411 @@
+"""
+Command line entry point for the ETL and training pipelines.
+
+    python -m src.cli etl --seasons 2023 2024 2025
+    python -m src.cli etl --stream --leagues "ENG-Premier League" "ESP-La Liga" --seasons 2015 2016 2017
+    python -m src.cli train --profile cprofile --sample-fraction 0.25
+    python -m src.cli etl --offline --fixture-dir fixtures --seasons 2024 --warehouse sqlite
+    python -m src.cli bench --warehouse sqlite --repeat 3
+    python -m src.cli train --source lake --seasons 2023 2024 2025
+    python -m src.cli evaluate --run-dir artifact/<TIMESTAMP>
+    python -m src.cli bench --repeat 3 --compare artifact/<TIMESTAMP>/pipeline_report.json
+    python -m src.cli backtest --run-dir artifact/<TIMESTAMP> --start 2023-08-01 --horizon-weeks 2
+    python -m src.cli registry rollback
+    python -m src.cli sweep --config config/sweep.yaml --max-workers 4 --max-memory-mb 2048
+    python -m src.cli sweep --split-dates 2024-12-01 2025-06-01 2025-12-10 --warehouse sqlite
+    python -m src.cli trace --root http_request --collapsed artifact/traces/predict.collapsed
+
+Profiles and reports are written into the artifact dir of the current run.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+
+import yaml
+
+from src.constants import (
+    PIPELINE_STATE_FILE_NAME, BENCH_REPORT_FILE_NAME, PROFILE_TOP_N, MODEL_REGISTRY_DIR, WAREHOUSE_BACKENDS,
+    DATA_INGESTION_SOURCES, TRACE_FILE_PATH
+)
+from src.entity.config_entity import training_pipeline_config, TrainingPipelineConfig
+from src.pipline.profiler import StageProfiler, PROFILE_MODES, maybe_profile
+from src.utils.model_search import SEARCH_MODES
+from src.logger import logging, flush_logs
+
+
+def _build_profiler(args, profile_dir=None):
+    if args.profile is None:
+        return None
+    return StageProfiler(profile_dir=profile_dir or training_pipeline_config.profile_dir, mode=args.profile, top_n=args.profile_top)
+
+
+def _print_json(content: dict) -> None:
+    # Written after the run's queued log records, so the report is the last thing on the terminal
+    flush_logs()
+    print(json.dumps(content, indent=4, default=str))
+
+
+def run_etl(args) -> int:
+    from ETL.etl_piepline import ETLPipeline
+
+    profiler = _build_profiler(args)
+    pipeline = ETLPipeline(seasons=args.seasons, leagues=args.leagues, refresh=args.refresh,
+                           offline=args.offline, fixture_dir=args.fixture_dir, streaming=args.stream,
+                           warehouse_backend=args.warehouse)
+    if args.stream:
+        # The stages overlap in streaming mode, so the run is profiled as a whole
+        with maybe_profile(profiler, "etl_stream"):
+            summary = pipeline.run()
+        _print_json({key: value for key, value in summary.items() if key != "message"})
+        return 0
+
+    with maybe_profile(profiler, "etl_extract"):
+        pipeline.extract_data()
+    with maybe_profile(profiler, "etl_transform"):
+        pipeline.transform_data()
+    with maybe_profile(profiler, "etl_load"):
+        pipeline.load_data()
+
+    _print_json({
+        "status": "SUCCESS",
+        "extracted_records": len(pipeline.get_extracted_data()),
+        "transformed_records": len(pipeline.get_transformed_data()),
+        "load_summary": pipeline.load_summary
+    })
+    return 0
+
+
+def run_train(args) -> int:
+    from src.pipline.training_pipeline import Training_Piepline
+
+    pipeline = Training_Piepline(
+        use_cache=not args.no_cache,
+        resume_from=args.resume_from,
+        trace_memory=not args.no_trace_memory,
+        profiler=_build_profiler(args),
+        sample_fraction=args.sample_fraction,
+        search_mode=args.search,
+        warehouse_backend=args.warehouse,
+        source=args.source,
+        seasons=args.seasons
+    )
+    pipeline.run_pipeline()
+    _print_json({
+        "artifact_dir": training_pipeline_config.artifact_dir,
+        "pipeline_report": training_pipeline_config.pipeline_report_file_path
+    })
+    return 0
+
+
+def run_evaluate(args) -> int:
+    from src.components.model_evaluation import ModelEvaluation
+    from src.entity.config_entity import ModelEvaluationConfig
+    from src.entity.artifact_entity import ModelTrainingArtifact, DataTransformationArtifcat
+
+    model_path, test_file_path = args.model_path, args.test_file
+    if args.run_dir is not None:
+        with open(os.path.join(args.run_dir, PIPELINE_STATE_FILE_NAME), "r") as state_file:
+            stages = json.load(state_file)["stages"]
+        if model_path is None:
+            if "model_pruning" in stages:
+                model_path = stages["model_pruning"]["artifact"]["pruned_model_path"]
+            else:
+                model_path = stages["model_training"]["artifact"]["trained_model_path"]
+        test_file_path = test_file_path or stages["data_transformation"]["artifact"]["transformed_test_file_path"]
+    if model_path is None or test_file_path is None:
+        raise SystemExit("evaluate needs --run-dir or both --model-path and --test-file")
+
+    model_evaluation = ModelEvaluation(
+        model_training_artifact=ModelTrainingArtifact(trained_model_path=model_path),
+        data_transformation_artifact=DataTransformationArtifcat(
+            transformed_trained_file_path=None,
+            transformed_test_file_path=test_file_path
+        ),
+        model_evaluation_config=ModelEvaluationConfig()
+    )
+    with maybe_profile(_build_profiler(args), "model_evaluation"):
+        model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
+    _print_json(vars(model_evaluation_artifact))
+    return 0
+
+
+def run_bench(args) -> int:
+    from src.pipline.training_pipeline import Training_Piepline
+    from src.pipline.pipeline_report import compare_pipeline_reports
+
+    # Every repeat gets its own artifact root, so each run's report, profiles and artifacts are kept
+    bench_dir = training_pipeline_config.artifact_dir
+    runs, run_configs = [], []
+    for repeat in range(args.repeat):
+        logging.info(f"Benchmark run {repeat + 1}/{args.repeat}")
+        run_config = TrainingPipelineConfig(artifact_dir=os.path.join(bench_dir, f"run_{repeat + 1}"))
+        pipeline = Training_Piepline(
+            pipeline_config=run_config,
+            use_cache=False,
+            trace_memory=not args.no_trace_memory,
+            profiler=_build_profiler(args, profile_dir=run_config.profile_dir),
+            sample_fraction=args.sample_fraction,
+            warehouse_backend=args.warehouse
+        )
+        # Benchmark runs must never replace the production model
+        pipeline.model_pusher_config.saved_model_dir = os.path.join(run_config.artifact_dir, "bench_saved_models")
+        pipeline.model_pusher_config.saved_model_path = os.path.join(pipeline.model_pusher_config.saved_model_dir, "model.pkl")
+        pipeline.model_pusher_config.registry_dir = os.path.join(pipeline.model_pusher_config.saved_model_dir, "registry")
+        pipeline.run_pipeline()
+        runs.append(pipeline.pipeline_report.stages)
+        run_configs.append(run_config)
+
+    summary = {}
+    for stage_name in [stage["stage"] for stage in runs[0]]:
+        stage_runs = [stage for run in runs for stage in run if stage["stage"] == stage_name]
+        summary[stage_name] = {
+            metric: {
+                "min": min(stage[metric] for stage in stage_runs),
+                "median": statistics.median(stage[metric] for stage in stage_runs),
+                "max": max(stage[metric] for stage in stage_runs)
+            }
+            for metric in ("wall_time_s", "cpu_time_s")
+        }
+        summary[stage_name]["peak_rss_bytes"] = max(stage["peak_rss_bytes"] or 0 for stage in stage_runs)
+
+    bench_report = {
+        "repeat": args.repeat,
+        "sample_fraction": args.sample_fraction,
+        "warehouse": args.warehouse,
+        "profile": args.profile,
+        "runs": [run_config.artifact_dir for run_config in run_configs],
+        "stages": summary
+    }
+    if args.compare is not None:
+        bench_report["comparison"] = [
+            compare_pipeline_reports(
+                baseline_report_path=args.compare,
+                candidate_report_path=run_config.pipeline_report_file_path
+            )
+            for run_config in run_configs
+        ]
+
+    bench_report_file_path = os.path.join(bench_dir, BENCH_REPORT_FILE_NAME)
+    with open(bench_report_file_path, "w") as report_file:
+        json.dump(bench_report, report_file, indent=4, default=str)
+    logging.info(f"Benchmark report saved to: {bench_report_file_path}")
+    _print_json(bench_report)
+    return 0
+
+
+def run_backtest(args) -> int:
+    from src.components.backtesting import Backtesting
+    from src.entity.config_entity import BacktestConfig
+
+    raw_file_path = args.raw_file
+    if raw_file_path is None and args.run_dir is not None:
+        with open(os.path.join(args.run_dir, PIPELINE_STATE_FILE_NAME), "r") as state_file:
+            raw_file_path = json.load(state_file)["stages"]["data_ingestion"]["artifact"]["trained_file_path"]
+    if raw_file_path is None:
+        from src.components.data_ingestion import DataIngestion
+        from src.entity.config_entity import DataIngestionConfig
+        data_ingestion_config = DataIngestionConfig()
+        if args.warehouse is not None:
+            data_ingestion_config.warehouse_backend = args.warehouse
+        raw_file_path = DataIngestion(data_ingestion_config=data_ingestion_config).initiate_DataIngestion().trained_file_path
+
+    backtest_config = BacktestConfig()
+    for option in ("start_date", "end_date", "step_weeks", "horizon_weeks", "n_jobs"):
+        if getattr(args, option) is not None:
+            setattr(backtest_config, option, getattr(args, option))
+
+    with maybe_profile(_build_profiler(args), "backtest"):
+        backtest_artifact = Backtesting(raw_file_path=raw_file_path, backtest_config=backtest_config).initiate_backtest()
+    _print_json(vars(backtest_artifact))
+    return 0
+
+
+def run_registry(args) -> int:
+    from src.entity.model_registry import ModelRegistry
+
+    registry = ModelRegistry(registry_dir=args.registry_dir)
+    if args.action == "promote":
+        if args.version is None:
+            raise SystemExit("registry promote needs --version")
+        registry.promote(args.version)
+    elif args.action == "rollback":
+        registry.rollback()
+
+    current_version = registry.current_version()
+    _print_json({
+        "production": current_version,
+        "versions": [
+            {
+                "version": metadata["version"],
+                "registered_at": metadata["registered_at"],
+                "accuracy": metadata.get("metrics", {}).get("accuracy"),
+                "production": metadata["version"] == current_version
+            }
+            for metadata in registry.list_versions()
+        ]
+    })
+    return 0
+
+
+def run_sweep(args) -> int:
+    from src.pipline.experiment_runner import ExperimentRunner, load_experiments, grid_experiments
+    from src.entity.config_entity import SweepConfig
+
+    experiments = load_experiments(args.config) if args.config is not None else []
+    grid = {key: values for key, values in (("split_date", args.split_dates), ("league", args.leagues)) if values}
+    experiments.extend(grid_experiments(grid))
+    if not experiments:
+        raise SystemExit("sweep needs --config or --split-dates/--leagues")
+    for experiment in experiments:
+        if experiment.warehouse_backend is None:
+            experiment.warehouse_backend = args.warehouse
+        if experiment.sample_fraction is None:
+            experiment.sample_fraction = args.sample_fraction
+
+    sweep_config = SweepConfig(use_cache=not args.no_cache, **{
+        option: getattr(args, option)
+        for option in ("sweep_dir", "max_workers", "max_memory_mb", "threads_per_worker", "rank_metric")
+        if getattr(args, option) is not None
+    })
+
+    sweep_artifact = ExperimentRunner(experiments=experiments, sweep_config=sweep_config).initiate_sweep()
+    with open(sweep_artifact.sweep_summary_file_path, "r") as summary_file:
+        summary = yaml.safe_load(summary_file)
+    _print_json({
+        **vars(sweep_artifact),
+        "experiments": [
+            {key: experiment.get(key) for key in ("rank", "name", "status", sweep_config.rank_metric,
+                                                  f"{sweep_config.rank_metric}_vs_baseline", "wall_time_s", "error")
+             if experiment.get(key) is not None}
+            for experiment in summary["experiments"]
+        ]
+    })
+    return 0
+
+
+def run_trace(args) -> int:
+    from src.utils.tracing import read_spans, summarize_spans, collapse_spans
+
+    spans = read_spans(file_path=args.file, trace_id=args.trace_id, root_name=args.root)
+    report = {
+        "traces": len({record["trace_id"] for record in spans}),
+        "spans": summarize_spans(spans)
+    }
+    if args.collapsed is not None:
+        report["collapsed_file"] = collapse_spans(spans, args.collapsed)
+    _print_json(report)
+    return 0
+
+
+def _sample_fraction(value: str) -> float:
+    fraction = float(value)
+    if not 0.0 < fraction <= 1.0:
+        raise argparse.ArgumentTypeError("sample fraction must be in (0, 1]")
+    return fraction
+
+
+def build_parser() -> argparse.ArgumentParser:
+    profile_options = argparse.ArgumentParser(add_help=False)
+    profile_options.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                                 help="profile every stage and write the output into the run's artifact dir")
+    profile_options.add_argument("--profile-top", type=int, default=PROFILE_TOP_N,
+                                 help="number of entries in the <stage>_top.txt summaries")
+
+    sample_options = argparse.ArgumentParser(add_help=False)
+    sample_options.add_argument("--sample-fraction", type=_sample_fraction, default=None,
+                                help="fraction of ingested rows to keep, for quick runs")
+    sample_options.add_argument("--no-trace-memory", action="store_true",
+                                help="skip tracemalloc peaks to keep timings free of its overhead")
+
+    warehouse_options = argparse.ArgumentParser(add_help=False)
+    warehouse_options.add_argument("--warehouse", choices=WAREHOUSE_BACKENDS, default=None,
+                                   help="warehouse backend, WAREHOUSE_BACKEND by default; sqlite needs no server")
+
+    parser = argparse.ArgumentParser(prog="epl-pipeline", description="Premier League match prediction pipelines")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    etl_parser = subparsers.add_parser("etl", parents=[profile_options, warehouse_options], help="extract, transform and load match data")
+    etl_parser.add_argument("--seasons", nargs="+", required=True, help="seasons to extract, e.g. 2023 2024 2025")
+    etl_parser.add_argument("--leagues", nargs="+", default=None, help="leagues to extract, ETL_LEAGUES by default")
+    etl_parser.add_argument("--refresh", action="store_true", help="fetch finished seasons again instead of using the cache")
+    etl_parser.add_argument("--offline", action="store_true", help="read seasons only from the cache or --fixture-dir")
+    etl_parser.add_argument("--stream", action="store_true",
+                            help="extract, transform and load one season at a time with bounded memory")
+    etl_parser.add_argument("--fixture-dir", default=None, help="directory of <league>/<season>.csv files for offline runs")
+    etl_parser.set_defaults(handler=run_etl)
+
+    train_parser = subparsers.add_parser("train", parents=[profile_options, sample_options, warehouse_options], help="run the training pipeline")
+    train_parser.add_argument("--no-cache", action="store_true", help="recompute every stage")
+    train_parser.add_argument("--resume-from", default=None, help="artifact dir of a failed run to resume")
+    train_parser.add_argument("--search", choices=SEARCH_MODES, default=None,
+                              help="search MODEL_SEARCH_SPACE with time-ordered CV before the final fit")
+    train_parser.add_argument("--source", choices=DATA_INGESTION_SOURCES, default=None,
+                              help="ingest from the warehouse (refreshing the local lake) or from the lake only")
+    train_parser.add_argument("--seasons", nargs="+", default=None,
+                              help="train on these seasons only, e.g. 2023 2024; lake reads open only their partitions")
+    train_parser.set_defaults(handler=run_train)
+
+    evaluate_parser = subparsers.add_parser("evaluate", parents=[profile_options], help="evaluate a trained model")
+    evaluate_parser.add_argument("--run-dir", default=None, help="artifact dir of a previous run")
+    evaluate_parser.add_argument("--model-path", default=None)
+    evaluate_parser.add_argument("--test-file", default=None)
+    evaluate_parser.set_defaults(handler=run_evaluate)
+
+    bench_parser = subparsers.add_parser("bench", parents=[profile_options, sample_options, warehouse_options],
+                                         help="time uncached training pipeline runs")
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    bench_parser.add_argument("--compare", default=None, help="pipeline_report.json of a baseline run")
+    bench_parser.set_defaults(handler=run_bench)
+
+    backtest_parser = subparsers.add_parser("backtest", parents=[profile_options, warehouse_options],
+                                            help="walk-forward evaluation over many split dates")
+    backtest_parser.add_argument("--raw-file", default=None, help="raw matches CSV; defaults to a fresh ingestion")
+    backtest_parser.add_argument("--run-dir", default=None, help="reuse the raw data of a previous run")
+    backtest_parser.add_argument("--start", dest="start_date", default=None, help="first fold origin, YYYY-MM-DD")
+    backtest_parser.add_argument("--end", dest="end_date", default=None, help="last fold origin, YYYY-MM-DD")
+    backtest_parser.add_argument("--step-weeks", type=int, default=None)
+    backtest_parser.add_argument("--horizon-weeks", type=int, default=None)
+    backtest_parser.add_argument("--n-jobs", type=int, default=None)
+    backtest_parser.set_defaults(handler=run_backtest)
+
+    registry_parser = subparsers.add_parser("registry", help="list, promote or roll back registered model versions")
+    registry_parser.add_argument("action", choices=("list", "promote", "rollback"))
+    registry_parser.add_argument("--version", default=None, help="version id to promote")
+    registry_parser.add_argument("--registry-dir", default=MODEL_REGISTRY_DIR)
+    registry_parser.set_defaults(handler=run_registry)
+
+    sweep_parser = subparsers.add_parser("sweep", parents=[warehouse_options],
+                                         help="run many pipeline configurations in a process pool and rank them")
+    sweep_parser.add_argument("--sample-fraction", type=_sample_fraction, default=None,
+                              help="fraction of ingested rows every experiment keeps, unless it sets its own")
+    sweep_parser.add_argument("--config", default=None, help="sweep YAML with `experiments` and/or a `grid`")
+    sweep_parser.add_argument("--split-dates", nargs="+", default=None, help="one experiment per split date")
+    sweep_parser.add_argument("--leagues", nargs="+", default=None, help="one experiment per league, combined with --split-dates")
+    sweep_parser.add_argument("--sweep-dir", default=None, help="artifact root of the sweep, artifact/sweeps/<TIMESTAMP> by default")
+    sweep_parser.add_argument("--max-workers", type=int, default=None, help="pipelines run at once, SWEEP_MAX_WORKERS by default")
+    sweep_parser.add_argument("--max-memory-mb", type=int, default=None, help="address space cap of every worker")
+    sweep_parser.add_argument("--threads-per-worker", type=int, default=None, help="BLAS/OpenMP threads of every worker")
+    sweep_parser.add_argument("--rank-metric", default=None, help="evaluation metric the experiments are ranked on")
+    sweep_parser.add_argument("--no-cache", action="store_true", help="recompute every stage of every experiment")
+    sweep_parser.set_defaults(handler=run_sweep)
+
+    trace_parser = subparsers.add_parser("trace", help="summarize exported spans per span path")
+    trace_parser.add_argument("--file", default=TRACE_FILE_PATH, help="JSON-lines span file")
+    trace_parser.add_argument("--trace-id", default=None, help="only the spans of this trace / request id")
+    trace_parser.add_argument("--root", default=None, help="only traces whose root span has this name, e.g. http_request")
+    trace_parser.add_argument("--collapsed", default=None,
+                              help="also write self times as collapsed stacks for a flame graph viewer")
+    trace_parser.set_defaults(handler=run_trace)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
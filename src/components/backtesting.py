@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.base import clone
+
+from src.exception import MyException
+from src.logger import logging
+from src.components.data_transformation import DataTransformation
+from src.entity.artifact_entity import BacktestArtifact
+from src.entity.config_entity import BacktestConfig, DataTransformationConfig
+from src.utils.shared_arrays import SharedArrays, attach_worker_arrays, worker_array
+from src.utils.model_search import score_probabilities
+
+
+def _run_fold(task):
+    """
+    Worker task: fits the model on every row before the fold origin and scores the
+    following horizon. Rows are date-sorted, so a fold is just two row offsets into
+    the shared X/y arrays.
+    """
+    fold_index, estimator, train_end, test_start, test_end, n_classes = task
+    X, y = worker_array("X"), worker_array("y")
+    model = clone(estimator)
+
+    fit_start = time.perf_counter()
+    model.fit(X[:train_end], y[:train_end])
+    fit_time = time.perf_counter() - fit_start
+
+    predict_start = time.perf_counter()
+    probabilities = model.predict_proba(X[test_start:test_end])
+    predict_time = time.perf_counter() - predict_start
+
+    return fold_index, {
+        **score_probabilities(y[test_start:test_end], probabilities, model.classes_, n_classes),
+        "fit_time_s": round(fit_time, 6),
+        "predict_time_s": round(predict_time, 6)
+    }
+
+
+class Backtesting:
+    """
+    Walk-forward (rolling-origin) backtest: for every origin D between start_date and
+    end_date, stepping step_weeks, train on all matches before D and test on the next
+    horizon_weeks. Features are built once for the whole history and folds run in a
+    process pool attached to them through shared memory.
+    """
+
+    def __init__(self, raw_file_path: str, backtest_config: BacktestConfig):
+        try:
+            self.raw_file_path = raw_file_path
+            self.backtest_config = backtest_config
+            logging.info("Backtesting class initialized successfully")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def build_folds(self, dates: pd.Series) -> list:
+        """
+        Returns (origin, test_end_date, train_end, test_start, test_end) tuples as row offsets into date-sorted data.
+        """
+        try:
+            config = self.backtest_config
+            origins = pd.date_range(start=config.start_date, end=config.end_date, freq=f"{7 * config.step_weeks}D")
+            date_values = dates.to_numpy(dtype="datetime64[ns]")
+
+            folds = []
+            for origin in origins:
+                window_end = origin + pd.Timedelta(weeks=config.horizon_weeks)
+                train_end = int(np.searchsorted(date_values, origin.to_datetime64(), side="left"))
+                test_end = int(np.searchsorted(date_values, window_end.to_datetime64(), side="left"))
+                if train_end < config.min_train_rows or test_end == train_end:
+                    logging.info(f"Skipping fold at {origin.date()}: {train_end} train rows, {test_end - train_end} test rows")
+                    continue
+                folds.append((origin, window_end, train_end, train_end, test_end))
+
+            logging.info(f"Built {len(folds)} walk-forward folds")
+            return folds
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def initiate_backtest(self) -> BacktestArtifact:
+        try:
+            config = self.backtest_config
+            logging.info(f"Loading raw data from: {self.raw_file_path}")
+            raw_df = pd.read_csv(self.raw_file_path)
+
+            # Features are computed once for the whole history; rolling windows only look backwards
+            build_start = time.perf_counter()
+            data_transformation = DataTransformation(
+                data_ingestion_artifact=None,
+                data_validtaion_artifact=None,
+                data_transformation_config=DataTransformationConfig()
+            )
+            df = data_transformation.build_features(raw_df)
+            feature_time = time.perf_counter() - build_start
+            logging.info(f"Built features for {len(df)} rows in {feature_time:.3f}s")
+
+            folds = self.build_folds(df["date"])
+            if not folds:
+                raise ValueError("No backtest folds between start_date and end_date")
+
+            X = df[config.input_features].to_numpy(dtype=np.float64)
+            classes, y = np.unique(df["result"].to_numpy(), return_inverse=True)
+
+            n_jobs = os.cpu_count() if config.n_jobs is None or config.n_jobs < 1 else config.n_jobs
+            n_jobs = min(n_jobs, len(folds))
+            logging.info(f"Running {len(folds)} folds on {n_jobs} processes")
+
+            fold_results = [None] * len(folds)
+            run_start = time.perf_counter()
+            with SharedArrays({"X": X, "y": y}) as shared:
+                with ProcessPoolExecutor(max_workers=n_jobs, initializer=attach_worker_arrays,
+                                         initargs=(shared.specs,)) as executor:
+                    tasks = [
+                        (index, config.model, train_end, test_start, test_end, len(classes))
+                        for index, (_, _, train_end, test_start, test_end) in enumerate(folds)
+                    ]
+                    for fold_index, scores in executor.map(_run_fold, tasks):
+                        origin, window_end, train_end, test_start, test_end = folds[fold_index]
+                        fold_results[fold_index] = {
+                            "fold": fold_index,
+                            "train_until": str(origin.date()),
+                            "test_until": str(window_end.date()),
+                            "n_train": train_end,
+                            "n_test": test_end - test_start,
+                            **scores
+                        }
+                        logging.info(
+                            f"Fold {fold_index} ({origin.date()}): accuracy={scores['accuracy']:.4f} "
+                            f"log_loss={scores['log_loss']:.4f} fit={scores['fit_time_s']:.3f}s"
+                        )
+            run_time = time.perf_counter() - run_start
+
+            accuracies = [fold["accuracy"] for fold in fold_results]
+            log_losses = [fold["log_loss"] for fold in fold_results]
+            report = {
+                "start_date": config.start_date,
+                "end_date": config.end_date,
+                "step_weeks": config.step_weeks,
+                "horizon_weeks": config.horizon_weeks,
+                "classes": [str(label) for label in classes],
+                "n_folds": len(fold_results),
+                "mean_accuracy": float(np.mean(accuracies)),
+                "std_accuracy": float(np.std(accuracies)),
+                "mean_log_loss": float(np.mean(log_losses)),
+                "std_log_loss": float(np.std(log_losses)),
+                "timings": {
+                    "feature_build_s": round(feature_time, 6),
+                    "folds_wall_s": round(run_time, 6),
+                    "folds_fit_sum_s": round(sum(fold["fit_time_s"] for fold in fold_results), 6),
+                    "n_jobs": n_jobs
+                },
+                "folds": fold_results
+            }
+
+            os.makedirs(os.path.dirname(config.backtest_report_file_path), exist_ok=True)
+            with open(config.backtest_report_file_path, 'w') as f:
+                yaml.dump(report, f, sort_keys=False)
+            logging.info(f"Backtest report saved to: {config.backtest_report_file_path}")
+
+            return BacktestArtifact(
+                backtest_report_file_path=config.backtest_report_file_path,
+                n_folds=len(fold_results),
+                mean_accuracy=round(report["mean_accuracy"], 4),
+                mean_log_loss=round(report["mean_log_loss"], 4)
+            )
+        except Exception as e:
+            logging.error(f"Error during backtest: {str(e)}")
+            raise MyException(e, sys)
@@ -1,9 +1,18 @@
 import os
 import sys
+import json
+import pickle
+import hashlib
+
+import pandas as pd
 
 from src.entity.config_entity import DataIngestionConfig
 from src.entity.artifact_entity import DataIngestionArtifact
 from src.data_access.EPL_data import EplData
+from src.data_access.match_lake import MatchLake, season_of
+from src.utils.main_utils import read_yaml_file
+from src.utils import tracing
+from src.constants import SCHEMA_FILE_PATH
 
 from src.logger import logging
 from src.exception import MyException
@@ -18,11 +27,164 @@ class DataIngestion:
             logging.error(f"Error initializing DataIngestion: {str(e)}")
             raise MyException(e, sys)
 
+    def _export(self, data: EplData, columns: dict, start_date=None, dates=None):
+        return data.export_collection_as_dataframe(
+            collection_name=self.data_ingestion_config.collection_name,
+            columns=columns,
+            start_date=start_date if start_date is not None else self.data_ingestion_config.start_date,
+            end_date=self.data_ingestion_config.end_date,
+            dates=dates,
+            batch_size=self.data_ingestion_config.export_batch_size
+        )
+
+    def cache_file_path(self, columns: dict) -> str:
+        """One cache per warehouse, collection, column set and date bounds, so a schema change starts a new cache."""
+        config = self.data_ingestion_config
+        key = hashlib.sha256(json.dumps({
+            "warehouse_backend": config.warehouse_backend,
+            "collection_name": config.collection_name,
+            "columns": columns,
+            "start_date": config.start_date,
+            "end_date": config.end_date
+        }, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return os.path.join(config.cache_dir, f"{config.collection_name}_{key}.pkl")
+
+    @staticmethod
+    def load_cache(cache_file_path: str):
+        if not os.path.exists(cache_file_path):
+            return None
+        with open(cache_file_path, "rb") as cache_file:
+            return pickle.load(cache_file)
+
+    @staticmethod
+    def save_cache(cache_file_path: str, df, changes_seen_at=None) -> None:
+        """
+        Stores the rows with their watermark (newest date) and the load time of the last
+        warehouse change already applied, in one file swapped in atomically.
+        """
+        os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+        watermark = df["date"].max() if len(df) else None
+        tmp_file_path = f"{cache_file_path}.tmp.{os.getpid()}"
+        with open(tmp_file_path, "wb") as cache_file:
+            pickle.dump({"watermark_date": watermark, "changes_seen_at": changes_seen_at, "df": df},
+                        cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file_path, cache_file_path)
+        logging.info(f"Ingestion cache of {len(df)} rows saved with watermark {watermark}: {cache_file_path}")
+
+    @staticmethod
+    def replace_dates(cached_df, refreshed_df, dates: list):
+        """
+        Swaps the cached rows of `dates` for their re-exported version. Updated rows keep their
+        position (matched by _id), deleted ones are dropped and new ones are appended.
+        """
+        refreshed_rows = refreshed_df.set_index("_id")
+        kept = cached_df[~cached_df["date"].isin(dates) | cached_df["_id"].isin(refreshed_rows.index)]
+        kept = kept.reset_index(drop=True)
+        is_refreshed = kept["_id"].isin(refreshed_rows.index)
+        updated = refreshed_rows.loc[kept.loc[is_refreshed, "_id"]].reset_index()[kept.columns]
+        updated.index = kept.index[is_refreshed]
+        kept = pd.concat([kept[~is_refreshed], updated]).sort_index()
+        added = refreshed_df[~refreshed_df["_id"].isin(kept["_id"])]
+        return pd.concat([kept, added], ignore_index=True)
+
+    def export_incremental(self, data: EplData, columns: dict):
+        """
+        Method Name :   export_incremental
+        Description :   Reads the cached rows and queries the warehouse only for matches dated on or
+                        after the cache's watermark, which replace the cached rows of those dates.
+                        Older dates that ETL loads changed since the last run (the warehouse's
+                        change log) are re-exported and swapped in. When the merged row count no
+                        longer matches the warehouse, the whole collection is exported again.
+
+        Output      :   Returns the full DataFrame, in export order
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.data_ingestion_config
+            cache_file_path = self.cache_file_path(columns)
+            cache = self.load_cache(cache_file_path)
+            data.ensure_date_index(collection_name=config.collection_name)
+
+            # Read the change log before the rows, so a load running meanwhile is picked up next time
+            changes_seen_at = cache.get("changes_seen_at") if cache is not None else None
+            changed_dates, latest_change = data.changes_since(config.collection_name, since=changes_seen_at)
+
+            if cache is None or cache["watermark_date"] is None:
+                logging.info("No ingestion cache yet, exporting the whole collection")
+                df = self._export(data, columns)
+            else:
+                watermark = cache["watermark_date"]
+                cached_df = cache["df"]
+                start_date = max(str(config.start_date), watermark) if config.start_date is not None else watermark
+                new_df = self._export(data, columns, start_date=start_date)
+                df = pd.concat([cached_df[cached_df["date"] < watermark], new_df], ignore_index=True)
+                logging.info(f"Incremental export from watermark {watermark}: {len(new_df)} rows exported, "
+                             f"{len(df) - len(new_df)} from cache")
+
+                stale_dates = [date for date in changed_dates if date < watermark]
+                if stale_dates:
+                    refreshed_df = self._export(data, columns, dates=stale_dates)
+                    df = self.replace_dates(df, refreshed_df, stale_dates)
+                    logging.info(f"Re-exported {len(refreshed_df)} rows of {len(stale_dates)} dates changed by ETL loads")
+
+                expected_rows = data.count_documents(
+                    collection_name=config.collection_name, start_date=config.start_date, end_date=config.end_date
+                )
+                if len(df) != expected_rows:
+                    logging.warning(f"Ingestion cache is out of sync ({len(df)} rows, warehouse has {expected_rows}), "
+                                    f"exporting the whole collection")
+                    df = self._export(data, columns)
+
+            self.save_cache(cache_file_path, df, changes_seen_at=latest_change)
+            return df
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def update_lake(self, df) -> None:
+        """Rewrites the lake partitions of the seasons whose matches changed since the last export."""
+        config = self.data_ingestion_config
+        if config.start_date is not None or config.end_date is not None:
+            # A bounded export holds partial seasons, which would replace complete partitions
+            logging.info("Export is bounded by start_date/end_date, the lake is left as it is")
+            return
+        MatchLake(config.lake_dir).write(df, league=config.league)
+
+    def read_lake(self, columns: dict):
+        """Reads the configured league, seasons and date range from the lake, opening only their partitions."""
+        config = self.data_ingestion_config
+        lake = MatchLake(config.lake_dir)
+        if not lake.partitions(leagues=[config.league], seasons=config.seasons):
+            raise FileNotFoundError(f"The lake at {config.lake_dir} holds no partitions of {config.league} "
+                                    f"seasons {config.seasons}; run an ingestion from the warehouse first")
+        return lake.read(leagues=[config.league], seasons=config.seasons, start_date=config.start_date,
+                         end_date=config.end_date, columns=list(columns))
+
     def export_data_as_dataframe(self):
         try:
-            logging.info(f"Exporting data from collection: {self.data_ingestion_config.collection_name}")
-            data = EplData()
-            df = data.export_collection_as_dataframe(collection_name=self.data_ingestion_config.collection_name)
+            config = self.data_ingestion_config
+            # Only the schema's columns are fetched, typed as the schema declares them
+            columns = read_yaml_file(file_path=SCHEMA_FILE_PATH)["columns"]
+            if config.source == "lake":
+                logging.info(f"Reading {config.league} seasons {config.seasons or 'all'} from the lake: {config.lake_dir}")
+                with tracing.span("read_lake", seasons=config.seasons) as lake_span:
+                    df = self.read_lake(columns)
+                    lake_span.set(rows=len(df))
+            else:
+                logging.info(f"Exporting data from collection: {config.collection_name}")
+                # Cached rows are matched to warehouse rows by _id, so incremental export needs it
+                with EplData(backend=config.warehouse_backend) as data, \
+                        tracing.span("warehouse_export", backend=config.warehouse_backend,
+                                     incremental=config.incremental) as export_span:
+                    if config.incremental and "_id" in columns:
+                        df = self.export_incremental(data, columns)
+                    else:
+                        df = self._export(data, columns)
+                    export_span.set(rows=len(df))
+                with tracing.span("update_lake"):
+                    self.update_lake(df)
+                if config.seasons is not None:
+                    df = df[season_of(df["date"]).isin([str(season) for season in config.seasons])]
+                    df = df.reset_index(drop=True)
             logging.info(f"Successfully exported data with shape: {df.shape}")
             return df
             
@@ -44,16 +206,33 @@ class DataIngestion:
             logging.error(f"Error while splitting data: {str(e)}")
             raise MyException(e, sys)
     
+    def sample_data(self, df):
+        try:
+            sample_fraction = self.data_ingestion_config.sample_fraction
+            if sample_fraction >= 1.0:
+                return df
+
+            logging.info(f"Sampling {sample_fraction:.0%} of {len(df)} rows")
+            # sort_index keeps the original (chronological) row order of the export
+            df = df.sample(frac=sample_fraction, random_state=self.data_ingestion_config.sample_seed).sort_index()
+            logging.info(f"Sampled data shape: {df.shape}")
+            return df
+        except Exception as e:
+            logging.error(f"Error while sampling data: {str(e)}")
+            raise MyException(e, sys)
+
     def initiate_DataIngestion(self):
         try:
             logging.info("Starting data ingestion process")
             df = self.export_data_as_dataframe()
+            df = self.sample_data(df)
 
             ingestion_file_path = os.path.dirname(self.data_ingestion_config.raw_file_path)
             os.makedirs(ingestion_file_path, exist_ok=True)
             logging.info(f"Created directory: {ingestion_file_path}")
 
-            df.to_csv(self.data_ingestion_config.raw_file_path, index=False, header=True)
+            with tracing.span("save_raw", rows=len(df)):
+                df.to_csv(self.data_ingestion_config.raw_file_path, index=False, header=True)
             logging.info(f"Raw data saved to: {self.data_ingestion_config.raw_file_path}")
 
             data_ingestion_artifact = DataIngestionArtifact(trained_file_path=self.data_ingestion_config.raw_file_path,
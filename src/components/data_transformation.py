@@ -6,10 +6,15 @@ import os
 from pandas import DataFrame
 
 from src.exception import MyException
-from src.logger import logging
+from src.logger import logging, get_logger
+from src.constants import LOG_HOT_PATH_MAX_PER_SECOND
+from src.utils import tracing
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataTransformationArtifcat
 from src.entity.config_entity import DataTransformationConfig
 
+# rolling_averages runs once per team group, so its messages are rate limited
+hot_path_logger = get_logger(__name__, max_per_second=LOG_HOT_PATH_MAX_PER_SECOND)
+
 
 class DataTransformation:
     def __init__(
@@ -76,14 +81,16 @@ class DataTransformation:
     # Redefine the rolling_averages function with corrections
     def rolling_averages(self, group, cols, new_cols):
         try:
-            logging.info(f"Calculating rolling averages for columns: {cols}")
+            # sort_values/dropna return new frames without the groupby name
+            name = getattr(group, "name", None)
+            hot_path_logger.debug("Calculating rolling averages of %s over %d matches", name, len(group))
             
             group = group.sort_values("date")
             rolling_stats = group[cols].rolling(5, closed='left').mean()
             group[new_cols] = rolling_stats
             group = group.dropna(subset=new_cols)
             
-            logging.info("Rolling averages calculated successfully")
+            hot_path_logger.debug("Rolling averages of %s calculated successfully", name)
             return group
         except Exception as e:
             logging.error(f"Error during rolling averages calculation: {str(e)}")
@@ -122,23 +129,24 @@ class DataTransformation:
 
             team_matches.dropna(subset=['points_last5_matches'], inplace=True)
 
-            df = df.merge(
-                team_matches[["date", "team", "points_last5_matches"]],
-                left_on=["date", "home_team"],
-                right_on=["date", "team"],
-                how="left"
-            ).rename(columns={
-                "points_last5_matches": "home_points_last5_matches"
-            }).drop(columns="team")
-
-            df = df.merge(
-                team_matches[["date", "team", "points_last5_matches"]],
-                left_on=["date", "away_team"],
-                right_on=["date", "team"],
-                how="left"
-            ).rename(columns={
-                "points_last5_matches": "away_points_last5_matches"
-            }).drop(columns="team")
+            with tracing.span("merge_points", rows=len(df)):
+                df = df.merge(
+                    team_matches[["date", "team", "points_last5_matches"]],
+                    left_on=["date", "home_team"],
+                    right_on=["date", "team"],
+                    how="left"
+                ).rename(columns={
+                    "points_last5_matches": "home_points_last5_matches"
+                }).drop(columns="team")
+
+                df = df.merge(
+                    team_matches[["date", "team", "points_last5_matches"]],
+                    left_on=["date", "away_team"],
+                    right_on=["date", "team"],
+                    how="left"
+                ).rename(columns={
+                    "points_last5_matches": "away_points_last5_matches"
+                }).drop(columns="team")
 
             df.dropna(subset=["home_points_last5_matches", "away_points_last5_matches"], inplace=True)
             
@@ -169,22 +177,16 @@ class DataTransformation:
             raise MyException(e, sys)
     
 
-    def initiate_data_transformation(self):
+    def build_features(self, df) -> pd.DataFrame:
+        """
+        Turns raw match rows into the model feature table, sorted by date.
+        Used by initiate_data_transformation and by the backtesting engine, which computes features once for all folds.
+        """
         try:
-            logging.info("Initiating data transformation")
-            
-            if self.data_validtaion_artifact.validation_status == True:
-                logging.info(f"Validation status is True, loading raw data file")
-                # Load the raw data (no split yet)
-                df = pd.read_csv(self.data_ingestion_artifact.trained_file_path)
-                logging.info(f"Raw data shape: {df.shape}")
-            else:
-                logging.error("Validation status is False, cannot proceed with data transformation")
-                raise ValueError("Data validation failed")
-            
             # Feature Engineering
             logging.info("Applying feature engineering")
-            df = self.feature_engineering(df)
+            with tracing.span("feature_engineering", rows=len(df)):
+                df = self.feature_engineering(df)
 
             # Define columns for rolling averages
             cols = [
@@ -202,11 +204,13 @@ class DataTransformation:
 
             # Apply rolling averages
             logging.info("Calculating rolling averages")
-            df = df.groupby("home_team", group_keys=False).apply(lambda x: self.rolling_averages(x, cols, new_cols))
+            with tracing.span("rolling_averages", columns=len(cols)):
+                df = df.groupby("home_team", group_keys=False).apply(lambda x: self.rolling_averages(x, cols, new_cols))
 
             # Add points rolling columns
             logging.info("Adding points rolling columns")
-            df = self.add_points_rolling_columns(df)
+            with tracing.span("points_rolling_columns"):
+                df = self.add_points_rolling_columns(df)
 
             # Drop the Extra columns
             logging.info("Dropping original columns")
@@ -214,12 +218,35 @@ class DataTransformation:
             
             # Add new columns
             logging.info("Adding derived feature columns")
-            df = self.add_new_Columns(df)
+            with tracing.span("derived_columns"):
+                df = self.add_new_Columns(df)
 
             # Sort and reset index
             logging.info("Sorting and resetting indices")
             df.sort_values('date', inplace=True)
             df.reset_index(inplace=True, drop=True)
+            return df
+
+        except Exception as e:
+            logging.error(f"Error during building features: {str(e)}")
+            raise MyException(e, sys)
+
+    def initiate_data_transformation(self):
+        try:
+            logging.info("Initiating data transformation")
+            
+            if self.data_validtaion_artifact.validation_status == True:
+                logging.info(f"Validation status is True, loading raw data file")
+                # Load the raw data (no split yet)
+                with tracing.span("read_raw"):
+                    df = pd.read_csv(self.data_ingestion_artifact.trained_file_path)
+                logging.info(f"Raw data shape: {df.shape}")
+            else:
+                logging.error("Validation status is False, cannot proceed with data transformation")
+                raise ValueError("Data validation failed")
+            
+            with tracing.span("build_features", rows=len(df)):
+                df = self.build_features(df)
 
             # SPLIT DATA INTO TRAIN AND TEST AFTER ALL TRANSFORMATIONS
             logging.info("Splitting data into train and test sets")
@@ -237,8 +264,9 @@ class DataTransformation:
             transformed_training_file_path = os.path.dirname(self.data_transformation_config.transformed_training_file_path)
             os.makedirs(transformed_training_file_path, exist_ok=True)
             
-            train_df.to_csv(self.data_transformation_config.transformed_training_file_path, index=False)
-            test_df.to_csv(self.data_transformation_config.transformed_test_file_path, index=False)
+            with tracing.span("save_transformed", train_rows=len(train_df), test_rows=len(test_df)):
+                train_df.to_csv(self.data_transformation_config.transformed_training_file_path, index=False)
+                test_df.to_csv(self.data_transformation_config.transformed_test_file_path, index=False)
             
             logging.info(f"Transformed training data saved to: {self.data_transformation_config.transformed_training_file_path}")
             logging.info(f"Transformed test data saved to: {self.data_transformation_config.transformed_test_file_path}")
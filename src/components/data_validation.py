@@ -9,6 +9,9 @@ from pandas import DataFrame
 from src.exception import MyException
 from src.logger import logging
 from src.utils.main_utils import read_yaml_file
+from src.utils.validation_checks import SchemaValidator
+from src.utils.distribution_sketch import DatasetSketch, compare_sketches
+from src.entity.model_registry import ModelRegistry
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from src.entity.config_entity import DataValidationConfig
 from src.constants import SCHEMA_FILE_PATH
@@ -84,13 +87,83 @@ class DataValidation:
             return pd.read_csv(file_path)
         except Exception as e:
             raise MyException(e, sys)
-        
+
+    @staticmethod
+    def read_header(file_path) -> DataFrame:
+        """Empty DataFrame with the file's columns, for the column checks."""
+        try:
+            return pd.read_csv(file_path, nrows=0)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def new_sketch(self) -> DatasetSketch:
+        config = self.data_validation_config
+        return DatasetSketch.from_schema(
+            self._schema_config,
+            exclude_columns=config.sketch_exclude_columns,
+            bin_width=config.sketch_bin_width,
+            max_bins=config.sketch_max_bins,
+            max_categories=config.sketch_max_categories
+        )
+
+    def validate_rows(self, file_path: str, sketch: DatasetSketch = None) -> dict:
+        """
+        Method Name :   validate_rows
+        Description :   Runs the dtype, null, range and duplicate key checks of the schema over
+                        the file in one chunked pass, without holding the whole file in memory.
+                        The distribution sketch, when given, is updated in the same pass.
+
+        Output      :   Returns the SchemaValidator report of the file
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            validator = SchemaValidator(schema=self._schema_config,
+                                        sample_size=self.data_validation_config.failure_sample_size)
+            for chunk in pd.read_csv(file_path, chunksize=self.data_validation_config.chunk_size):
+                validator.update(chunk)
+                if sketch is not None:
+                    sketch.update(chunk)
+            row_report = validator.report()
+            logging.info(f"Validated {row_report['rows']} rows of {file_path} with {row_report['checks_run']} checks, "
+                         f"failed: {row_report['failed_checks']}")
+            return row_report
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def detect_drift(self, sketch: DatasetSketch) -> dict:
+        """
+        Method Name :   detect_drift
+        Description :   Compares the sketch of the new data with the sketch of the data the
+                        production model was trained on, stored with it in the model registry
+
+        Output      :   Returns the drift report, with drift_detected None when there is no baseline yet
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            baseline_sketch_path = ModelRegistry(self.data_validation_config.baseline_registry_dir).current_data_sketch_path()
+            if baseline_sketch_path is None:
+                logging.info("No baseline data sketch in the model registry, skipping drift detection")
+                return {"drift_detected": None, "baseline_sketch_file_path": None}
+
+            drift_report = compare_sketches(
+                baseline=DatasetSketch.load(baseline_sketch_path),
+                current=sketch,
+                psi_threshold=self.data_validation_config.psi_threshold,
+                ks_threshold=self.data_validation_config.ks_threshold,
+                n_buckets=self.data_validation_config.psi_buckets
+            )
+            drift_report["baseline_sketch_file_path"] = baseline_sketch_path
+            logging.info(f"Drift against {baseline_sketch_path}: {drift_report['drift_detected']}, "
+                         f"drifted columns: {drift_report['drifted_columns']}")
+            return drift_report
+        except Exception as e:
+            raise MyException(e, sys) from e
 
     def initiate_data_validation(self) -> DataValidationArtifact:
         """
         Method Name :   initiate_data_validation
         Description :   This method initiates the data validation component for the pipeline
-        
+
         Output      :   Returns bool value based on validation results
         On Failure  :   Write an exception log and then raise an exception
         """
@@ -98,58 +171,68 @@ class DataValidation:
         try:
             validation_error_msg = ""
             logging.info("Starting data validation")
-            train_df, test_df = (DataValidation.read_data(file_path=self.data_ingestion_artifact.trained_file_path),
-                                 DataValidation.read_data(file_path=self.data_ingestion_artifact.test_file_path))
-
-            # Checking col len of dataframe for train/test df
-            status = self.validate_number_of_columns(dataframe=train_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in training dataframe. "
-            else:
-                logging.info(f"All required columns present in training dataframe: {status}")
-
-            status = self.validate_number_of_columns(dataframe=test_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in test dataframe. "
-            else:
-                logging.info(f"All required columns present in testing dataframe: {status}")
-
-            # Validating col dtype for train/test df
-            status = self.is_column_exist(df=train_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in training dataframe. "
-            else:
-                logging.info(f"All categorical/int columns present in training dataframe: {status}")
-
-            status = self.is_column_exist(df=test_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in test dataframe."
-            else:
-                logging.info(f"All categorical/int columns present in testing dataframe: {status}")
+            files = {"training": self.data_ingestion_artifact.trained_file_path}
+            # Ingestion currently hands the same raw file over as train and test; validate it once
+            if self.data_ingestion_artifact.test_file_path != self.data_ingestion_artifact.trained_file_path:
+                files["test"] = self.data_ingestion_artifact.test_file_path
+
+            file_reports = {}
+            sketch = self.new_sketch()
+            for name, file_path in files.items():
+                header_df = DataValidation.read_header(file_path=file_path)
+
+                # Checking col len and col existence on the header only
+                status = self.validate_number_of_columns(dataframe=header_df)
+                if not status:
+                    validation_error_msg += f"Columns are missing in {name} dataframe. "
+                else:
+                    logging.info(f"All required columns present in {name} dataframe: {status}")
+
+                status = self.is_column_exist(df=header_df)
+                if not status:
+                    validation_error_msg += f"Columns are missing in {name} dataframe. "
+                else:
+                    logging.info(f"All categorical/int columns present in {name} dataframe: {status}")
+
+                # Row level checks in a single pass over the file
+                row_report = self.validate_rows(file_path=file_path, sketch=sketch)
+                if row_report["failed_checks"]:
+                    validation_error_msg += f"Failed row checks in {name} dataframe: {', '.join(row_report['failed_checks'])}. "
+                file_reports[name] = {"file_path": file_path, **row_report}
+
+            # The sketch is kept with the artifact; the pusher stores it with the model as the next baseline
+            sketch.save(self.data_validation_config.sketch_file_path)
+            drift_report = self.detect_drift(sketch)
+            if drift_report["drift_detected"] and self.data_validation_config.fail_on_drift:
+                validation_error_msg += f"Data drift in columns: {', '.join(drift_report['drifted_columns'])}. "
 
             validation_status = len(validation_error_msg) == 0
 
             data_validation_artifact = DataValidationArtifact(
                 validation_status=validation_status,
                 message=validation_error_msg,
-                validation_report_file_path=self.data_validation_config.validation_report_file_path
+                validation_report_file_path=self.data_validation_config.validation_report_file_path,
+                data_sketch_file_path=self.data_validation_config.sketch_file_path,
+                drift_detected=drift_report["drift_detected"]
             )
 
             # Ensure the directory for validation_report_file_path exists
             report_dir = os.path.dirname(self.data_validation_config.validation_report_file_path)
             os.makedirs(report_dir, exist_ok=True)
 
-            # Save validation status and message to a JSON file
+            # Save validation status, message and the per-check results to a JSON file
             validation_report = {
                 "validation_status": validation_status,
-                "message": validation_error_msg.strip()
+                "message": validation_error_msg.strip(),
+                "files": file_reports,
+                "drift": drift_report
             }
 
             with open(self.data_validation_config.validation_report_file_path, "w") as report_file:
-                json.dump(validation_report, report_file, indent=4)
+                json.dump(validation_report, report_file, indent=4, default=str)
 
             logging.info("Data validation artifact created and saved to JSON file.")
             logging.info(f"Data validation artifact: {data_validation_artifact}")
             return data_validation_artifact
         except Exception as e:
-            raise MyException(e, sys) from e
\ No newline at end of file
+            raise MyException(e, sys) from e
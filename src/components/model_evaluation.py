@@ -1,4 +1,6 @@
 import pickle
+import time
+import numpy as np
 import pandas as pd
 import os
 import yaml
@@ -7,6 +9,7 @@ from src.exception import MyException
 from src.logger import logging
 from src.entity.artifact_entity import ModelTrainingArtifact, ModelEvaluationArtifact,DataTransformationArtifcat
 from src.entity.config_entity import ModelEvaluationConfig
+from src.utils.model_format import save_compiled_model, load_compiled_model
 import sys
 
 class ModelEvaluation:
@@ -18,6 +21,89 @@ class ModelEvaluation:
         self.data_transformation_artifact = data_transformation_artifact
         self.model_evaluation_config = model_evaluation_config
 
+    @staticmethod
+    def _latency_summary(timings: list) -> dict:
+        timings_ms = np.array(timings) * 1000
+        return {
+            'p50_ms': float(np.percentile(timings_ms, 50)),
+            'p99_ms': float(np.percentile(timings_ms, 99))
+        }
+
+    def _load_serving_model(self, model_path: str):
+        """
+        Compiles the model into the memory-mappable format the API serves and returns
+        (path, loader); models that cannot be compiled are served, and measured, as pickle.
+        """
+        try:
+            with open(model_path, 'rb') as f:
+                model = pickle.load(f)
+            save_compiled_model(model, self.model_evaluation_config.compiled_model_path)
+            return self.model_evaluation_config.compiled_model_path, load_compiled_model
+        except Exception as e:
+            logging.warning(f"Benchmarking the pickled model, it cannot be compiled: {e}")
+
+            def load_pickle(path):
+                with open(path, 'rb') as f:
+                    return pickle.load(f)
+            return model_path, load_pickle
+
+    def benchmark_model(self, model_path: str, X_test: pd.DataFrame) -> dict:
+        """
+        Measures what serving the model costs: serialized size, load time and
+        single-row / full-batch predict_proba latency percentiles of the served format.
+        """
+        try:
+            config = self.model_evaluation_config
+            serving_model_path, load_serving_model = self._load_serving_model(model_path)
+
+            load_timings = []
+            for _ in range(config.benchmark_load_repeats):
+                start = time.perf_counter()
+                model = load_serving_model(serving_model_path)
+                load_timings.append(time.perf_counter() - start)
+
+            single_row = X_test.iloc[:1]
+            model.predict_proba(single_row)  # warm-up, excluded from the timings
+            single_row_timings, batch_timings = [], []
+            for _ in range(config.benchmark_repeats):
+                start = time.perf_counter()
+                model.predict_proba(single_row)
+                single_row_timings.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                model.predict_proba(X_test)
+                batch_timings.append(time.perf_counter() - start)
+
+            benchmark = {
+                'format': 'compiled' if serving_model_path != model_path else 'pickle',
+                'size_bytes': os.path.getsize(serving_model_path),
+                'load_time_ms': float(np.median(load_timings) * 1000),
+                'single_row': self._latency_summary(single_row_timings),
+                'batch': {'rows': len(X_test), **self._latency_summary(batch_timings)},
+                'repeats': config.benchmark_repeats
+            }
+            logging.info(
+                f"Model benchmark - size: {benchmark['size_bytes']} bytes, load: {benchmark['load_time_ms']:.2f}ms, "
+                f"single-row p99: {benchmark['single_row']['p99_ms']:.2f}ms, batch p99: {benchmark['batch']['p99_ms']:.2f}ms"
+            )
+            return benchmark
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def check_budgets(self, benchmark: dict) -> dict:
+        """Returns the budgets the benchmark exceeds, keyed by name; empty when all are met."""
+        config = self.model_evaluation_config
+        checks = {
+            'single_row_p99_ms': (benchmark['single_row']['p99_ms'], config.single_row_p99_budget_ms),
+            'batch_p99_ms': (benchmark['batch']['p99_ms'], config.batch_p99_budget_ms),
+            'load_time_ms': (benchmark['load_time_ms'], config.load_time_budget_ms),
+            'size_bytes': (benchmark['size_bytes'], config.size_budget_bytes)
+        }
+        return {
+            name: {'value': value, 'budget': budget}
+            for name, (value, budget) in checks.items()
+            if budget is not None and value > budget
+        }
+
     def initiate_model_evaluation(self) -> ModelEvaluationArtifact:
         """
         Model Evaluation Component: Evaluates trained model on test data and generates report
@@ -41,23 +127,7 @@ class ModelEvaluation:
             logging.info(f"Test data shape: {test_df.shape}")
             
             # Features (same as training)
-            input_features = [
-                    'home_shots_on_target_avg_last5',
-                    'away_shots_on_target_avg_last5',
-                    'home_shots_avg_last5',
-                    'away_shots_avg_last5',
-                    'home_team_goals_conceded_avg_last5',
-                    'away_team_goals_conceded_avg_last5',
-                    'home_goals_avg_last5',
-                    'away_goals_avg_last5',
-                    'home_points_last5_matches',
-                    'away_points_last5_matches',
-                    'points_diff_last5',
-                    'goal_diff_avg5',
-                    'shots_diff_avg5',
-                    'x_defense_diff',
-                    'home_advantage',
-                    'shots_on_target_diff_avg5']
+            input_features = self.model_evaluation_config.input_features
             
             logging.info(f"Extracting features: {len(input_features)} features")
             X_test = test_df[input_features]
@@ -79,6 +149,12 @@ class ModelEvaluation:
             model_path = self.model_training_artifact.trained_model_path
             
             logging.info(f"Model Evaluation Metrics - Accuracy: {accuracy:.4f}, Precision: {precision:.4f}, Recall: {recall:.4f}, F1: {f1:.4f}")
+
+            # Benchmark serving cost
+            logging.info("Benchmarking model size, load time and predict_proba latency...")
+            benchmark = self.benchmark_model(model_path, X_test)
+            budget_violations = self.check_budgets(benchmark)
+            is_within_budget = not budget_violations
             
             # Create evaluation report
             evaluation_report = {
@@ -87,7 +163,16 @@ class ModelEvaluation:
                 'recall': float(recall),
                 'f1_score': float(f1),
                 'expected_accuracy': self.model_evaluation_config.expected_accuracy,
-                'model_path': model_path
+                'model_path': model_path,
+                'benchmark': benchmark,
+                'budgets': {
+                    'single_row_p99_ms': self.model_evaluation_config.single_row_p99_budget_ms,
+                    'batch_p99_ms': self.model_evaluation_config.batch_p99_budget_ms,
+                    'load_time_ms': self.model_evaluation_config.load_time_budget_ms,
+                    'size_bytes': self.model_evaluation_config.size_budget_bytes
+                },
+                'budget_violations': budget_violations,
+                'is_within_budget': is_within_budget
             }
             
             # Save report to YAML file
@@ -99,20 +184,24 @@ class ModelEvaluation:
                 yaml.dump(evaluation_report, f)
             logging.info("Evaluation report saved successfully")
             
-            # Check if meets threshold
-            is_model_accepted = accuracy >= self.model_evaluation_config.expected_accuracy
+            # Check if meets threshold and serving budgets
+            meets_accuracy = accuracy >= self.model_evaluation_config.expected_accuracy
+            is_model_accepted = meets_accuracy and is_within_budget
             
             if is_model_accepted:
                 logging.info(f"Model ACCEPTED! Accuracy {accuracy:.4f} >= Threshold {self.model_evaluation_config.expected_accuracy}")
-            else:
+            elif not meets_accuracy:
                 logging.warning(f"Model REJECTED! Accuracy {accuracy:.4f} < Threshold {self.model_evaluation_config.expected_accuracy}")
+            for name, violation in budget_violations.items():
+                logging.warning(f"Model REJECTED! {name} {violation['value']:.2f} over budget {violation['budget']}")
             
             # Create artifact
             model_evaluation_artifact = ModelEvaluationArtifact(
                 accuracy=round(accuracy, 4),
                 model_test_report_file_path=report_file_path,
                 is_model_accepted=is_model_accepted,
-                model_path=model_path
+                model_path=model_path,
+                is_within_budget=is_within_budget
             )
             
             logging.info("Exited the model_evaluation method")
@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import pickle
+
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.metrics import accuracy_score, log_loss
+
+from src.exception import MyException
+from src.logger import logging
+from src.entity.artifact_entity import DataTransformationArtifcat, ModelTrainingArtifact, ModelPruningArtifact
+from src.entity.config_entity import ModelPruningConfig
+from src.utils.ensemble_utils import (
+    estimator_class_predictions,
+    samme_predict_proba,
+    tree_signature,
+    select_estimators
+)
+
+
+class ModelPruning:
+    def __init__(self, model_training_artifact: ModelTrainingArtifact,
+                 data_transformation_artifact: DataTransformationArtifcat,
+                 model_pruning_config: ModelPruningConfig):
+        self.model_training_artifact = model_training_artifact
+        self.data_transformation_artifact = data_transformation_artifact
+        self.model_pruning_config = model_pruning_config
+
+    @staticmethod
+    def _scores(y_codes, probabilities, n_classes) -> dict:
+        return {
+            'accuracy': float(accuracy_score(y_codes, probabilities.argmax(axis=1))),
+            'log_loss': float(log_loss(y_codes, probabilities, labels=np.arange(n_classes)))
+        }
+
+    def merge_identical_estimators(self, model, class_predictions):
+        """
+        Trees with the same split features, thresholds and leaf classes vote identically, so they are
+        replaced by one tree carrying the sum of their weights. SAMME output is unchanged.
+        """
+        try:
+            groups = {}
+            for index, estimator in enumerate(model.estimators_):
+                groups.setdefault(tree_signature(estimator), []).append(index)
+
+            keep = [indices[0] for indices in groups.values()]
+            weights = [model.estimator_weights_[indices].sum() for indices in groups.values()]
+            logging.info(f"Merged {len(model.estimators_)} trees into {len(keep)} distinct trees")
+
+            return select_estimators(model, keep, weights=weights), class_predictions[keep]
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def drop_low_weight_estimators(self, model, class_predictions, y_codes, baseline):
+        """
+        Drops the lowest-weight trees one at a time, stopping before the first drop that takes
+        accuracy or log loss on the validation slice outside the configured tolerance of the
+        unpruned model. class_predictions, y_codes and baseline are those of the validation slice.
+        """
+        try:
+            config = self.model_pruning_config
+            n_classes = len(model.classes_)
+            order = np.argsort(model.estimator_weights_)  # lowest weight first
+
+            best_drop = 0
+            for n_drop in range(1, len(order)):
+                keep = np.sort(order[n_drop:])
+                scores = self._scores(
+                    y_codes, samme_predict_proba(class_predictions[keep], model.estimator_weights_[keep], n_classes), n_classes
+                )
+                if (baseline['accuracy'] - scores['accuracy'] > config.accuracy_tolerance
+                        or scores['log_loss'] - baseline['log_loss'] > config.log_loss_tolerance):
+                    break
+                best_drop = n_drop
+
+            keep = np.sort(order[best_drop:])
+            logging.info(f"Dropping {best_drop} low-weight trees, keeping {len(keep)}")
+            return select_estimators(model, keep)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def measure_model(self, model, X_test) -> dict:
+        """Serialized size and median predict_proba latency for one row and for the whole test split."""
+        try:
+            repeats = self.model_pruning_config.latency_repeats
+            single_row = X_test.iloc[:1]
+
+            timings = {'single_row': [], 'batch': []}
+            for _ in range(repeats):
+                start = time.perf_counter()
+                model.predict_proba(single_row)
+                timings['single_row'].append(time.perf_counter() - start)
+                start = time.perf_counter()
+                model.predict_proba(X_test)
+                timings['batch'].append(time.perf_counter() - start)
+
+            return {
+                'n_estimators': len(model.estimators_),
+                'size_bytes': len(pickle.dumps(model)),
+                'single_row_p50_ms': float(np.median(timings['single_row']) * 1000),
+                'batch_p50_ms': float(np.median(timings['batch']) * 1000),
+                'batch_rows': len(X_test)
+            }
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def initiate_model_pruning(self) -> ModelPruningArtifact:
+        """
+        Model Pruning Component: compresses the trained ensemble for cheaper inference and
+        saves the pruned model with a size/latency comparison report
+        """
+        try:
+            logging.info("Entered the model_pruning method")
+            config = self.model_pruning_config
+
+            with open(self.model_training_artifact.trained_model_path, 'rb') as f:
+                model = pickle.load(f)
+            with open(self.model_training_artifact.trained_model_path, 'rb') as f:
+                original_model = pickle.load(f)
+
+            test_df = pd.read_csv(self.data_transformation_artifact.transformed_test_file_path)
+            X_test = test_df[config.input_features]
+            n_classes = len(model.classes_)
+            y_codes = np.searchsorted(model.classes_, test_df['result'].to_numpy())
+            baseline = self._scores(y_codes, model.predict_proba(X_test), n_classes)
+            n_estimators_before = len(model.estimators_)
+
+            if config.enabled:
+                # Trees are dropped by their effect on the most recent training rows: choosing on the
+                # test split would bias the acceptance check that model evaluation runs on it
+                train_df = pd.read_csv(self.data_transformation_artifact.transformed_trained_file_path)
+                n_validation = int(len(train_df) * config.validation_fraction)
+                if n_validation < 1:
+                    raise ValueError(f"validation_fraction {config.validation_fraction} leaves no validation rows")
+                validation_df = train_df.iloc[-n_validation:]
+                y_val_codes = np.searchsorted(model.classes_, validation_df['result'].to_numpy())
+                class_predictions = estimator_class_predictions(model, validation_df[config.input_features])
+                val_baseline = self._scores(
+                    y_val_codes, samme_predict_proba(class_predictions, model.estimator_weights_, n_classes), n_classes
+                )
+                logging.info(f"Choosing trees to drop on the latest {n_validation} training rows")
+
+                model, class_predictions = self.merge_identical_estimators(model, class_predictions)
+                model = self.drop_low_weight_estimators(model, class_predictions, y_val_codes, val_baseline)
+            else:
+                logging.info("Model pruning disabled, saving the trained model unchanged")
+
+            pruned = self._scores(y_codes, model.predict_proba(X_test), n_classes)
+            logging.info(
+                f"Pruned {n_estimators_before} -> {len(model.estimators_)} trees: "
+                f"accuracy {baseline['accuracy']:.4f} -> {pruned['accuracy']:.4f}, "
+                f"log_loss {baseline['log_loss']:.4f} -> {pruned['log_loss']:.4f}"
+            )
+
+            os.makedirs(config.model_pruning_dir, exist_ok=True)
+            with open(config.pruned_model_path, 'wb') as f:
+                pickle.dump(model, f)
+            logging.info(f"Pruned model saved to: {config.pruned_model_path}")
+
+            report = {
+                'accuracy_tolerance': config.accuracy_tolerance,
+                'log_loss_tolerance': config.log_loss_tolerance,
+                'validation_fraction': config.validation_fraction,
+                'original': {**baseline, **self.measure_model(original_model, X_test)},
+                'pruned': {**pruned, **self.measure_model(model, X_test)}
+            }
+            with open(config.pruning_report_file_path, 'w') as f:
+                yaml.dump(report, f, sort_keys=False)
+            logging.info(f"Pruning report saved to: {config.pruning_report_file_path}")
+
+            model_pruning_artifact = ModelPruningArtifact(
+                pruned_model_path=config.pruned_model_path,
+                pruning_report_file_path=config.pruning_report_file_path,
+                n_estimators_before=n_estimators_before,
+                n_estimators_after=len(model.estimators_)
+            )
+            logging.info("Exited the model_pruning method")
+            return model_pruning_artifact
+
+        except Exception as e:
+            logging.error(f"Error in model pruning: {str(e)}")
+            raise MyException(e, sys)
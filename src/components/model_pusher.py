@@ -1,40 +1,76 @@
 import shutil
 import os
+import pickle
+import yaml
+from typing import Optional
 from src.exception import MyException
 from src.logger import logging
-from src.entity.artifact_entity import ModelEvaluationArtifact, ModelPusherArtifact
+from src.entity.artifact_entity import ModelEvaluationArtifact, ModelPusherArtifact, DataTransformationArtifcat, DataValidationArtifact
 from src.entity.config_entity import ModelPusherConfig
+from src.entity.model_registry import ModelRegistry
+from src.utils.main_utils import compute_file_hash
 import sys
 
 class ModelPusher:
-    def __init__(self, model_evaluation_artifact: ModelEvaluationArtifact, 
-                 model_pusher_config: ModelPusherConfig):
+    def __init__(self, model_evaluation_artifact: ModelEvaluationArtifact,
+                 model_pusher_config: ModelPusherConfig,
+                 data_transformation_artifact: Optional[DataTransformationArtifcat] = None,
+                 data_validation_artifact: Optional[DataValidationArtifact] = None):
         self.model_evaluation_artifact = model_evaluation_artifact
         self.model_pusher_config = model_pusher_config
+        self.data_transformation_artifact = data_transformation_artifact
+        self.data_validation_artifact = data_validation_artifact
+
+    def build_model_metadata(self) -> dict:
+        """
+        Metadata stored next to a registered model: what it expects as input, what it
+        predicts, how well it did and which data it was trained on.
+        """
+        try:
+            with open(self.model_evaluation_artifact.model_path, 'rb') as f:
+                model = pickle.load(f)
+            with open(self.model_evaluation_artifact.model_test_report_file_path, 'r') as f:
+                evaluation_report = yaml.safe_load(f)
+
+            metadata = {
+                'features': list(self.model_pusher_config.input_features),
+                'classes': [str(label) for label in model.classes_],
+                'model_class': type(model).__name__,
+                'model_params': repr(model.get_params()),
+                'metrics': {
+                    key: evaluation_report[key]
+                    for key in ('accuracy', 'precision', 'recall', 'f1_score', 'benchmark')
+                    if key in evaluation_report
+                },
+                'training_artifact_dir': os.path.dirname(os.path.dirname(self.model_evaluation_artifact.model_path))
+            }
+            if self.data_transformation_artifact is not None:
+                metadata['training_data_hash'] = compute_file_hash(self.data_transformation_artifact.transformed_trained_file_path)
+                metadata['test_data_hash'] = compute_file_hash(self.data_transformation_artifact.transformed_test_file_path)
+            return metadata
+        except Exception as e:
+            raise MyException(e, sys)
 
     def initiate_model_pusher(self) -> ModelPusherArtifact:
         """
-        Model Pusher Component: Pushes accepted model to production directory
-        Returns ModelPusherArtifact with push status and paths
+        Model Pusher Component: Registers the accepted model as a new immutable version and
+        promotes it to production. Returns ModelPusherArtifact with push status and paths
         """
         try:
             logging.info("Entered the model_pusher method")
-            
+
             # Create model pusher directory in artifacts
             os.makedirs(self.model_pusher_config.model_pusher_dir, exist_ok=True)
             logging.info(f"Created model pusher directory: {self.model_pusher_config.model_pusher_dir}")
-            
+
             is_model_pushed = False
             saved_model_path = None
-            
+            model_version = None
+
             if self.model_evaluation_artifact.is_model_accepted:
                 logging.info(f"Model ACCEPTED - Accuracy: {self.model_evaluation_artifact.accuracy}")
                 logging.info(f"Model accepted. Pushing to production...")
-                
-                # Create saved models directory if it doesn't exist
-                os.makedirs(self.model_pusher_config.saved_model_dir, exist_ok=True)
-                logging.info(f"Created saved models directory: {self.model_pusher_config.saved_model_dir}")
-                
+
                 # Copy model to artifact directory
                 artifact_model_path = os.path.join(self.model_pusher_config.model_pusher_dir, "model.pkl")
                 logging.info(f"Copying model to artifact directory: {artifact_model_path}")
@@ -42,33 +78,46 @@ class ModelPusher:
                     self.model_evaluation_artifact.model_path,
                     artifact_model_path
                 )
-                
-                # Copy model to production directory
-                logging.info(f"Copying model from: {self.model_evaluation_artifact.model_path}")
-                logging.info(f"Pushing model to production: {self.model_pusher_config.saved_model_path}")
-                
-                shutil.copy(
-                    self.model_evaluation_artifact.model_path,
-                    self.model_pusher_config.saved_model_path
-                )
-                
-                saved_model_path = self.model_pusher_config.saved_model_path
+
+                # Register the model as a content-addressed version
+                registry = ModelRegistry(registry_dir=self.model_pusher_config.registry_dir)
+                data_sketch_path = self.data_validation_artifact.data_sketch_file_path \
+                    if self.data_validation_artifact is not None else None
+                model_version = registry.register(self.model_evaluation_artifact.model_path, self.build_model_metadata(),
+                                                  data_sketch_path=data_sketch_path)
+                saved_model_path = registry.model_path(model_version)
+
+                if self.model_pusher_config.auto_promote:
+                    registry.promote(model_version)
+
+                    # Keep saved_models/model.pkl for consumers that do not read the registry;
+                    # it is swapped in whole so a concurrent reader never sees a partial pickle
+                    os.makedirs(self.model_pusher_config.saved_model_dir, exist_ok=True)
+                    tmp_model_path = f"{self.model_pusher_config.saved_model_path}.tmp.{os.getpid()}"
+                    shutil.copyfile(saved_model_path, tmp_model_path)
+                    os.replace(tmp_model_path, self.model_pusher_config.saved_model_path)
+                    logging.info(f"Model version {model_version} successfully pushed to production")
+                else:
+                    logging.info(f"Model version {model_version} registered; promote it to serve it")
                 is_model_pushed = True
-                logging.info(f"Model successfully pushed to production: {saved_model_path}")
             else:
-                logging.warning(f"Model REJECTED - Accuracy: {self.model_evaluation_artifact.accuracy} is below threshold")
+                if self.model_evaluation_artifact.is_within_budget is False:
+                    logging.warning("Model REJECTED - exceeds serving latency/size budgets, see evaluation report")
+                else:
+                    logging.warning(f"Model REJECTED - Accuracy: {self.model_evaluation_artifact.accuracy} is below threshold")
                 logging.info("Model rejected. Not pushing to production.")
-            
+
             # Create and return artifact
             model_pusher_artifact = ModelPusherArtifact(
                 model_pusher_dir=self.model_pusher_config.model_pusher_dir,
                 saved_model_path=saved_model_path if is_model_pushed else "Model not pushed",
-                is_model_pushed=is_model_pushed
+                is_model_pushed=is_model_pushed,
+                model_version=model_version
             )
-            
+
             logging.info("Exited the model_pusher method")
             return model_pusher_artifact
-            
+
         except Exception as e:
             logging.error(f"Error in model pusher: {str(e)}")
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
@@ -1,12 +1,19 @@
 import pandas as pd
+import numpy as np
 import sys
 import os
 import pickle
+import yaml
+from sklearn.base import clone
+from sklearn.metrics import log_loss
 
 from src.exception import MyException
 from src.logger import logging
 from src.entity.artifact_entity import DataTransformationArtifcat, ModelTrainingArtifact
 from src.entity.config_entity import ModelTrainingConfig
+from src.utils.model_search import build_candidates, run_search
+from src.utils.ensemble_utils import truncate_adaboost
+from src.utils import tracing
 
 
 class ModelTraining:
@@ -16,6 +23,99 @@ class ModelTraining:
             self.model_training_config = model_training_config
         except Exception as e:
             raise MyException(e,sys)
+
+    def search_hyperparameters(self, X_train, y_train) -> dict:
+        """
+        Cross-validates the configured search space with time-ordered folds in a process pool,
+        saves the ranked results and returns the best parameters.
+        """
+        try:
+            config = self.model_training_config
+            logging.info(f"Starting {config.search_mode} hyperparameter search")
+            candidates = build_candidates(
+                search_mode=config.search_mode,
+                search_space=config.search_space,
+                n_iter=config.search_n_iter,
+                random_state=config.search_random_state
+            )
+            results = run_search(
+                estimator=config.model,
+                X=X_train.to_numpy(),
+                y=y_train.to_numpy(),
+                candidates=candidates,
+                cv_splits=config.search_cv_splits,
+                scoring=config.search_scoring,
+                n_jobs=config.search_n_jobs
+            )
+
+            os.makedirs(os.path.dirname(config.search_results_file_path), exist_ok=True)
+            with open(config.search_results_file_path, 'w') as f:
+                yaml.dump({
+                    'search_mode': config.search_mode,
+                    'scoring': config.search_scoring,
+                    'cv_splits': config.search_cv_splits,
+                    'n_candidates': len(results),
+                    'best_params': dict(results[0]['params']),
+                    'results': results
+                }, f, sort_keys=False)
+            logging.info(f"Search results saved to: {config.search_results_file_path}")
+
+            logging.info(f"Best parameters: {results[0]['params']}")
+            return results[0]['params']
+        except Exception as e:
+            logging.error(f"Error in hyperparameter search: {str(e)}")
+            raise MyException(e, sys)
+    
+    def fit_with_early_stopping(self, model, X_train, y_train):
+        """
+        Fits once on all but the most recent validation_fraction of the (date-sorted) training rows,
+        scores every boosting round on that slice with staged_predict_proba, truncates the ensemble
+        to the best round and saves the learning curve.
+        Returns the truncated model and the chosen number of rounds.
+        """
+        try:
+            config = self.model_training_config
+            n_validation = int(len(X_train) * config.validation_fraction)
+            if n_validation < 1 or n_validation >= len(X_train):
+                raise ValueError(f"validation_fraction {config.validation_fraction} leaves no validation or training rows")
+
+            X_fit, y_fit = X_train.iloc[:-n_validation], y_train.iloc[:-n_validation]
+            X_val, y_val = X_train.iloc[-n_validation:], y_train.iloc[-n_validation:]
+            logging.info(f"Early stopping: fitting on {len(X_fit)} rows, validating on the latest {len(X_val)} rows")
+
+            model.fit(X_fit, y_fit)
+
+            curve = []
+            for n_rounds, probabilities in enumerate(model.staged_predict_proba(X_val), start=1):
+                curve.append({
+                    'n_estimators': n_rounds,
+                    'val_log_loss': log_loss(y_val, probabilities, labels=model.classes_),
+                    'val_accuracy': float(np.mean(model.classes_[probabilities.argmax(axis=1)] == y_val.to_numpy()))
+                })
+            curve_df = pd.DataFrame(curve)
+
+            if config.early_stopping_metric == 'log_loss':
+                best_index = int(curve_df['val_log_loss'].idxmin())
+            elif config.early_stopping_metric == 'accuracy':
+                best_index = int(curve_df['val_accuracy'].idxmax())
+            else:
+                raise ValueError(f"Unknown early stopping metric: {config.early_stopping_metric}")
+            best_n_estimators = int(curve_df.loc[best_index, 'n_estimators'])
+
+            curve_df['is_best'] = curve_df['n_estimators'] == best_n_estimators
+            os.makedirs(os.path.dirname(config.learning_curve_file_path), exist_ok=True)
+            curve_df.to_csv(config.learning_curve_file_path, index=False)
+            logging.info(f"Learning curve saved to: {config.learning_curve_file_path}")
+
+            logging.info(
+                f"Best round {best_n_estimators}/{len(curve_df)}: "
+                f"val_log_loss={curve_df.loc[best_index, 'val_log_loss']:.4f}, "
+                f"val_accuracy={curve_df.loc[best_index, 'val_accuracy']:.4f}"
+            )
+            return truncate_adaboost(model, best_n_estimators), best_n_estimators
+        except Exception as e:
+            logging.error(f"Error in early stopping: {str(e)}")
+            raise MyException(e, sys)
     
     def initiate_model_training(self) -> ModelTrainingArtifact:
         """
@@ -30,23 +130,7 @@ class ModelTraining:
             train_df = pd.read_csv(self.data_transformation_artifact.transformed_trained_file_path)
             logging.info(f"Training data shape: {train_df.shape}")
 
-            input_features = [
-                    'home_shots_on_target_avg_last5',
-                    'away_shots_on_target_avg_last5',
-                    'home_shots_avg_last5',
-                    'away_shots_avg_last5',
-                    'home_team_goals_conceded_avg_last5',
-                    'away_team_goals_conceded_avg_last5',
-                    'home_goals_avg_last5',
-                    'away_goals_avg_last5',
-                    'home_points_last5_matches',
-                    'away_points_last5_matches',
-                    'points_diff_last5',
-                    'goal_diff_avg5',
-                    'shots_diff_avg5',
-                    'x_defense_diff',
-                    'home_advantage',
-                    'shots_on_target_diff_avg5']
+            input_features = self.model_training_config.input_features
             
             logging.info(f"Selected {len(input_features)} input features")
             X_train = train_df[input_features]
@@ -56,10 +140,24 @@ class ModelTraining:
 
             # Initialize and train the model
             logging.info("Initializing AdaBoost model")
-            model = self.model_training_config.model
+            # The configured model is shared by every run in the process, each run fits its own clone
+            model = clone(self.model_training_config.model)
+            search_results_file_path = None
+            if self.model_training_config.search_mode is not None:
+                with tracing.span("hyperparameter_search", search_mode=self.model_training_config.search_mode):
+                    best_params = self.search_hyperparameters(X_train, y_train)
+                model = clone(model).set_params(**best_params)
+                search_results_file_path = self.model_training_config.search_results_file_path
             
             logging.info("Training model started...")
-            model.fit(X_train, y_train)
+            learning_curve_file_path, best_n_estimators = None, None
+            with tracing.span("fit", rows=len(X_train), early_stopping=self.model_training_config.early_stopping) as fit_span:
+                if self.model_training_config.early_stopping:
+                    model, best_n_estimators = self.fit_with_early_stopping(model, X_train, y_train)
+                    learning_curve_file_path = self.model_training_config.learning_curve_file_path
+                else:
+                    model.fit(X_train, y_train)
+                fit_span.set(n_estimators=len(getattr(model, "estimators_", [])))
             logging.info("Model training completed successfully")
             
             # Create model directory if it doesn't exist
@@ -74,7 +172,10 @@ class ModelTraining:
             
             # Create and return ModelTrainingArtifact
             model_training_artifact = ModelTrainingArtifact(
-                trained_model_path=model_path
+                trained_model_path=model_path,
+                search_results_file_path=search_results_file_path,
+                learning_curve_file_path=learning_curve_file_path,
+                best_n_estimators=best_n_estimators
             )
             
             logging.info("Exited the model_training method")
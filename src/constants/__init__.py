@@ -8,6 +8,28 @@ from sklearn.tree import DecisionTreeClassifier
 MONGODB_URL_KEY = "MONGODB_URL"
 DATABASE_NAME = "Soccer-Data"
 COLLECTION_NAME = "PremierLeague-Matches-Data"
+# A match is identified by its date and teams; the warehouse has a unique index on these fields
+MATCH_KEY_FIELDS: list = ["date", "home_team", "away_team"]
+# Documents per unordered bulk write of the ETL loader
+ETL_LOAD_BATCH_SIZE: int = 1000
+# Change data capture: every match stores a hash of its values, and each load that writes
+# anything records the dates and teams it changed in the changes collection
+ROW_HASH_FIELD: str = "row_hash"
+CHANGES_COLLECTION_NAME: str = "PremierLeague-Matches-Changes"
+# Storage backend of the warehouse, for both the ETL load and training ingestion: "mongodb" (the
+# server at MONGODB_URL) or "sqlite", an embedded file per database under WAREHOUSE_SQLITE_DIR
+# for local runs, benchmarks and CI. Set by the WAREHOUSE_BACKEND environment variable.
+WAREHOUSE_BACKEND_KEY = "WAREHOUSE_BACKEND"
+WAREHOUSE_BACKENDS: tuple = ("mongodb", "sqlite")
+WAREHOUSE_BACKEND: str = os.getenv(WAREHOUSE_BACKEND_KEY, "mongodb")
+WAREHOUSE_SQLITE_DIR: str = "warehouse"
+
+
+# Logging constants
+# Most messages per second, per message template, of loggers on hot paths (per team group,
+# per request); the rest are dropped and counted, see src/logger
+LOG_HOT_PATH_MAX_PER_SECOND: float = 5.0
+LOG_API_MAX_PER_SECOND: float = 50.0
 
 
 PIPELINE_NAME: str = ""
@@ -18,6 +40,8 @@ TRAIN_TRANSFORMED_FILE_NAME: str = "train.csv"
 TEST_TRANSFORMED_FILE_NAME: str = "test.csv"
 SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
 MODEL_NAME = 'model.pkl'
+# Memory-mappable copy of the model used for serving, see src/utils/model_format.py
+COMPILED_MODEL_NAME = 'model.epm'
 
 
 # Data ingestion constants
@@ -25,6 +49,28 @@ DATA_INGESTION_COLLECTION_NAME: str = "PremierLeague-Matches-Data"
 DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
+DATA_INGESTION_SAMPLE_FRACTION: float = 1.0
+DATA_INGESTION_SAMPLE_SEED: int = 42
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = 10_000
+# Optional ISO date bounds of the exported matches, start inclusive and end exclusive
+DATA_INGESTION_START_DATE = None
+DATA_INGESTION_END_DATE = None
+# Incremental ingestion keeps every exported row in a local cache and only queries
+# the warehouse for matches on or after the cached watermark date
+DATA_INGESTION_INCREMENTAL: bool = True
+DATA_INGESTION_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "ingestion_cache")
+# Every warehouse export also refreshes a local lake, one columnar file per league and season
+# (src/data_access/match_lake.py). With source "lake" ingestion reads only the lake partitions
+# of DATA_INGESTION_SEASONS (all when None) and the date bounds, without the warehouse.
+DATA_INGESTION_SOURCES: tuple = ("warehouse", "lake")
+DATA_INGESTION_SOURCE: str = "warehouse"
+DATA_INGESTION_LAKE_DIR: str = os.path.join(ARTIFACT_DIR, "match_lake")
+DATA_INGESTION_LEAGUE: str = "ENG-Premier League"
+DATA_INGESTION_SEASONS = None
+LAKE_MANIFEST_FILE_NAME: str = "manifest.json"
+LAKE_PARTITION_FILE_NAME: str = "part.arr"
+# Month a season starts in; matches before it belong to the season of the previous year
+LAKE_SEASON_START_MONTH: int = 7
 
 # Train Test Split constants
 Train_Test_Split_Date = '2025-12-10'
@@ -33,6 +79,17 @@ Train_Test_Split_Date = '2025-12-10'
 # Data Validation constansts
 DATA_VALIDATION_DIR_NAME = 'data_validation'
 DATA_VALIDATION_REPORT_FILE_NAME: str = "report.yaml"
+DATA_VALIDATION_CHUNK_SIZE: int = 100_000
+DATA_VALIDATION_FAILURE_SAMPLE_SIZE: int = 5
+DATA_VALIDATION_SKETCH_FILE_NAME: str = "data_sketch.json"
+DATA_VALIDATION_SKETCH_EXCLUDE_COLUMNS = ["_id", "date", "time"]
+DATA_VALIDATION_SKETCH_BIN_WIDTH: float = 1.0
+DATA_VALIDATION_SKETCH_MAX_BINS: int = 256
+DATA_VALIDATION_SKETCH_MAX_CATEGORIES: int = 100
+DATA_VALIDATION_PSI_BUCKETS: int = 10
+DATA_VALIDATION_PSI_THRESHOLD: float = 0.25
+DATA_VALIDATION_KS_THRESHOLD: float = 0.1
+DATA_VALIDATION_FAIL_ON_DRIFT: bool = False
 
 # Data Tansformation constants
 DATA_TRANSFORMATION_DIR_NAME = 'data_transformation'
@@ -40,6 +97,24 @@ DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = "transformed"
 
 # Model Training constants
 MODEL_DIR_NAME = 'model_training'
+MODEL_INPUT_FEATURES = [
+    'home_shots_on_target_avg_last5',
+    'away_shots_on_target_avg_last5',
+    'home_shots_avg_last5',
+    'away_shots_avg_last5',
+    'home_team_goals_conceded_avg_last5',
+    'away_team_goals_conceded_avg_last5',
+    'home_goals_avg_last5',
+    'away_goals_avg_last5',
+    'home_points_last5_matches',
+    'away_points_last5_matches',
+    'points_diff_last5',
+    'goal_diff_avg5',
+    'shots_diff_avg5',
+    'x_defense_diff',
+    'home_advantage',
+    'shots_on_target_diff_avg5'
+]
 # Model Parameter
 BASE_ESTIMATOR = DecisionTreeClassifier(
     max_depth=2,
@@ -55,15 +130,120 @@ MODEL = AdaBoostClassifier(
     random_state=42
 )
 
+# Early stopping constants
+# Pick the number of boosting rounds on the most recent slice of the training data
+MODEL_EARLY_STOPPING: bool = True
+MODEL_VALIDATION_FRACTION: float = 0.15
+MODEL_EARLY_STOPPING_METRIC: str = "log_loss"
+MODEL_LEARNING_CURVE_FILE_NAME: str = "learning_curve.csv"
+
+# Model search constants
+# None trains MODEL as configured; 'grid' or 'random' searches MODEL_SEARCH_SPACE first
+MODEL_SEARCH_MODE = None
+MODEL_SEARCH_SPACE = {
+    "n_estimators": [100, 200, 400],
+    "learning_rate": [0.05, 0.1, 0.2],
+    "estimator__max_depth": [1, 2, 3]
+}
+MODEL_SEARCH_N_ITER: int = 10
+MODEL_SEARCH_CV_SPLITS: int = 5
+MODEL_SEARCH_SCORING: str = "log_loss"
+MODEL_SEARCH_N_JOBS: int = -1
+MODEL_SEARCH_RANDOM_STATE: int = 42
+MODEL_SEARCH_RESULTS_FILE_NAME: str = "search_results.yaml"
+
+# Backtesting constants
+BACKTEST_DIR_NAME: str = "backtest"
+BACKTEST_REPORT_FILE_NAME: str = "report.yaml"
+BACKTEST_START_DATE: str = "2024-08-01"
+BACKTEST_END_DATE: str = Train_Test_Split_Date
+# Matchweeks are approximated by calendar weeks: the raw data has no round column
+BACKTEST_STEP_WEEKS: int = 4
+BACKTEST_HORIZON_WEEKS: int = 4
+BACKTEST_MIN_TRAIN_ROWS: int = 200
+BACKTEST_N_JOBS: int = -1
+
+# Model Pruning constants
+MODEL_PRUNING_DIR_NAME = 'model_pruning'
+MODEL_PRUNING_REPORT_FILE_NAME: str = "report.yaml"
+MODEL_PRUNING_ENABLED: bool = True
+# Largest allowed accuracy drop / log loss increase versus the unpruned model, measured on the
+# most recent MODEL_PRUNING_VALIDATION_FRACTION of the training rows (the test split is left to evaluation)
+MODEL_PRUNING_ACCURACY_TOLERANCE: float = 0.005
+MODEL_PRUNING_LOG_LOSS_TOLERANCE: float = 0.005
+MODEL_PRUNING_VALIDATION_FRACTION: float = MODEL_VALIDATION_FRACTION
+MODEL_PRUNING_LATENCY_REPEATS: int = 50
+
 # Model Evaluation constsnts
 MODEL_EVALUATION_DIR = 'model_evaluation'
 MODEL_EVALUATION_DIR_NAME = 'report'
 ACCURACY_THRESHOLD :float = 0.65
+# Serving budgets a candidate must meet to be accepted; None disables a budget
+MODEL_SINGLE_ROW_P99_BUDGET_MS: float = 50.0
+MODEL_BATCH_P99_BUDGET_MS: float = 250.0
+MODEL_LOAD_TIME_BUDGET_MS: float = 500.0
+MODEL_SIZE_BUDGET_BYTES: int = 5 * 1024 * 1024
+MODEL_BENCHMARK_REPEATS: int = 100
+MODEL_BENCHMARK_LOAD_REPEATS: int = 10
 
 # Model Pusher constants
 MODEL_PUSHER_DIR_NAME = 'model_pusher'
 SAVED_MODEL_DIR = 'saved_models'
-
-
-
-
+MODEL_REGISTRY_DIR_NAME: str = "registry"
+MODEL_REGISTRY_DIR: str = os.path.join(SAVED_MODEL_DIR, MODEL_REGISTRY_DIR_NAME)
+MODEL_REGISTRY_VERSIONS_DIR_NAME: str = "versions"
+MODEL_REGISTRY_METADATA_FILE_NAME: str = "metadata.json"
+MODEL_REGISTRY_POINTER_FILE_NAME: str = "production.json"
+MODEL_REGISTRY_AUTO_PROMOTE: bool = True
+
+# Prediction serving constants
+SERVING_DIR: str = os.path.join(ARTIFACT_DIR, "serving")
+PREDICTION_HISTORY_FILE_NAME: str = "match_history.arr"
+PREDICTION_HISTORY_FILE_PATH: str = os.path.join(SERVING_DIR, PREDICTION_HISTORY_FILE_NAME)
+PREDICTION_HISTORY_SEASONS: list = ['2025']
+# A worker reloads and republishes the history once the published file is older than this
+PREDICTION_HISTORY_MAX_AGE_HOURS: float = 12.0
+
+# Stage cache constants
+STAGE_CACHE_DIR_NAME: str = "stage_cache"
+STAGE_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, STAGE_CACHE_DIR_NAME)
+PIPELINE_STATE_FILE_NAME: str = "pipeline_state.json"
+
+# Pipeline report constants
+PIPELINE_REPORT_FILE_NAME: str = "pipeline_report.json"
+
+# Profiling constants
+PROFILE_DIR_NAME: str = "profile"
+PROFILE_TOP_N: int = 25
+PROFILE_SAMPLE_INTERVAL: float = 0.005
+BENCH_REPORT_FILE_NAME: str = "bench_report.json"
+
+# Tracing constants: spans of sampled traces are appended to one JSON-lines file, see src/utils/tracing.py
+TRACE_DIR: str = os.path.join(ARTIFACT_DIR, "traces")
+TRACE_FILE_NAME: str = "spans.jsonl"
+TRACE_FILE_PATH: str = os.path.join(TRACE_DIR, TRACE_FILE_NAME)
+# Fraction of API requests traced, set by the TRACE_SAMPLE_RATE environment variable; training runs are always traced
+TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_PIPELINE_SAMPLE_RATE: float = 1.0
+# Request header carrying the correlation id; a request without one gets a new id
+TRACE_REQUEST_ID_HEADER: str = "X-Request-ID"
+
+# Sweep constants: many training pipeline configurations run side by side in a process pool,
+# each with its own artifact root under SWEEP_DIR/<timestamp>/<experiment>
+SWEEP_DIR: str = os.path.join(ARTIFACT_DIR, "sweeps")
+SWEEP_SUMMARY_FILE_NAME: str = "sweep_summary.yaml"
+SWEEP_MAX_WORKERS: int = -1
+# Per worker caps: MB of address space a worker may add to what it inherits when forked
+# (None for no limit) and BLAS/OpenMP threads
+SWEEP_MAX_MEMORY_MB = 2048
+SWEEP_THREADS_PER_WORKER: int = 1
+SWEEP_RANK_METRIC: str = "accuracy"
+
+# ETL extraction constants: seasons are fetched concurrently and cached per (league, season)
+ETL_LEAGUES: list = ["ENG-Premier League"]
+ETL_EXTRACT_MAX_WORKERS: int = 4
+ETL_EXTRACT_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "etl_cache")
+# A cached season whose last match is older than this is complete and never fetched again
+ETL_SEASON_COMPLETE_AFTER_DAYS: int = 60
+# Chunks buffered between two stages of the streaming ETL; a full buffer blocks the stage before it
+ETL_STREAM_QUEUE_SIZE: int = 1
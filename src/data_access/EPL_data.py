@@ -1,38 +1,184 @@
 import sys
 import pandas as pd
 import numpy as np
-from typing import Optional
-import logging
+from itertools import islice
+from contextlib import contextmanager
+from typing import Optional, Iterator
 
-from src.configuration.mongo_db_connection import MongoDBClient
-from src.constants import DATABASE_NAME
+from bson import ObjectId
+
+from src.data_access.warehouse import get_warehouse
+from src.constants import DATABASE_NAME, CHANGES_COLLECTION_NAME, DATA_INGESTION_EXPORT_BATCH_SIZE
 from src.exception import MyException
+from src.logger import logging
 
 class EplData:
-    def __init__(self)-> None:
+    def __init__(self, backend: Optional[str] = None)-> None:
+        """backend: "mongodb" or "sqlite", WAREHOUSE_BACKEND by default"""
         try:
-            self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
+            self.backend = backend
+            self.warehouse = get_warehouse(backend=backend, database_name=DATABASE_NAME)
         except Exception as e:
             raise MyException(e,sys)
-        
-    def export_collection_as_dataframe(self,collection_name: str, database_name: Optional[str] = None) -> pd.DataFrame:
+
+    def close(self) -> None:
+        """Closes the warehouse connection; use EplData as a context manager where it is created."""
+        self.warehouse.close()
+
+    def __enter__(self) -> "EplData":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @contextmanager
+    def _warehouse(self, database_name: Optional[str] = None):
+        """This object's warehouse, or one opened for another database and closed after use."""
+        if database_name is None:
+            yield self.warehouse
+            return
+        with get_warehouse(backend=self.backend, database_name=database_name) as warehouse:
+            yield warehouse
+
+    @staticmethod
+    def build_query(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                    dates: Optional[list] = None) -> dict:
+        """Date range filter; dates are stored as ISO strings, so string order is date order."""
+        date_range = {}
+        if start_date is not None:
+            date_range["$gte"] = str(start_date)
+        if end_date is not None:
+            date_range["$lt"] = str(end_date)
+        if dates is not None:
+            date_range["$in"] = [str(date) for date in dates]
+        return {"date": date_range} if date_range else {}
+
+    @staticmethod
+    def _typed_column(values: list, dtype: Optional[str]) -> pd.Series:
+        """Builds one column of a batch; the warehouse's "na" strings become NaN on the way."""
+        column = pd.Series(values, dtype=object)
+        if dtype == "int" or dtype == "float":
+            column = pd.to_numeric(column, errors="coerce")
+            if dtype == "int" and not column.isna().any():
+                column = column.astype(np.int64)
+            return column
+        if len(column) and isinstance(column.iloc[0], ObjectId):
+            column = column.map(str)
+        return column.mask(column == "na")
+
+    def iter_collection_batches(self, collection_name: str, database_name: Optional[str] = None,
+                                columns: Optional[dict] = None, start_date: Optional[str] = None,
+                                end_date: Optional[str] = None, dates: Optional[list] = None,
+                                batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        Streams a collection as DataFrames of at most batch_size rows.
+
+        columns maps the fields to fetch to their schema type ("int", "float" or "str") and is
+        sent to the warehouse as the projection; None fetches every field untyped. Only one batch
+        of documents is held as Python dicts at a time, each batch is converted column by column.
+        """
         try:
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
+            with self._warehouse(database_name) as warehouse:
+                documents_iter = warehouse.find(
+                    collection_name, self.build_query(start_date, end_date, dates),
+                    fields=list(columns) if columns is not None else None, batch_size=batch_size
+                )
+                try:
+                    while True:
+                        documents = list(islice(documents_iter, batch_size))
+                        if not documents:
+                            break
+                        names = list(columns) if columns is not None else list(dict.fromkeys(
+                            key for document in documents for key in document))
+                        yield pd.DataFrame({
+                            name: self._typed_column([document.get(name) for document in documents],
+                                                     columns.get(name) if columns is not None else None)
+                            for name in names
+                        })
+                finally:
+                    documents_iter.close()
+        except Exception as e:
+            raise MyException(e,sys)
 
-            df = pd.DataFrame(list(collection.find()))
-            print(f"Data fecthed with len: {len(df)}")
+    def export_collection_as_dataframe(self,collection_name: str, database_name: Optional[str] = None,
+                                       columns: Optional[dict] = None, start_date: Optional[str] = None,
+                                       end_date: Optional[str] = None, dates: Optional[list] = None,
+                                       batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE) -> pd.DataFrame:
+        try:
+            batches = list(self.iter_collection_batches(
+                collection_name, database_name=database_name, columns=columns,
+                start_date=start_date, end_date=end_date, dates=dates, batch_size=batch_size
+            ))
+            df = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame(columns=list(columns or []))
+            logging.info("Data fetched with len: %d", len(df))
 
-            # Log the columns fetched from MongoDB
-            logging.info(f"Fetched columns from MongoDB: {df.columns.to_list()}")
+            # Log the columns fetched from the warehouse
+            logging.info("Fetched columns from the warehouse: %s", df.columns.to_list())
 
             if "id" in df.columns.to_list():
                 df.drop(columns=["id"], axis=1, inplace= True)
-            df.replace({"na":np.nan},inplace=True)
 
             return df
-        
+
+        except Exception as e:
+            raise MyException(e,sys)
+
+
+    def count_documents(self, collection_name: str, database_name: Optional[str] = None,
+                        start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        try:
+            with self._warehouse(database_name) as warehouse:
+                return warehouse.count(collection_name, self.build_query(start_date, end_date))
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def ensure_date_index(self, collection_name: str, database_name: Optional[str] = None) -> None:
+        """Creates the index on date that incremental exports filter on; a no-op when it exists."""
+        try:
+            with self._warehouse(database_name) as warehouse:
+                warehouse.ensure_index(collection_name, ["date"])
+        except Exception as e:
+            # Read-only users cannot create indexes; the export still works, only slower
+            logging.warning("Could not ensure the date index on %s: %s", collection_name, e)
+
+    def changes_since(self, collection_name: str, since=None, database_name: Optional[str] = None):
+        """
+        Dates changed by ETL loads recorded after `since` (a loaded_at time, None for all of them).
+
+        Returns (sorted changed dates, loaded_at of the newest change or `since` when there is none)
+        """
+        try:
+            query = {"collection_name": collection_name}
+            if since is not None:
+                query["loaded_at"] = {"$gt": since}
+            changed_dates, latest = set(), since
+            with self._warehouse(database_name) as warehouse:
+                for change in warehouse.find(CHANGES_COLLECTION_NAME, query, fields=["loaded_at", "changed_dates"]):
+                    changed_dates.update(change["changed_dates"])
+                    latest = change["loaded_at"] if latest is None else max(latest, change["loaded_at"])
+            return sorted(changed_dates), latest
+        except Exception as e:
+            raise MyException(e,sys)
+
+    def collection_fingerprint(self, collection_name: str, database_name: Optional[str] = None) -> dict:
+        """
+        Returns a cheap summary of a collection (document count, newest _id and the newest
+        load recorded in CHANGES_COLLECTION_NAME) used to decide whether a previous ingestion
+        can be reused. Corrected matches are updated in place, which moves neither the count
+        nor the newest _id, but every load that changes a match records a change.
+        """
+        try:
+            with self._warehouse(database_name) as warehouse:
+                loads = [change["loaded_at"] for change in warehouse.find(
+                    CHANGES_COLLECTION_NAME, {"collection_name": collection_name}, fields=["loaded_at"]
+                )]
+                return {
+                    "collection_name": collection_name,
+                    "document_count": warehouse.count(collection_name),
+                    "latest_id": warehouse.latest_id(collection_name),
+                    "change_count": len(loads),
+                    "latest_loaded_at": str(max(loads)) if loads else None
+                }
+
         except Exception as e:
             raise MyException(e,sys)
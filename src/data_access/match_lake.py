@@ -0,0 +1,206 @@
+"""
+Local, columnar store of ingested matches, partitioned by league and season:
+
+    <lake_dir>/<league>/<season>/part.arr     one array file (src/utils/array_file.py) per partition
+    <lake_dir>/manifest.json                  rows, content hash and per-column min/max of every partition
+
+Numeric columns are stored as they are; text columns (dates, teams, ids) are dictionary
+encoded as int32 codes with the distinct values in the partition header, -1 for a missing value.
+Readers filter partitions on the manifest first, so a query for a league, some seasons or a
+date range maps only the partitions that can hold matching rows.
+"""
+import os
+import sys
+import json
+import hashlib
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.constants import (
+    DATA_INGESTION_LAKE_DIR,
+    LAKE_MANIFEST_FILE_NAME,
+    LAKE_PARTITION_FILE_NAME,
+    LAKE_SEASON_START_MONTH
+)
+from src.exception import MyException
+from src.logger import logging
+from src.utils.array_file import write_array_file, read_array_file
+
+
+LAKE_FILE_MAGIC = b"EPLLAK01"
+
+
+def season_of(dates: pd.Series) -> pd.Series:
+    """
+    Season of every match date, named by the year it starts in ("2024" for 2024-25); missing
+    for a missing date. Computed as an integer so a missing date cannot turn the others into "2024.0".
+    """
+    dates = pd.to_datetime(dates)
+    seasons = (dates.dt.year - (dates.dt.month < LAKE_SEASON_START_MONTH)).astype("Int64").astype(str)
+    return seasons.mask(dates.isna())
+
+
+def _min_max(values: np.ndarray):
+    if not len(values):
+        return None
+    return {"min": values.min().item(), "max": values.max().item()}
+
+
+class MatchLake:
+    def __init__(self, lake_dir: str = DATA_INGESTION_LAKE_DIR):
+        self.lake_dir = lake_dir
+        self.manifest_file_path = os.path.join(lake_dir, LAKE_MANIFEST_FILE_NAME)
+
+    def partition_path(self, league: str, season: str) -> str:
+        return os.path.join(self.lake_dir, str(league), str(season), LAKE_PARTITION_FILE_NAME)
+
+    def load_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_file_path):
+            return {"partitions": {}}
+        with open(self.manifest_file_path, "r") as manifest_file:
+            return json.load(manifest_file)
+
+    def _save_manifest(self, manifest: dict) -> None:
+        os.makedirs(self.lake_dir, exist_ok=True)
+        tmp_file_path = f"{self.manifest_file_path}.tmp.{os.getpid()}"
+        with open(tmp_file_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=4, default=str)
+        os.replace(tmp_file_path, self.manifest_file_path)
+
+    @staticmethod
+    def _encode(df: pd.DataFrame):
+        """Column arrays, text dictionaries and min/max statistics of one partition."""
+        arrays, dictionaries, stats = {}, {}, {}
+        for name in df.columns:
+            column = df[name]
+            if pd.api.types.is_numeric_dtype(column):
+                arrays[name] = column.to_numpy()
+                stats[name] = _min_max(column.dropna().to_numpy())
+            else:
+                categorical = pd.Categorical(column.where(column.isna(), column.astype(str)))
+                arrays[name] = categorical.codes.astype(np.int32)
+                dictionaries[name] = categorical.categories.tolist()
+                # Categories are sorted, so the first and last are the text min and max
+                stats[name] = {"min": dictionaries[name][0], "max": dictionaries[name][-1]} if dictionaries[name] else None
+        return arrays, dictionaries, stats
+
+    def write(self, df: pd.DataFrame, league: str) -> dict:
+        """
+        Method Name :   write
+        Description :   Splits the matches of one league by season and rewrites each season's
+                        partition whose content changed; seasons absent from df are left as they are
+
+        Output      :   Returns the written and unchanged partitions and the number of rows dropped for a missing date
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            manifest = self.load_manifest()
+            summary = {"written": [], "unchanged": [], "dropped_rows": 0}
+            seasons = season_of(df["date"])
+            if seasons.isna().any():
+                # A match without a date belongs to no season partition
+                summary["dropped_rows"] = int(seasons.isna().sum())
+                logging.warning(f"Lake {self.lake_dir}: dropped {summary['dropped_rows']} {league} rows without a date")
+                df, seasons = df[seasons.notna()], seasons[seasons.notna()]
+            for season, season_df in df.groupby(seasons, sort=True):
+                season_df = season_df.reset_index(drop=True)
+                key = f"{league}/{season}"
+                content_hash = hashlib.sha256(
+                    pd.util.hash_pandas_object(season_df, index=False).to_numpy().tobytes()
+                    + json.dumps(season_df.columns.tolist()).encode()
+                ).hexdigest()[:16]
+                if manifest["partitions"].get(key, {}).get("content_hash") == content_hash:
+                    summary["unchanged"].append(key)
+                    continue
+
+                arrays, dictionaries, stats = self._encode(season_df)
+                write_array_file(self.partition_path(league, season), LAKE_FILE_MAGIC, {
+                    "league": league,
+                    "season": season,
+                    "columns": season_df.columns.tolist(),
+                    "dictionaries": dictionaries
+                }, arrays)
+                manifest["partitions"][key] = {
+                    "league": league,
+                    "season": season,
+                    "rows": len(season_df),
+                    "content_hash": content_hash,
+                    "stats": stats
+                }
+                summary["written"].append(key)
+
+            if summary["written"]:
+                self._save_manifest(manifest)
+            logging.info(f"Lake {self.lake_dir}: wrote {len(summary['written'])} partitions, "
+                         f"{len(summary['unchanged'])} unchanged")
+            return summary
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def partitions(self, leagues: Optional[list] = None, seasons: Optional[list] = None,
+                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> list:
+        """
+        Manifest entries of the partitions that can hold matches of the given leagues and
+        seasons dated in [start_date, end_date); the others are pruned on their date min/max.
+        """
+        selected = []
+        for entry in self.load_manifest()["partitions"].values():
+            if leagues is not None and entry["league"] not in leagues:
+                continue
+            if seasons is not None and entry["season"] not in [str(season) for season in seasons]:
+                continue
+            date_stats = entry["stats"].get("date")
+            if date_stats is not None:
+                if start_date is not None and date_stats["max"] < str(start_date):
+                    continue
+                if end_date is not None and date_stats["min"] >= str(end_date):
+                    continue
+            selected.append(entry)
+        return sorted(selected, key=lambda entry: (entry["league"], entry["season"]))
+
+    def read_partition(self, entry: dict, columns: Optional[list] = None) -> pd.DataFrame:
+        header, arrays = read_array_file(self.partition_path(entry["league"], entry["season"]), LAKE_FILE_MAGIC)
+        data = {}
+        for name in columns or header["columns"]:
+            if name in header["dictionaries"]:
+                # from_codes turns the -1 codes into missing values
+                data[name] = pd.Categorical.from_codes(arrays[name], header["dictionaries"][name]).astype(object)
+            else:
+                # Copy out of the mapping, the frame must outlive the file being replaced
+                data[name] = np.array(arrays[name])
+        return pd.DataFrame(data)
+
+    def read(self, leagues: Optional[list] = None, seasons: Optional[list] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None,
+             columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Method Name :   read
+        Description :   Reads the matches of the given leagues and seasons dated in [start_date, end_date),
+                        opening only the partitions left after pruning and only the requested columns
+
+        Output      :   Returns the matches, by league and season and in written order within a season
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            entries = self.partitions(leagues, seasons, start_date, end_date)
+            read_columns = columns
+            if columns is not None and (start_date is not None or end_date is not None) and "date" not in columns:
+                read_columns = list(columns) + ["date"]
+
+            frames = []
+            for entry in entries:
+                df = self.read_partition(entry, read_columns)
+                if start_date is not None:
+                    df = df[df["date"] >= str(start_date)]
+                if end_date is not None:
+                    df = df[df["date"] < str(end_date)]
+                frames.append(df[columns] if columns is not None else df)
+
+            logging.info(f"Lake read {len(entries)} partitions: {[entry['league'] + '/' + entry['season'] for entry in entries]}")
+            if not frames:
+                return pd.DataFrame(columns=columns or [])
+            return pd.concat(frames, ignore_index=True)
+        except Exception as e:
+            raise MyException(e, sys) from e
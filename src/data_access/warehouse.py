@@ -0,0 +1,323 @@
+import os
+import sys
+import json
+import math
+import sqlite3
+import datetime
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+
+from bson import ObjectId
+
+from src.constants import DATABASE_NAME, WAREHOUSE_BACKEND, WAREHOUSE_BACKENDS, WAREHOUSE_SQLITE_DIR
+from src.exception import MyException
+from src.logger import logging
+
+# MongoDB error code of a unique index violation
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+
+class Warehouse(ABC):
+    """
+    Storage interface of the match warehouse, used by EplData (training ingestion) and the ETL loader.
+
+    Documents are flat dicts. Queries use the subset of MongoDB filters the pipeline builds:
+    {field: value} or {field: {"$gte" | "$gt" | "$lt" | "$lte" | "$in": value}}, all conditions ANDed.
+    A warehouse holds a connection until close(); use it as a context manager where it is opened.
+    """
+
+    def close(self) -> None:
+        """Releases the connection; the warehouse cannot be used afterwards."""
+
+    def __enter__(self) -> "Warehouse":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @abstractmethod
+    def find(self, collection_name: str, query: Optional[dict] = None, fields: Optional[list] = None,
+             batch_size: int = 1000) -> Iterator[dict]:
+        """Yields the matching documents in load order, only `fields` of them when given (_id only if listed)."""
+
+    @abstractmethod
+    def count(self, collection_name: str, query: Optional[dict] = None) -> int:
+        pass
+
+    @abstractmethod
+    def ensure_index(self, collection_name: str, fields: list, unique: bool = False, name: Optional[str] = None) -> None:
+        pass
+
+    @abstractmethod
+    def upsert(self, collection_name: str, key_fields: list, documents: list) -> dict:
+        """Inserts or updates documents by key; returns the number inserted, updated and unchanged."""
+
+    @abstractmethod
+    def insert(self, collection_name: str, document: dict) -> None:
+        pass
+
+    @abstractmethod
+    def latest_id(self, collection_name: str) -> Optional[str]:
+        """_id of the most recently inserted document, None when the collection is empty."""
+
+
+class MongoWarehouse(Warehouse):
+    """The warehouse on the MongoDB server at MONGODB_URL."""
+
+    def __init__(self, database_name: str = DATABASE_NAME):
+        # Imported here so the sqlite backend runs without a MongoDB URL or TLS setup
+        from src.configuration.mongo_db_connection import MongoDBClient
+        # The MongoClient is shared by the whole process, so close() leaves it open
+        self.mongo_client = MongoDBClient(database_name=database_name)
+        self.database = self.mongo_client.database
+
+    def find(self, collection_name, query=None, fields=None, batch_size=1000):
+        projection = None
+        if fields is not None:
+            projection = {field: 1 for field in fields}
+            if "_id" not in fields:
+                projection["_id"] = 0
+        cursor = self.database[collection_name].find(query or {}, projection, batch_size=batch_size)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+    def count(self, collection_name, query=None):
+        collection = self.database[collection_name]
+        return collection.count_documents(query) if query else collection.estimated_document_count()
+
+    @staticmethod
+    def drop_duplicates(collection, fields: list) -> int:
+        """
+        Deletes all but the first loaded document of every key. Needed once on collections
+        filled by the old insert_many loader, before the unique index can be built.
+        """
+        key = {field: f"${field}" for field in fields}
+        duplicate_ids = []
+        for group in collection.aggregate([
+            {"$sort": {"_id": 1}},
+            {"$group": {"_id": key, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ], allowDiskUse=True):
+            duplicate_ids.extend(group["ids"][1:])
+        if duplicate_ids:
+            collection.delete_many({"_id": {"$in": duplicate_ids}})
+        logging.info(f"Removed {len(duplicate_ids)} duplicate documents from {collection.name}")
+        return len(duplicate_ids)
+
+    def ensure_index(self, collection_name, fields, unique=False, name=None):
+        from pymongo import ASCENDING
+        from pymongo.errors import OperationFailure
+
+        collection = self.database[collection_name]
+        index_keys = [(field, ASCENDING) for field in fields]
+        try:
+            collection.create_index(index_keys, unique=unique, name=name)
+        except OperationFailure as e:
+            if not unique or e.code != DUPLICATE_KEY_ERROR_CODE:
+                raise
+            logging.warning(f"{collection_name} holds duplicate keys, removing them before building the unique index")
+            self.drop_duplicates(collection, fields)
+            collection.create_index(index_keys, unique=unique, name=name)
+
+    def upsert(self, collection_name, key_fields, documents):
+        from pymongo import UpdateOne
+
+        if not documents:
+            return {"inserted": 0, "updated": 0, "unchanged": 0}
+        operations = [
+            UpdateOne({field: document[field] for field in key_fields}, {"$set": document}, upsert=True)
+            for document in documents
+        ]
+        # Unordered: the server applies the batch in parallel and keeps going past a failed document
+        result = self.database[collection_name].bulk_write(operations, ordered=False)
+        return {
+            "inserted": result.upserted_count,
+            "updated": result.modified_count,
+            "unchanged": result.matched_count - result.modified_count
+        }
+
+    def insert(self, collection_name, document):
+        # insert_one adds the _id to the dict it is given
+        self.database[collection_name].insert_one(dict(document))
+
+    def latest_id(self, collection_name):
+        latest = self.database[collection_name].find_one(sort=[("_id", -1)], projection={"_id": 1})
+        return str(latest["_id"]) if latest else None
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _sql_value(value):
+    """A query value as it compares against the stored JSON (dates and times as ISO strings)."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time, ObjectId)):
+        return _json_default(value)
+    return value
+
+
+class SQLiteWarehouse(Warehouse):
+    """
+    Embedded warehouse in one SQLite file per database, for runs without a MongoDB server.
+
+    Each collection is a table of (_id, document) where the document is stored as JSON;
+    indexes are built on json_extract() of the indexed fields and queries use the same
+    expressions, so key lookups and date ranges are index searches, not table scans.
+    _id is an ObjectId string, so _id order is insertion order as in MongoDB.
+    """
+
+    _OPERATORS = {"$gte": ">=", "$gt": ">", "$lt": "<", "$lte": "<="}
+
+    def __init__(self, database_path: str):
+        os.makedirs(os.path.dirname(database_path) or ".", exist_ok=True)
+        self.database_path = database_path
+        self.connection = sqlite3.connect(database_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._tables = set()
+
+    @staticmethod
+    def _table(collection_name: str) -> str:
+        return '"{}"'.format(collection_name.replace('"', '""'))
+
+    @staticmethod
+    def _field(field: str) -> str:
+        if field == "_id":
+            return "_id"
+        return "json_extract(document, '$.\"{}\"')".format(field.replace("'", "''").replace('"', '\\"'))
+
+    def _ensure_table(self, collection_name: str) -> str:
+        table = self._table(collection_name)
+        if collection_name not in self._tables:
+            with self.connection:
+                self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (_id TEXT PRIMARY KEY, document TEXT NOT NULL)")
+            self._tables.add(collection_name)
+        return table
+
+    def _where(self, query: Optional[dict]):
+        clauses, params = [], []
+        for field, condition in (query or {}).items():
+            column = self._field(field)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for operator, value in condition.items():
+                if operator == "$in":
+                    values = [_sql_value(item) for item in value]
+                    clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else "0")
+                    params.extend(values)
+                elif operator == "$eq":
+                    clauses.append(f"{column} = ?")
+                    params.append(_sql_value(value))
+                elif operator in self._OPERATORS:
+                    clauses.append(f"{column} {self._OPERATORS[operator]} ?")
+                    params.append(_sql_value(value))
+                else:
+                    raise ValueError(f"Query operator {operator} is not supported by the sqlite warehouse")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    @staticmethod
+    def _dumps(document: dict) -> str:
+        # NaN is not valid JSON for SQLite's json functions, store it as null
+        return json.dumps(
+            {key: None if isinstance(value, float) and math.isnan(value) else value
+             for key, value in document.items() if key != "_id"},
+            default=_json_default
+        )
+
+    def find(self, collection_name, query=None, fields=None, batch_size=1000):
+        table = self._ensure_table(collection_name)
+        where, params = self._where(query)
+        cursor = self.connection.execute(f"SELECT _id, document FROM {table}{where} ORDER BY rowid", params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for _id, document in rows:
+                    document = json.loads(document)
+                    document["_id"] = _id
+                    if fields is not None:
+                        document = {field: document[field] for field in fields if field in document}
+                    yield document
+        finally:
+            cursor.close()
+
+    def count(self, collection_name, query=None):
+        table = self._ensure_table(collection_name)
+        where, params = self._where(query)
+        return self.connection.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+
+    def ensure_index(self, collection_name, fields, unique=False, name=None):
+        table = self._ensure_table(collection_name)
+        index_name = self._table(f"{collection_name}__{name or '_'.join(fields)}")
+        columns = ", ".join(self._field(field) for field in fields)
+        with self.connection:
+            self.connection.execute(
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} ON {table} ({columns})"
+            )
+
+    def upsert(self, collection_name, key_fields, documents):
+        table = self._ensure_table(collection_name)
+        key_sql = " AND ".join(f"{self._field(field)} = ?" for field in key_fields)
+        summary = {"inserted": 0, "updated": 0, "unchanged": 0}
+        # One transaction per call: the batch is written together or not at all
+        with self.connection:
+            for document in documents:
+                encoded = self._dumps(document)
+                stored = self.connection.execute(
+                    f"SELECT _id, document FROM {table} WHERE {key_sql}",
+                    [_sql_value(document[field]) for field in key_fields]
+                ).fetchone()
+                if stored is None:
+                    self.connection.execute(f"INSERT INTO {table} (_id, document) VALUES (?, ?)",
+                                            (str(ObjectId()), encoded))
+                    summary["inserted"] += 1
+                    continue
+                stored_document = json.loads(stored[1])
+                merged = {**stored_document, **json.loads(encoded)}
+                if merged == stored_document:
+                    summary["unchanged"] += 1
+                else:
+                    self.connection.execute(f"UPDATE {table} SET document = ? WHERE _id = ?",
+                                            (json.dumps(merged), stored[0]))
+                    summary["updated"] += 1
+        return summary
+
+    def insert(self, collection_name, document):
+        table = self._ensure_table(collection_name)
+        with self.connection:
+            self.connection.execute(f"INSERT INTO {table} (_id, document) VALUES (?, ?)",
+                                    (str(document.get("_id", ObjectId())), self._dumps(document)))
+
+    def close(self):
+        self.connection.close()
+
+    def latest_id(self, collection_name):
+        table = self._ensure_table(collection_name)
+        latest = self.connection.execute(f"SELECT _id FROM {table} ORDER BY _id DESC LIMIT 1").fetchone()
+        return latest[0] if latest else None
+
+
+def get_warehouse(backend: Optional[str] = None, database_name: str = DATABASE_NAME) -> Warehouse:
+    """
+    Method Name :   get_warehouse
+    Description :   Opens the warehouse of the given backend, WAREHOUSE_BACKEND by default
+
+    Output      :   Returns a Warehouse
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        backend = backend or WAREHOUSE_BACKEND
+        if backend == "mongodb":
+            return MongoWarehouse(database_name=database_name)
+        if backend == "sqlite":
+            return SQLiteWarehouse(os.path.join(WAREHOUSE_SQLITE_DIR, f"{database_name}.sqlite"))
+        raise ValueError(f"Unknown warehouse backend {backend!r}, expected one of {WAREHOUSE_BACKENDS}")
+    except Exception as e:
+        raise MyException(e, sys) from e
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class DataIngestionArtifact:
@@ -10,6 +11,8 @@ class DataValidationArtifact:
     validation_status:bool
     message: str
     validation_report_file_path: str
+    data_sketch_file_path: Optional[str] = None
+    drift_detected: Optional[bool] = None
 
 @dataclass
 class DataTransformationArtifcat:
@@ -19,6 +22,30 @@ class DataTransformationArtifcat:
 @dataclass
 class ModelTrainingArtifact:
     trained_model_path : str
+    search_results_file_path : Optional[str] = None
+    learning_curve_file_path : Optional[str] = None
+    best_n_estimators : Optional[int] = None
+
+@dataclass
+class ModelPruningArtifact:
+    pruned_model_path : str
+    pruning_report_file_path : str
+    n_estimators_before : int
+    n_estimators_after : int
+
+@dataclass
+class BacktestArtifact:
+    backtest_report_file_path : str
+    n_folds : int
+    mean_accuracy : float
+    mean_log_loss : float
+
+@dataclass
+class SweepArtifact:
+    sweep_summary_file_path : str
+    n_experiments : int
+    n_failed : int
+    best_experiment : Optional[str] = None
 
 @dataclass
 class ModelEvaluationArtifact:
@@ -26,9 +53,11 @@ class ModelEvaluationArtifact:
     model_test_report_file_path : str
     is_model_accepted: bool
     model_path: str
+    is_within_budget: Optional[bool] = None
 
 @dataclass
 class ModelPusherArtifact:
     model_pusher_dir: str
     saved_model_path: str
-    is_model_pushed: bool
\ No newline at end of file
+    is_model_pushed: bool
+    model_version: Optional[str] = None
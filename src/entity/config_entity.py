@@ -1,60 +1,232 @@
 
 import os
 from src.constants import *
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Optional
 
 
-TIMESTAMP: str = datetime.now().strftime("%m_%d_%Y_%H_%M_%S")
+def _timestamp() -> str:
+    return datetime.now().strftime("%m_%d_%Y_%H_%M_%S")
 
 
+TIMESTAMP: str = _timestamp()
+
+
+# Every stage config takes its paths from the artifact_dir it is built with, the one of the
+# module-level training_pipeline_config (this process's run) by default. A pipeline built with
+# its own TrainingPipelineConfig writes nothing outside its artifact root, except the shared
+# stage and ingestion caches and, from the pusher, the model registry.
 @dataclass
 class TrainingPipelineConfig:
     pipeline_name: str = PIPELINE_NAME
-    artifact_dir: str = os.path.join(ARTIFACT_DIR, TIMESTAMP)
-    timestamp: str = TIMESTAMP
+    artifact_dir: Optional[str] = None
+    timestamp: str = field(default_factory=_timestamp)
+    stage_cache_dir: str = STAGE_CACHE_DIR
+    pipeline_state_file_path: Optional[str] = None
+    pipeline_report_file_path: Optional[str] = None
+    profile_dir: Optional[str] = None
 
+    def __post_init__(self):
+        self.artifact_dir = self.artifact_dir or os.path.join(ARTIFACT_DIR, self.timestamp)
+        self.pipeline_state_file_path = self.pipeline_state_file_path or os.path.join(self.artifact_dir, PIPELINE_STATE_FILE_NAME)
+        self.pipeline_report_file_path = self.pipeline_report_file_path or os.path.join(self.artifact_dir, PIPELINE_REPORT_FILE_NAME)
+        self.profile_dir = self.profile_dir or os.path.join(self.artifact_dir, PROFILE_DIR_NAME)
 
-training_pipeline_config: TrainingPipelineConfig = TrainingPipelineConfig()
+
+training_pipeline_config: TrainingPipelineConfig = TrainingPipelineConfig(timestamp=TIMESTAMP)
 
 class DataIngestionConfig:
-    data_ingestion_dir : str = os.path.join(training_pipeline_config.artifact_dir, DATA_INGESTION_DIR_NAME)
-    ##artifact/<timestamp>/data_ingestion/ingested/raw.csv
-    
-    raw_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, RAW_FILE_NAME)
+    def __init__(self, artifact_dir: Optional[str] = None):
+        self.data_ingestion_dir = os.path.join(artifact_dir or training_pipeline_config.artifact_dir, DATA_INGESTION_DIR_NAME)
+        ##artifact/<timestamp>/data_ingestion/ingested/raw.csv
+        self.raw_file_path = os.path.join(self.data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, RAW_FILE_NAME)
+
     collection_name : str = COLLECTION_NAME
+    # Fraction of rows kept after export, for quick runs on subsampled data
+    sample_fraction : float = DATA_INGESTION_SAMPLE_FRACTION
+    sample_seed : int = DATA_INGESTION_SAMPLE_SEED
+    export_batch_size : int = DATA_INGESTION_EXPORT_BATCH_SIZE
+    start_date = DATA_INGESTION_START_DATE
+    end_date = DATA_INGESTION_END_DATE
+    incremental : bool = DATA_INGESTION_INCREMENTAL
+    cache_dir : str = DATA_INGESTION_CACHE_DIR
+    warehouse_backend : str = WAREHOUSE_BACKEND
+    source : str = DATA_INGESTION_SOURCE
+    lake_dir : str = DATA_INGESTION_LAKE_DIR
+    league : str = DATA_INGESTION_LEAGUE
+    seasons = DATA_INGESTION_SEASONS
 
 
 @dataclass
 class DataValidationConfig:
-    data_validation_dir : str = os.path.join(training_pipeline_config.artifact_dir, DATA_VALIDATION_DIR_NAME)
-    validation_report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_REPORT_FILE_NAME)
+    artifact_dir : Optional[str] = None
+    data_validation_dir : Optional[str] = None
+    validation_report_file_path: Optional[str] = None
+    chunk_size: int = DATA_VALIDATION_CHUNK_SIZE
+    failure_sample_size: int = DATA_VALIDATION_FAILURE_SAMPLE_SIZE
+    sketch_file_path: Optional[str] = None
+    sketch_exclude_columns = DATA_VALIDATION_SKETCH_EXCLUDE_COLUMNS
+    sketch_bin_width: float = DATA_VALIDATION_SKETCH_BIN_WIDTH
+    sketch_max_bins: int = DATA_VALIDATION_SKETCH_MAX_BINS
+    sketch_max_categories: int = DATA_VALIDATION_SKETCH_MAX_CATEGORIES
+    # Drift is measured against the data sketch of the production model in the registry
+    baseline_registry_dir: str = MODEL_REGISTRY_DIR
+    psi_buckets: int = DATA_VALIDATION_PSI_BUCKETS
+    psi_threshold: float = DATA_VALIDATION_PSI_THRESHOLD
+    ks_threshold: float = DATA_VALIDATION_KS_THRESHOLD
+    fail_on_drift: bool = DATA_VALIDATION_FAIL_ON_DRIFT
+
+    def __post_init__(self):
+        self.artifact_dir = self.artifact_dir or training_pipeline_config.artifact_dir
+        self.data_validation_dir = self.data_validation_dir or os.path.join(self.artifact_dir, DATA_VALIDATION_DIR_NAME)
+        self.validation_report_file_path = self.validation_report_file_path or os.path.join(self.data_validation_dir, DATA_VALIDATION_REPORT_FILE_NAME)
+        self.sketch_file_path = self.sketch_file_path or os.path.join(self.data_validation_dir, DATA_VALIDATION_SKETCH_FILE_NAME)
 
 
 @dataclass
 class DataTransformationConfig:
-    data_transformation_dir : str = os.path.join(training_pipeline_config.artifact_dir, DATA_TRANSFORMATION_DIR_NAME)
+    artifact_dir : Optional[str] = None
+    data_transformation_dir : Optional[str] = None
 
-    transformed_training_file_path : str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TRAIN_TRANSFORMED_FILE_NAME)
-    transformed_test_file_path : str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TEST_TRANSFORMED_FILE_NAME)
+    transformed_training_file_path : Optional[str] = None
+    transformed_test_file_path : Optional[str] = None
     
     split_date : str = Train_Test_Split_Date
 
+    def __post_init__(self):
+        self.artifact_dir = self.artifact_dir or training_pipeline_config.artifact_dir
+        self.data_transformation_dir = self.data_transformation_dir or os.path.join(self.artifact_dir, DATA_TRANSFORMATION_DIR_NAME)
+        transformed_data_dir = os.path.join(self.data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR)
+        self.transformed_training_file_path = self.transformed_training_file_path or os.path.join(transformed_data_dir, TRAIN_TRANSFORMED_FILE_NAME)
+        self.transformed_test_file_path = self.transformed_test_file_path or os.path.join(transformed_data_dir, TEST_TRANSFORMED_FILE_NAME)
+
 @dataclass
 class ModelTrainingConfig:
-    model_training_dir : str = os.path.join(training_pipeline_config.artifact_dir,MODEL_DIR_NAME)
-    model_training_dir_name : str = os.path.join(model_training_dir,MODEL_NAME)
+    artifact_dir : Optional[str] = None
+    model_training_dir : Optional[str] = None
+    model_training_dir_name : Optional[str] = None
 
     model  = MODEL
 
+    early_stopping : bool = MODEL_EARLY_STOPPING
+    validation_fraction : float = MODEL_VALIDATION_FRACTION
+    early_stopping_metric : str = MODEL_EARLY_STOPPING_METRIC
+    learning_curve_file_path : Optional[str] = None
+
+    search_mode = MODEL_SEARCH_MODE
+    search_space = MODEL_SEARCH_SPACE
+    search_n_iter : int = MODEL_SEARCH_N_ITER
+    search_cv_splits : int = MODEL_SEARCH_CV_SPLITS
+    search_scoring : str = MODEL_SEARCH_SCORING
+    search_n_jobs : int = MODEL_SEARCH_N_JOBS
+    search_random_state : int = MODEL_SEARCH_RANDOM_STATE
+    search_results_file_path : Optional[str] = None
+    input_features = MODEL_INPUT_FEATURES
+
+    def __post_init__(self):
+        self.artifact_dir = self.artifact_dir or training_pipeline_config.artifact_dir
+        self.model_training_dir = self.model_training_dir or os.path.join(self.artifact_dir, MODEL_DIR_NAME)
+        self.model_training_dir_name = self.model_training_dir_name or os.path.join(self.model_training_dir, MODEL_NAME)
+        self.learning_curve_file_path = self.learning_curve_file_path or os.path.join(self.model_training_dir, MODEL_LEARNING_CURVE_FILE_NAME)
+        self.search_results_file_path = self.search_results_file_path or os.path.join(self.model_training_dir, MODEL_SEARCH_RESULTS_FILE_NAME)
+
+@dataclass
+class ModelPruningConfig:
+    artifact_dir : Optional[str] = None
+    model_pruning_dir : Optional[str] = None
+    pruned_model_path : Optional[str] = None
+    pruning_report_file_path : Optional[str] = None
+    enabled : bool = MODEL_PRUNING_ENABLED
+    accuracy_tolerance : float = MODEL_PRUNING_ACCURACY_TOLERANCE
+    log_loss_tolerance : float = MODEL_PRUNING_LOG_LOSS_TOLERANCE
+    validation_fraction : float = MODEL_PRUNING_VALIDATION_FRACTION
+    latency_repeats : int = MODEL_PRUNING_LATENCY_REPEATS
+    input_features = MODEL_INPUT_FEATURES
+
+    def __post_init__(self):
+        self.artifact_dir = self.artifact_dir or training_pipeline_config.artifact_dir
+        self.model_pruning_dir = self.model_pruning_dir or os.path.join(self.artifact_dir, MODEL_PRUNING_DIR_NAME)
+        self.pruned_model_path = self.pruned_model_path or os.path.join(self.model_pruning_dir, MODEL_NAME)
+        self.pruning_report_file_path = self.pruning_report_file_path or os.path.join(self.model_pruning_dir, MODEL_PRUNING_REPORT_FILE_NAME)
+
+@dataclass
+class BacktestConfig:
+    artifact_dir : Optional[str] = None
+    backtest_dir : Optional[str] = None
+    backtest_report_file_path : Optional[str] = None
+    start_date : str = BACKTEST_START_DATE
+    end_date : str = BACKTEST_END_DATE
+    step_weeks : int = BACKTEST_STEP_WEEKS
+    horizon_weeks : int = BACKTEST_HORIZON_WEEKS
+    min_train_rows : int = BACKTEST_MIN_TRAIN_ROWS
+    n_jobs : int = BACKTEST_N_JOBS
+    input_features = MODEL_INPUT_FEATURES
+
+    model = MODEL
+
+    def __post_init__(self):
+        self.artifact_dir = self.artifact_dir or training_pipeline_config.artifact_dir
+        self.backtest_dir = self.backtest_dir or os.path.join(self.artifact_dir, BACKTEST_DIR_NAME)
+        self.backtest_report_file_path = self.backtest_report_file_path or os.path.join(self.backtest_dir, BACKTEST_REPORT_FILE_NAME)
+
 @dataclass
 class ModelEvaluationConfig:
-    model_evaluation_dir : str = os.path.join(training_pipeline_config.artifact_dir, MODEL_EVALUATION_DIR)
-    model_evaluation_dir_name : str = os.path.join(model_evaluation_dir,MODEL_EVALUATION_DIR_NAME)
+    artifact_dir : Optional[str] = None
+    model_evaluation_dir : Optional[str] = None
+    model_evaluation_dir_name : Optional[str] = None
+    compiled_model_path : Optional[str] = None
     expected_accuracy : float = ACCURACY_THRESHOLD
+    single_row_p99_budget_ms: float = MODEL_SINGLE_ROW_P99_BUDGET_MS
+    batch_p99_budget_ms: float = MODEL_BATCH_P99_BUDGET_MS
+    load_time_budget_ms: float = MODEL_LOAD_TIME_BUDGET_MS
+    size_budget_bytes: int = MODEL_SIZE_BUDGET_BYTES
+    benchmark_repeats: int = MODEL_BENCHMARK_REPEATS
+    benchmark_load_repeats: int = MODEL_BENCHMARK_LOAD_REPEATS
+    input_features = MODEL_INPUT_FEATURES
+
+    def __post_init__(self):
+        self.artifact_dir = self.artifact_dir or training_pipeline_config.artifact_dir
+        self.model_evaluation_dir = self.model_evaluation_dir or os.path.join(self.artifact_dir, MODEL_EVALUATION_DIR)
+        self.model_evaluation_dir_name = self.model_evaluation_dir_name or os.path.join(self.model_evaluation_dir, MODEL_EVALUATION_DIR_NAME)
+        self.compiled_model_path = self.compiled_model_path or os.path.join(self.model_evaluation_dir, COMPILED_MODEL_NAME)
 
 @dataclass
 class ModelPusherConfig:
-    model_pusher_dir: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_PUSHER_DIR_NAME)
+    artifact_dir: Optional[str] = None
+    model_pusher_dir: Optional[str] = None
     saved_model_dir: str = SAVED_MODEL_DIR
-    saved_model_path: str = os.path.join(SAVED_MODEL_DIR, MODEL_NAME)
\ No newline at end of file
+    saved_model_path: str = os.path.join(SAVED_MODEL_DIR, MODEL_NAME)
+    registry_dir: str = MODEL_REGISTRY_DIR
+    auto_promote: bool = MODEL_REGISTRY_AUTO_PROMOTE
+    input_features = MODEL_INPUT_FEATURES
+
+    def __post_init__(self):
+        self.artifact_dir = self.artifact_dir or training_pipeline_config.artifact_dir
+        self.model_pusher_dir = self.model_pusher_dir or os.path.join(self.artifact_dir, MODEL_PUSHER_DIR_NAME)
+
+@dataclass
+class ExperimentConfig:
+    """One training pipeline configuration of a sweep; None keeps the pipeline's default."""
+    name: str
+    split_date: Optional[str] = None
+    model_params: Optional[dict] = None
+    league: Optional[str] = None
+    seasons: Optional[list] = None
+    source: Optional[str] = None
+    sample_fraction: Optional[float] = None
+    warehouse_backend: Optional[str] = None
+
+@dataclass
+class SweepConfig:
+    sweep_dir: Optional[str] = None
+    sweep_summary_file_path: Optional[str] = None
+    max_workers: int = SWEEP_MAX_WORKERS
+    max_memory_mb: Optional[int] = SWEEP_MAX_MEMORY_MB
+    threads_per_worker: int = SWEEP_THREADS_PER_WORKER
+    rank_metric: str = SWEEP_RANK_METRIC
+    use_cache: bool = True
+
+    def __post_init__(self):
+        self.sweep_dir = self.sweep_dir or os.path.join(SWEEP_DIR, _timestamp())
+        self.sweep_summary_file_path = self.sweep_summary_file_path or os.path.join(self.sweep_dir, SWEEP_SUMMARY_FILE_NAME)
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import pickle
+import shutil
+import threading
+from datetime import datetime
+from typing import Optional
+
+from src.exception import MyException
+from src.logger import logging
+from src.constants import (
+    MODEL_NAME,
+    COMPILED_MODEL_NAME,
+    DATA_VALIDATION_SKETCH_FILE_NAME,
+    MODEL_REGISTRY_DIR,
+    MODEL_REGISTRY_VERSIONS_DIR_NAME,
+    MODEL_REGISTRY_METADATA_FILE_NAME,
+    MODEL_REGISTRY_POINTER_FILE_NAME
+)
+from src.utils.main_utils import compute_file_hash
+from src.utils.model_format import save_compiled_model, load_compiled_model
+
+
+def _write_json_atomic(file_path: str, content: dict) -> None:
+    """Writes next to the target and swaps it in, so readers see the old or the new file, never a partial one."""
+    tmp_file_path = f"{file_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_file_path, "w") as tmp_file:
+        json.dump(content, tmp_file, indent=4, default=str)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_file_path, file_path)
+
+
+class ModelRegistry:
+    """
+    Local registry of immutable, content-addressed model versions.
+
+    Layout under registry_dir:
+        versions/<version>/model.pkl          model file, never rewritten once registered
+        versions/<version>/model.epm          memory-mappable copy served by the API, when the model supports it
+        versions/<version>/metadata.json      features, classes, metrics, training data hash
+        versions/<version>/data_sketch.json   distribution sketch of the training data, the drift baseline
+        production.json                       pointer to the serving version and the versions it replaced
+
+    A version id is the sha256 prefix of the model file, so registering the same model twice is a no-op.
+    Promotion and rollback only rewrite production.json, through a temp file and os.replace.
+    """
+
+    def __init__(self, registry_dir: str = MODEL_REGISTRY_DIR):
+        self.registry_dir = registry_dir
+        self.versions_dir = os.path.join(registry_dir, MODEL_REGISTRY_VERSIONS_DIR_NAME)
+        self.pointer_file_path = os.path.join(registry_dir, MODEL_REGISTRY_POINTER_FILE_NAME)
+        self._lock = threading.Lock()
+        self._pointer_stat = None
+        self._pointer = None
+        self._loaded_models = {}
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def model_path(self, version: str) -> str:
+        return os.path.join(self.version_dir(version), MODEL_NAME)
+
+    def compiled_model_path(self, version: str) -> str:
+        return os.path.join(self.version_dir(version), COMPILED_MODEL_NAME)
+
+    def data_sketch_path(self, version: str) -> str:
+        return os.path.join(self.version_dir(version), DATA_VALIDATION_SKETCH_FILE_NAME)
+
+    def current_data_sketch_path(self) -> Optional[str]:
+        """Data sketch of the production version, or None when there is none to compare against."""
+        version = self.current_version()
+        if version is None or not os.path.exists(self.data_sketch_path(version)):
+            return None
+        return self.data_sketch_path(version)
+
+    def register(self, model_path: str, metadata: dict, data_sketch_path: Optional[str] = None) -> str:
+        """
+        Method Name :   register
+        Description :   Copies a model into the registry under its content hash together with its metadata
+                        and, when given, the distribution sketch of the data it was trained on
+
+        Output      :   Returns the version id
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            version = compute_file_hash(model_path)[:16]
+            version_dir = self.version_dir(version)
+            if os.path.exists(os.path.join(version_dir, MODEL_REGISTRY_METADATA_FILE_NAME)):
+                logging.info(f"Model version {version} is already registered")
+                return version
+
+            # The version dir appears in one rename, complete with its model and metadata
+            os.makedirs(self.versions_dir, exist_ok=True)
+            tmp_dir = f"{version_dir}.tmp.{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            shutil.copyfile(model_path, os.path.join(tmp_dir, MODEL_NAME))
+            os.chmod(os.path.join(tmp_dir, MODEL_NAME), 0o444)
+
+            if data_sketch_path is not None and os.path.exists(data_sketch_path):
+                shutil.copyfile(data_sketch_path, os.path.join(tmp_dir, DATA_VALIDATION_SKETCH_FILE_NAME))
+                os.chmod(os.path.join(tmp_dir, DATA_VALIDATION_SKETCH_FILE_NAME), 0o444)
+
+            with open(model_path, "rb") as model_file:
+                model = pickle.load(model_file)
+            try:
+                save_compiled_model(model, os.path.join(tmp_dir, COMPILED_MODEL_NAME), metadata={"version": version})
+                os.chmod(os.path.join(tmp_dir, COMPILED_MODEL_NAME), 0o444)
+            except Exception as e:
+                logging.warning(f"Model version {version} is served from pickle, it cannot be compiled: {e}")
+            with open(os.path.join(tmp_dir, MODEL_REGISTRY_METADATA_FILE_NAME), "w") as metadata_file:
+                json.dump({
+                    "version": version,
+                    "registered_at": datetime.now().isoformat(),
+                    "source_model_path": model_path,
+                    **metadata
+                }, metadata_file, indent=4, default=str)
+
+            try:
+                os.replace(tmp_dir, version_dir)
+            except OSError:
+                # Registered concurrently by another process
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+            logging.info(f"Registered model version {version} at {version_dir}")
+            return version
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def metadata(self, version: str) -> dict:
+        try:
+            with open(os.path.join(self.version_dir(version), MODEL_REGISTRY_METADATA_FILE_NAME), "r") as metadata_file:
+                return json.load(metadata_file)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def list_versions(self) -> list:
+        """Metadata of every registered version, oldest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        versions = [
+            self.metadata(version) for version in os.listdir(self.versions_dir)
+            if os.path.exists(os.path.join(self.version_dir(version), MODEL_REGISTRY_METADATA_FILE_NAME))
+        ]
+        return sorted(versions, key=lambda metadata: metadata["registered_at"])
+
+    def _read_pointer(self) -> Optional[dict]:
+        """Reads production.json, re-parsing it only when the file was swapped since the last read."""
+        try:
+            stat = os.stat(self.pointer_file_path)
+        except FileNotFoundError:
+            self._pointer_stat, self._pointer = None, None
+            return None
+
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stat_key != self._pointer_stat:
+            with open(self.pointer_file_path, "r") as pointer_file:
+                self._pointer = json.load(pointer_file)
+            self._pointer_stat = stat_key
+        return self._pointer
+
+    def current_version(self) -> Optional[str]:
+        pointer = self._read_pointer()
+        return pointer["version"] if pointer is not None else None
+
+    def promote(self, version: str) -> None:
+        """
+        Method Name :   promote
+        Description :   Atomically points production at a registered version
+
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            if not os.path.exists(os.path.join(self.version_dir(version), MODEL_REGISTRY_METADATA_FILE_NAME)):
+                raise ValueError(f"Model version {version} is not registered in {self.registry_dir}")
+
+            pointer = self._read_pointer()
+            history = []
+            if pointer is not None:
+                if pointer["version"] == version:
+                    logging.info(f"Model version {version} is already in production")
+                    return
+                history = pointer["history"] + [pointer["version"]]
+
+            _write_json_atomic(self.pointer_file_path, {
+                "version": version,
+                "promoted_at": datetime.now().isoformat(),
+                "history": history
+            })
+            logging.info(f"Promoted model version {version} to production")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def rollback(self) -> str:
+        """
+        Method Name :   rollback
+        Description :   Atomically points production back at the version it replaced
+
+        Output      :   Returns the version now in production
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            pointer = self._read_pointer()
+            if pointer is None or not pointer["history"]:
+                raise ValueError("No previous production version to roll back to")
+
+            version = pointer["history"][-1]
+            _write_json_atomic(self.pointer_file_path, {
+                "version": version,
+                "promoted_at": datetime.now().isoformat(),
+                "history": pointer["history"][:-1],
+                "rolled_back_from": pointer["version"]
+            })
+            logging.info(f"Rolled back production from {pointer['version']} to {version}")
+            return version
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_model(self, version: Optional[str] = None):
+        """
+        Method Name :   load_model
+        Description :   Loads a registered version, the production one by default. The compiled
+                        copy is memory-mapped when present, otherwise the pickle is loaded.
+                        Versions are immutable, so each one is loaded once and cached by its id.
+
+        Output      :   Returns (version, model)
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            with self._lock:
+                version = version or self.current_version()
+                if version is None:
+                    raise FileNotFoundError(f"No production model version in {self.registry_dir}")
+
+                if version not in self._loaded_models:
+                    logging.info(f"Loading model version {version}")
+                    if os.path.exists(self.compiled_model_path(version)):
+                        self._loaded_models[version] = load_compiled_model(self.compiled_model_path(version))
+                    else:
+                        with open(self.model_path(version), "rb") as model_file:
+                            self._loaded_models[version] = pickle.load(model_file)
+                    # Keep the new version and the one it replaced, so a rollback is served from memory
+                    while len(self._loaded_models) > 2:
+                        self._loaded_models.pop(next(iter(self._loaded_models)))
+                return version, self._loaded_models[version]
+        except Exception as e:
+            raise MyException(e, sys) from e
@@ -10,7 +10,7 @@ def error_message_detail(error: Exception, error_detail: sys) -> str:
     :return: A formatted error message string.
     """
     # Extract traceback details (exception information)
-    _, _, exc_tb = error_detail.exc_info()
+    _, exc_value, exc_tb = error_detail.exc_info()
 
     # Get the file name where the exception occurred
     file_name = exc_tb.tb_frame.f_code.co_filename
@@ -19,8 +19,10 @@ def error_message_detail(error: Exception, error_detail: sys) -> str:
     line_number = exc_tb.tb_lineno
     error_message = f"Error occurred in python script: [{file_name}] at line number [{line_number}]: {str(error)}"
     
-    # Log the error for better tracking
-    logging.error(error_message)
+    # Log the error for better tracking, once: re-raising a MyException up the call
+    # stack wraps it again, but it was already logged where it was first raised
+    if not isinstance(exc_value, MyException):
+        logging.error("%s", error_message)
     
     return error_message
 
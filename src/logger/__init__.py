@@ -1,46 +1,177 @@
-import logging
 import os
+import time
+import queue
+import atexit
+import threading
 from from_root import from_root
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging import DEBUG, INFO, Filter, Formatter, Logger, StreamHandler, getLogger
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 # Constatnts for log configuration
 LOG_DIR = 'logs'
 LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 MAX_LOG_SIZE = 5*1024*1024 #5 MB
 BACKUP_CUNT = 3
+# Records are handed to a background thread that formats and writes them, so logging
+# never waits on disk or console I/O; set LOG_ASYNC=0 to write from the calling thread
+ASYNC_LOGGING = os.getenv("LOG_ASYNC", "1") != "0"
 
 # Construct log folder and file path
 log_dir_path = os.path.join(from_root(), LOG_DIR)
 os.makedirs(log_dir_path, exist_ok=True)
 log_file_path = os.path.join(log_dir_path, LOG_FILE)
 
-def configure_loger(MAX_LOG_SIZE = MAX_LOG_SIZE, BACKUP_COUNT = BACKUP_CUNT):
-    logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-    
+# Argument types that cannot change between the call and the write, so formatting them can wait
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None), bytes)
+
+# `logging` is rebound to the root logger at the bottom of this module, so the code
+# below uses the names imported from the logging package
+log_listener = None
+_log_handlers = []
+
+
+class DeferredFormatQueueHandler(QueueHandler):
+    """
+    Queues records without formatting them; the listener thread does the `msg % args`
+    formatting. Tracebacks, and args that could be mutated before the write (DataFrames,
+    lists, ...), are still rendered in the calling thread.
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if record.args and not all(isinstance(arg, _IMMUTABLE_ARG_TYPES) for arg in
+                                   (record.args.values() if isinstance(record.args, dict) else record.args)):
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+
+class HotPathFilter(Filter):
+    """
+    Thins out messages logged in loops: of the records sharing a message template
+    (the unformatted msg, which is why hot paths log with %-style args), only every
+    sample_every-th one is kept, and at most max_per_second of them pass per second.
+    Each record that passes carries the number dropped before it as `suppressed`, and
+    ends with "(+N suppressed)" when N > 0.
+    """
+
+    def __init__(self, sample_every: int = 1, max_per_second: float = None):
+        super().__init__()
+        self.sample_every = max(1, int(sample_every))
+        self.max_per_second = max_per_second
+        self._lock = threading.Lock()
+        self._seen = {}
+        self._windows = {}
+        self._suppressed = {}
+
+    def filter(self, record) -> bool:
+        key = (record.name, record.msg)
+        with self._lock:
+            seen = self._seen.get(key, 0)
+            self._seen[key] = seen + 1
+            keep = seen % self.sample_every == 0
+
+            if keep and self.max_per_second is not None:
+                now = time.monotonic()
+                window_start, count = self._windows.get(key, (now, 0))
+                if now - window_start >= 1.0:
+                    window_start, count = now, 0
+                keep = count < self.max_per_second
+                self._windows[key] = (window_start, count + 1 if keep else count)
+
+            if not keep:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            record.suppressed = self._suppressed.pop(key, 0)
+            if record.suppressed:
+                # Appended to the template, so the args of a deferred record still line up
+                record.msg = f"{record.msg} (+{record.suppressed} suppressed)"
+            return True
+
+
+def get_logger(name: str, sample_every: int = 1, max_per_second: float = None) -> Logger:
+    """
+    Named logger writing through the root handlers; sample_every / max_per_second
+    install a HotPathFilter for messages logged once per row, group or request.
+    """
+    logger = getLogger(name)
+    for existing_filter in [f for f in logger.filters if isinstance(f, HotPathFilter)]:
+        logger.removeFilter(existing_filter)
+    if sample_every > 1 or max_per_second is not None:
+        logger.addFilter(HotPathFilter(sample_every=sample_every, max_per_second=max_per_second))
+    return logger
+
+
+def _start_listener() -> QueueHandler:
+    global log_listener
+    log_queue = queue.SimpleQueue()
+    log_listener = QueueListener(log_queue, *_log_handlers, respect_handler_level=True)
+    log_listener.start()
+    return DeferredFormatQueueHandler(log_queue)
+
+
+def _restart_listener_in_child() -> None:
+    # The writer thread does not survive a fork; a forked worker gets its own queue and thread
+    if log_listener is None:
+        return
+    logger = getLogger()
+    logger.handlers = [handler for handler in logger.handlers if not isinstance(handler, DeferredFormatQueueHandler)]
+    logger.addHandler(_start_listener())
+
+
+def configure_loger(MAX_LOG_SIZE = MAX_LOG_SIZE, BACKUP_COUNT = BACKUP_CUNT, async_mode = ASYNC_LOGGING):
+    global log_listener, _log_handlers
+    logger = getLogger()
+    logger.setLevel(DEBUG)
+
     # Clear existing handlers to avoid duplicates
     logger.handlers.clear()
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
 
     # Define formatter
-    formatter = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
+    formatter = Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
 
     # file handler with rotation
     file_handler = RotatingFileHandler(log_file_path, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
     file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging.DEBUG)
+    file_handler.setLevel(DEBUG)
 
     # Console handler
-    console_handler = logging.StreamHandler()
+    console_handler = StreamHandler()
     console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.INFO)
+    console_handler.setLevel(INFO)
+
+    if not async_mode:
+        # Add handler to the logger
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
+        return logger
 
-    # Add handler to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+    # Only the queue handler runs in the calling thread; the listener thread writes to both handlers
+    _log_handlers = [file_handler, console_handler]
+    logger.addHandler(_start_listener())
     return logger
 
+
+def flush_logs() -> None:
+    """Blocks until every queued record is written (the listener is restarted afterwards)."""
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener.start()
+
+
+@atexit.register
+def _stop_listener() -> None:
+    if log_listener is not None:
+        log_listener.stop()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
 # configure the logger
 logging = configure_loger()
-
@@ -0,0 +1,261 @@
+"""
+Runs many training pipeline configurations (split dates, model parameters, leagues, ...)
+side by side in a process pool and compares their results.
+
+Every experiment gets its own TrainingPipelineConfig, so its artifacts land in
+<sweep_dir>/<experiment name>, and its own model registry there: a sweep never replaces
+the production model. Experiments that share their data settings reuse each other's
+ingestion, validation and transformation outputs through the stage cache.
+"""
+import os
+import sys
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from typing import Optional
+
+import yaml
+
+from src.entity.config_entity import ExperimentConfig, SweepConfig, TrainingPipelineConfig
+from src.entity.artifact_entity import ModelEvaluationArtifact, ModelPruningArtifact, SweepArtifact
+from src.exception import MyException
+from src.logger import logging, flush_logs
+
+try:
+    import resource
+except ImportError:  # resource is POSIX only
+    resource = None
+
+# Keeps the thread pool limits of a worker in force for its whole life
+_worker_thread_limits = None
+
+
+def load_experiments(file_path: str) -> list:
+    """
+    Method Name :   load_experiments
+    Description :   Reads a sweep file: an `experiments` list of ExperimentConfig fields and/or a
+                    `grid` of lists (model_params holding a list per parameter), every combination
+                    of which becomes an experiment
+
+    Output      :   Returns the ExperimentConfigs, named after their settings when unnamed
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        with open(file_path, "r") as sweep_file:
+            content = yaml.safe_load(sweep_file) or {}
+
+        experiments = [ExperimentConfig(**{"name": f"experiment_{index}", **experiment})
+                       for index, experiment in enumerate(content.get("experiments") or [])]
+        experiments.extend(grid_experiments(content.get("grid") or {}))
+
+        names = [experiment.name for experiment in experiments]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Experiment names must be unique, repeated: {duplicates}")
+        return experiments
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def grid_experiments(grid: dict) -> list:
+    """Every combination of the grid's values, e.g. {"split_date": [...], "model_params": {"n_estimators": [...]}}."""
+    model_grid = grid.get("model_params") or {}
+    keys = [key for key in grid if key != "model_params"]
+    axes = [[(key, value) for value in grid[key]] for key in keys]
+    axes += [[("model_params." + param, value) for value in values] for param, values in model_grid.items()]
+    if not axes:
+        return []
+
+    experiments = []
+    for combination in itertools.product(*axes):
+        fields, model_params = {}, {}
+        for key, value in combination:
+            if key.startswith("model_params."):
+                model_params[key[len("model_params."):]] = value
+            else:
+                fields[key] = value
+        name = "_".join(f"{key.split('.')[-1]}={value}" for key, value in combination)
+        experiments.append(ExperimentConfig(name=name.replace(os.sep, "-").replace(" ", "-"),
+                                            model_params=model_params or None, **fields))
+    return experiments
+
+
+def _address_space_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status", "r") as status_file:
+            for line in status_file:
+                if line.startswith("VmSize:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _init_worker(max_memory_mb: Optional[int], threads_per_worker: int) -> None:
+    """
+    Process pool initializer: caps the worker's BLAS/OpenMP threads and its address space to
+    max_memory_mb on top of what the worker inherits from the forking process (the imported
+    libraries alone take a few hundred MB of it). An allocation past the cap raises MemoryError.
+    """
+    global _worker_thread_limits
+    if max_memory_mb is not None and resource is not None:
+        limit = int(max_memory_mb) * 1024 * 1024 + (_address_space_bytes() or 0)
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+    from threadpoolctl import threadpool_limits
+    _worker_thread_limits = threadpool_limits(limits=threads_per_worker)
+
+
+def _run_experiment(task) -> dict:
+    """Worker task: runs one experiment's pipeline and returns its metrics; failures are reported, not raised."""
+    from src.pipline.training_pipeline import Training_Piepline
+
+    experiment, sweep_dir, use_cache = task
+    artifact_dir = os.path.join(sweep_dir, experiment.name)
+    result = {
+        "name": experiment.name,
+        "status": "failed",
+        "artifact_dir": artifact_dir,
+        "settings": {key: value for key, value in asdict(experiment).items() if key != "name" and value is not None}
+    }
+    start = time.perf_counter()
+    try:
+        pipeline = Training_Piepline(
+            pipeline_config=TrainingPipelineConfig(artifact_dir=artifact_dir),
+            use_cache=use_cache,
+            trace_memory=False,
+            sample_fraction=experiment.sample_fraction,
+            warehouse_backend=experiment.warehouse_backend,
+            source=experiment.source,
+            seasons=experiment.seasons,
+            split_date=experiment.split_date,
+            model_params=experiment.model_params,
+            league=experiment.league
+        )
+        # Sweep runs register their models next to their artifacts, never in the production registry
+        pusher_config = pipeline.model_pusher_config
+        pusher_config.saved_model_dir = os.path.join(artifact_dir, "saved_models")
+        pusher_config.saved_model_path = os.path.join(pusher_config.saved_model_dir, "model.pkl")
+        pusher_config.registry_dir = os.path.join(pusher_config.saved_model_dir, "registry")
+        # Workers are already the unit of parallelism, a search must not start a pool per worker
+        pipeline.model_training_config.search_n_jobs = 1
+
+        try:
+            pipeline.run_pipeline()
+        finally:
+            stages = pipeline.pipeline_report.stages
+            result["trace_id"] = pipeline.pipeline_report.run_info.get("trace_id")
+            result["peak_rss_bytes"] = max((stage["peak_rss_bytes"] or 0 for stage in stages), default=None)
+            result["stage_wall_time_s"] = {stage["stage"]: stage["wall_time_s"] for stage in stages}
+
+        evaluation = pipeline.pipeline_state.completed_artifact("model_evaluation", ModelEvaluationArtifact)
+        pruning = pipeline.pipeline_state.completed_artifact("model_pruning", ModelPruningArtifact)
+        with open(evaluation.model_test_report_file_path, "r") as report_file:
+            report = yaml.safe_load(report_file)
+        result.update({
+            "status": "completed",
+            "accuracy": report.get("accuracy"),
+            "f1_score": report.get("f1_score"),
+            "precision": report.get("precision"),
+            "recall": report.get("recall"),
+            "is_model_accepted": evaluation.is_model_accepted,
+            "is_within_budget": evaluation.is_within_budget,
+            "n_estimators": pruning.n_estimators_after if pruning is not None else None
+        })
+    except BaseException as e:
+        # MemoryError from the address space cap lands here too
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["wall_time_s"] = round(time.perf_counter() - start, 3)
+    # Pool workers exit without running atexit handlers, queued records would be lost
+    flush_logs()
+    return result
+
+
+class ExperimentRunner:
+    def __init__(self, experiments: list, sweep_config: SweepConfig):
+        self.experiments = experiments
+        self.sweep_config = sweep_config
+
+    def summarize(self, results: list) -> dict:
+        """Ranks the completed experiments on rank_metric and compares each one to the first experiment listed."""
+        metric = self.sweep_config.rank_metric
+        completed = [result for result in results if result["status"] == "completed" and result.get(metric) is not None]
+        completed_names = {result["name"] for result in completed}
+        ranked = sorted(completed, key=lambda result: result[metric], reverse=True)
+        baseline = results[0] if results and results[0]["name"] in completed_names else None
+        for rank, result in enumerate(ranked, start=1):
+            result["rank"] = rank
+            if baseline is not None:
+                result[f"{metric}_vs_baseline"] = round(result[metric] - baseline[metric], 6)
+
+        failed = [result for result in results if result["name"] not in completed_names]
+        return {
+            "sweep_dir": self.sweep_config.sweep_dir,
+            "rank_metric": metric,
+            "baseline": baseline["name"] if baseline is not None else None,
+            "best": ranked[0]["name"] if ranked else None,
+            "n_experiments": len(results),
+            "n_failed": len(failed),
+            "limits": {
+                "max_workers": self.sweep_config.max_workers,
+                "max_memory_mb": self.sweep_config.max_memory_mb,
+                "threads_per_worker": self.sweep_config.threads_per_worker
+            },
+            "experiments": ranked + failed
+        }
+
+    def initiate_sweep(self) -> SweepArtifact:
+        """
+        Method Name :   initiate_sweep
+        Description :   Runs every experiment's training pipeline in a process pool of at most
+                        max_workers processes, each capped to max_memory_mb and threads_per_worker,
+                        and writes the ranked comparison to the sweep summary
+
+        Output      :   Returns a SweepArtifact
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.sweep_config
+            if not self.experiments:
+                raise ValueError("The sweep has no experiments")
+            n_workers = os.cpu_count() if config.max_workers is None or config.max_workers < 1 else config.max_workers
+            n_workers = min(n_workers, len(self.experiments))
+            os.makedirs(config.sweep_dir, exist_ok=True)
+            logging.info(f"Running {len(self.experiments)} experiments on {n_workers} processes into {config.sweep_dir}")
+
+            results = [None] * len(self.experiments)
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(config.max_memory_mb, config.threads_per_worker)) as executor:
+                futures = {
+                    executor.submit(_run_experiment, (experiment, config.sweep_dir, config.use_cache)): index
+                    for index, experiment in enumerate(self.experiments)
+                }
+                for future in as_completed(futures):
+                    experiment = self.experiments[futures[future]]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # A worker killed outside Python (e.g. by the OOM killer) breaks the pool for the rest
+                        result = {"name": experiment.name, "status": "failed", "wall_time_s": None,
+                                  "artifact_dir": os.path.join(config.sweep_dir, experiment.name),
+                                  "error": f"{type(e).__name__}: {e}"}
+                    results[futures[future]] = result
+                    logging.info(
+                        f"Experiment {result['name']} {result['status']} in {result['wall_time_s']}s: "
+                        f"{config.rank_metric}={result.get(config.rank_metric)} {result.get('error', '')}"
+                    )
+
+            summary = self.summarize(results)
+            with open(config.sweep_summary_file_path, "w") as summary_file:
+                yaml.safe_dump(summary, summary_file, sort_keys=False)
+            logging.info(f"Sweep summary saved to: {config.sweep_summary_file_path}")
+
+            return SweepArtifact(
+                sweep_summary_file_path=config.sweep_summary_file_path,
+                n_experiments=summary["n_experiments"],
+                n_failed=summary["n_failed"],
+                best_experiment=summary["best"]
+            )
+        except Exception as e:
+            raise MyException(e, sys) from e
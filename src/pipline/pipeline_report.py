@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+from typing import Optional, Iterable
+
+from src.exception import MyException
+from src.logger import logging
+
+try:
+    import resource
+except ImportError:  # resource is POSIX only
+    resource = None
+
+
+def _read_peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes (VmHWM on Linux, ru_maxrss elsewhere)."""
+    try:
+        with open("/proc/self/status", "r") as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux/BSD
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Resets the kernel's peak RSS counter so the next reading is local to a stage. Linux only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _count_csv_rows(file_path: str) -> int:
+    rows = 0
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(1024 * 1024), b""):
+            rows += chunk.count(b"\n")
+    return max(rows - 1, 0)
+
+
+def describe_files(file_paths: Iterable[str]) -> dict:
+    """Returns total rows (CSV files only) and bytes for a set of artifact files, each file counted once."""
+    rows, size = 0, 0
+    for file_path in dict.fromkeys(file_paths):
+        if not file_path or not os.path.isfile(file_path):
+            continue
+        size += os.path.getsize(file_path)
+        if file_path.endswith(".csv"):
+            rows += _count_csv_rows(file_path)
+    return {"rows": rows, "bytes": size}
+
+
+def artifact_files(artifact: object) -> list:
+    """Returns the existing file paths referenced by an artifact dataclass."""
+    if artifact is None or not is_dataclass(artifact):
+        return []
+    return [value for value in asdict(artifact).values() if isinstance(value, str) and os.path.isfile(value)]
+
+
+class StageMetrics:
+    def __init__(self, stage_name: str, input_files: Iterable[str] = ()):
+        self.stage_name = stage_name
+        self.input_files = list(input_files)
+        self.output_files = []
+        self.source = "run"
+        self.status = "running"
+        self.metrics = {}
+
+    def set_outputs(self, artifact: object, source: str = "run") -> None:
+        self.output_files = artifact_files(artifact)
+        self.source = source
+
+    def to_dict(self) -> dict:
+        inputs = describe_files(self.input_files)
+        outputs = describe_files(self.output_files)
+        return {
+            "stage": self.stage_name,
+            "status": self.status,
+            "source": self.source,
+            **self.metrics,
+            "rows_in": inputs["rows"],
+            "bytes_in": inputs["bytes"],
+            "rows_out": outputs["rows"],
+            "bytes_out": outputs["bytes"]
+        }
+
+
+class PipelineReport:
+    """
+    Collects wall time, CPU time, memory peaks and input/output sizes for every
+    stage of a training pipeline run and writes them as a JSON artifact.
+
+    Reports share the same layout across runs so they can be compared with
+    compare_pipeline_reports.
+    """
+
+    def __init__(self, report_file_path: str, run_info: Optional[dict] = None, trace_memory: bool = True):
+        self.report_file_path = report_file_path
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.run_info = {
+            "started_at": datetime.now().isoformat(),
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "hostname": socket.gethostname(),
+            "cpu_count": os.cpu_count(),
+            "trace_memory": trace_memory,
+            **(run_info or {})
+        }
+        self._run_started = time.perf_counter()
+
+    @contextmanager
+    def measure_stage(self, stage_name: str, input_files: Iterable[str] = ()):
+        """
+        Context manager measuring one stage. The yielded StageMetrics receives the
+        stage artifact through set_outputs so output sizes can be reported.
+        """
+        stage_metrics = StageMetrics(stage_name=stage_name, input_files=input_files)
+
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+        rss_before = _read_peak_rss()
+        rss_is_stage_local = _reset_peak_rss()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stage_metrics
+            stage_metrics.status = "completed"
+        except BaseException:
+            stage_metrics.status = "failed"
+            raise
+        finally:
+            stage_metrics.metrics = {
+                "wall_time_s": round(time.perf_counter() - wall_start, 6),
+                "cpu_time_s": round(time.process_time() - cpu_start, 6),
+                "peak_rss_bytes": _read_peak_rss(),
+                "peak_rss_is_stage_local": rss_is_stage_local,
+                "rss_at_start_bytes": rss_before,
+                "tracemalloc_peak_bytes": tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            }
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append(stage_metrics.to_dict())
+            logging.info(
+                f"Stage {stage_name} {stage_metrics.status} ({stage_metrics.source}) in "
+                f"{stage_metrics.metrics['wall_time_s']:.3f}s wall / {stage_metrics.metrics['cpu_time_s']:.3f}s cpu"
+            )
+
+    def write(self, status: str) -> str:
+        """
+        Method Name :   write
+        Description :   Writes the report of the run to report_file_path as JSON
+
+        Output      :   Returns the report file path
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            report = {
+                "run": {
+                    **self.run_info,
+                    "status": status,
+                    "finished_at": datetime.now().isoformat(),
+                    "total_wall_time_s": round(time.perf_counter() - self._run_started, 6)
+                },
+                "stages": self.stages
+            }
+            os.makedirs(os.path.dirname(self.report_file_path), exist_ok=True)
+            with open(self.report_file_path, "w") as report_file:
+                json.dump(report, report_file, indent=4, default=str)
+            logging.info(f"Pipeline report saved to: {self.report_file_path}")
+            return self.report_file_path
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+
+COMPARED_STAGE_METRICS = ["wall_time_s", "cpu_time_s", "peak_rss_bytes", "tracemalloc_peak_bytes", "rows_in", "rows_out"]
+
+
+def compare_pipeline_reports(baseline_report_path: str, candidate_report_path: str) -> dict:
+    """
+    Compares two pipeline reports stage by stage.
+    Returns, for every stage present in both runs, the baseline and candidate value of each metric
+    with the ratio candidate / baseline.
+    """
+    try:
+        with open(baseline_report_path, "r") as report_file:
+            baseline = json.load(report_file)
+        with open(candidate_report_path, "r") as report_file:
+            candidate = json.load(report_file)
+
+        baseline_stages = {stage["stage"]: stage for stage in baseline["stages"]}
+        comparison = {}
+        for stage in candidate["stages"]:
+            baseline_stage = baseline_stages.get(stage["stage"])
+            if baseline_stage is None:
+                continue
+            comparison[stage["stage"]] = {}
+            for metric in COMPARED_STAGE_METRICS:
+                before, after = baseline_stage.get(metric), stage.get(metric)
+                ratio = round(after / before, 4) if before and after is not None else None
+                comparison[stage["stage"]][metric] = {"baseline": before, "candidate": after, "ratio": ratio}
+
+        return {
+            "baseline": baseline_report_path,
+            "candidate": candidate_report_path,
+            "total_wall_time_s": {
+                "baseline": baseline["run"]["total_wall_time_s"],
+                "candidate": candidate["run"]["total_wall_time_s"]
+            },
+            "stages": comparison
+        }
+    except Exception as e:
+        raise MyException(e, sys) from e
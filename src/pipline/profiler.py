@@ -0,0 +1,139 @@
+import io
+import os
+import sys
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from src.exception import MyException
+from src.logger import logging
+from src.constants import PROFILE_TOP_N, PROFILE_SAMPLE_INTERVAL
+
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+class _StackSampler:
+    """
+    Minimal wall-clock sampling profiler: a daemon thread records the stack of the
+    profiled thread every `interval` seconds. Overhead is independent of how many
+    Python calls the profiled code makes, unlike cProfile.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class StageProfiler:
+    """
+    Profiles pipeline stages one at a time and writes the results to profile_dir:
+
+    - cprofile: <stage>.prof (loadable with pstats/snakeviz) and <stage>_top.txt
+    - sample:   <stage>.collapsed (flamegraph.pl / speedscope input) and <stage>_top.txt
+    """
+
+    def __init__(self, profile_dir: str, mode: str = "cprofile", top_n: int = PROFILE_TOP_N,
+                 sample_interval: float = PROFILE_SAMPLE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+        self.profile_dir = profile_dir
+        self.mode = mode
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+
+    @contextmanager
+    def profile_stage(self, stage_name: str):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                self._write_cprofile(stage_name, profile)
+        else:
+            sampler = _StackSampler(thread_id=threading.get_ident(), interval=self.sample_interval)
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                self._write_samples(stage_name, sampler.stacks)
+
+    def _write_cprofile(self, stage_name: str, profile: cProfile.Profile) -> None:
+        try:
+            prof_file_path = os.path.join(self.profile_dir, f"{stage_name}.prof")
+            profile.dump_stats(prof_file_path)
+
+            summary = io.StringIO()
+            stats = pstats.Stats(profile, stream=summary)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+            with open(os.path.join(self.profile_dir, f"{stage_name}_top.txt"), "w") as top_file:
+                top_file.write(summary.getvalue())
+
+            logging.info(f"cProfile output for {stage_name} saved to: {prof_file_path}")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _write_samples(self, stage_name: str, stacks: Counter) -> None:
+        try:
+            collapsed_file_path = os.path.join(self.profile_dir, f"{stage_name}.collapsed")
+            with open(collapsed_file_path, "w") as collapsed_file:
+                for stack, count in stacks.most_common():
+                    collapsed_file.write(f"{stack} {count}\n")
+
+            total = sum(stacks.values())
+            self_samples, total_samples = Counter(), Counter()
+            for stack, count in stacks.items():
+                frames = stack.split(";")
+                self_samples[frames[-1]] += count
+                for frame in set(frames):
+                    total_samples[frame] += count
+
+            with open(os.path.join(self.profile_dir, f"{stage_name}_top.txt"), "w") as top_file:
+                top_file.write(f"{total} samples every {self.sample_interval * 1000:.1f} ms\n\n")
+                for title, counter in (("Self", self_samples), ("Total", total_samples)):
+                    top_file.write(f"{title} samples\n")
+                    for frame, count in counter.most_common(self.top_n):
+                        top_file.write(f"{count:8d} {100 * count / max(total, 1):6.2f}%  {frame}\n")
+                    top_file.write("\n")
+
+            logging.info(f"Sampling profile for {stage_name} saved to: {collapsed_file_path}")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+
+@contextmanager
+def maybe_profile(profiler, stage_name: str):
+    """Profiles the block with profiler when one is configured, otherwise runs it untouched."""
+    if profiler is None:
+        yield
+    else:
+        with profiler.profile_stage(stage_name):
+            yield
@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import inspect
+from dataclasses import asdict
+from typing import Optional, Iterable
+
+from src.exception import MyException
+from src.logger import logging
+from src.constants import STAGE_CACHE_DIR
+from src.utils.main_utils import compute_file_hash
+
+
+STAGE_CACHE_META_FILE_NAME = "meta.json"
+STAGE_CACHE_OUTPUT_DIR_NAME = "output"
+
+
+class StageCache:
+    """
+    Content-addressed cache for the outputs of the training pipeline stages.
+
+    Each stage is identified by a fingerprint built from the content of its input
+    artifacts, the config values it depends on and the source code of the modules
+    that implement it. The stage directory and its artifact are stored under
+    <cache_dir>/<stage_name>/<fingerprint>/ and copied back into the current run
+    whenever the same fingerprint is seen again.
+    """
+
+    def __init__(self, cache_dir: str = STAGE_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def fingerprint(stage_name: str, input_files: Iterable[str] = (), params: Optional[dict] = None,
+                    code_objects: Iterable[object] = ()) -> str:
+        """
+        Method Name :   fingerprint
+        Description :   Builds the sha256 fingerprint of a stage from its inputs, params and code
+
+        Output      :   Returns the hex digest identifying the stage run
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            digest = hashlib.sha256()
+            digest.update(stage_name.encode())
+
+            for file_path in input_files:
+                digest.update(compute_file_hash(file_path).encode())
+
+            # repr keeps estimators and nested dicts stable without requiring them to be JSON serializable
+            digest.update(repr(sorted((params or {}).items())).encode())
+
+            # Classes or modules whose source file versions the stage: the component and every helper
+            # module it calls, the constants it reads reach the fingerprint through params
+            for code_object in code_objects:
+                digest.update(compute_file_hash(inspect.getsourcefile(code_object)).encode())
+
+            return digest.hexdigest()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _entry_dir(self, stage_name: str, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, stage_name, fingerprint)
+
+    def lookup(self, stage_name: str, fingerprint: str, artifact_cls: type, stage_dir: str,
+               artifact_dir: str) -> Optional[object]:
+        """
+        Method Name :   lookup
+        Description :   Restores a cached stage output into stage_dir of the current run
+
+        Output      :   Returns the artifact pointing at the current run, or None on a cache miss
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            entry_dir = self._entry_dir(stage_name, fingerprint)
+            meta_file_path = os.path.join(entry_dir, STAGE_CACHE_META_FILE_NAME)
+            if not os.path.exists(meta_file_path):
+                logging.info(f"Stage cache miss for {stage_name} [{fingerprint[:12]}]")
+                return None
+
+            with open(meta_file_path, "r") as meta_file:
+                meta = json.load(meta_file)
+
+            shutil.copytree(os.path.join(entry_dir, STAGE_CACHE_OUTPUT_DIR_NAME), stage_dir, dirs_exist_ok=True)
+
+            # Paths recorded under the original run's artifact dir are re-rooted to the current run
+            cached_artifact_dir = meta["artifact_dir"]
+            fields = {}
+            for key, value in meta["artifact"].items():
+                if isinstance(value, str) and value.startswith(cached_artifact_dir):
+                    value = artifact_dir + value[len(cached_artifact_dir):]
+                fields[key] = value
+
+            logging.info(f"Stage cache hit for {stage_name} [{fingerprint[:12]}], restored into {stage_dir}")
+            return artifact_cls(**fields)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def store(self, stage_name: str, fingerprint: str, artifact: object, stage_dir: str, artifact_dir: str) -> None:
+        """
+        Method Name :   store
+        Description :   Saves the stage directory and artifact of a completed stage under its fingerprint
+
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            entry_dir = self._entry_dir(stage_name, fingerprint)
+            if os.path.exists(os.path.join(entry_dir, STAGE_CACHE_META_FILE_NAME)):
+                return
+
+            # Build the entry next to its final location so a crash never leaves a half-written entry behind
+            tmp_dir = f"{entry_dir}.tmp.{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.copytree(stage_dir, os.path.join(tmp_dir, STAGE_CACHE_OUTPUT_DIR_NAME))
+            with open(os.path.join(tmp_dir, STAGE_CACHE_META_FILE_NAME), "w") as meta_file:
+                json.dump({
+                    "stage_name": stage_name,
+                    "fingerprint": fingerprint,
+                    "artifact_dir": artifact_dir,
+                    "artifact": asdict(artifact)
+                }, meta_file, indent=4)
+
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # Another run stored the same fingerprint first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+            logging.info(f"Stored {stage_name} output in stage cache [{fingerprint[:12]}]")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+
+class PipelineState:
+    """
+    Records which stages of a run completed, with their fingerprints and artifacts,
+    so a failed run can be resumed from its last completed stage.
+    """
+
+    def __init__(self, state_file_path: str, artifact_dir: str):
+        self.state_file_path = state_file_path
+        self.state = {"artifact_dir": artifact_dir, "stages": {}}
+
+    @classmethod
+    def load(cls, artifact_dir: str, state_file_name: str) -> "PipelineState":
+        try:
+            state_file_path = os.path.join(artifact_dir, state_file_name)
+            if not os.path.exists(state_file_path):
+                raise FileNotFoundError(f"No pipeline state found at {state_file_path}")
+
+            pipeline_state = cls(state_file_path=state_file_path, artifact_dir=artifact_dir)
+            with open(state_file_path, "r") as state_file:
+                pipeline_state.state = json.load(state_file)
+            return pipeline_state
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def completed_artifact(self, stage_name: str, artifact_cls: type) -> Optional[object]:
+        stage = self.state["stages"].get(stage_name)
+        if stage is None or stage["status"] != "completed":
+            return None
+        return artifact_cls(**stage["artifact"])
+
+    def record(self, stage_name: str, status: str, fingerprint: Optional[str] = None,
+               artifact: Optional[object] = None, source: str = "run") -> None:
+        try:
+            self.state["stages"][stage_name] = {
+                "status": status,
+                "fingerprint": fingerprint,
+                "source": source,
+                "artifact": asdict(artifact) if artifact is not None else None
+            }
+            os.makedirs(os.path.dirname(self.state_file_path), exist_ok=True)
+            tmp_file_path = f"{self.state_file_path}.tmp"
+            with open(tmp_file_path, "w") as state_file:
+                json.dump(self.state, state_file, indent=4)
+            os.replace(tmp_file_path, self.state_file_path)
+        except Exception as e:
+            raise MyException(e, sys) from e
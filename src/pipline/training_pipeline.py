@@ -2,14 +2,20 @@ from src.components.data_ingestion import DataIngestion
 from src.components.data_validation import DataValidation
 from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTraining
+from src.components.model_pruning import ModelPruning
 from src.components.model_evaluation import ModelEvaluation
 from src.components.model_pusher import ModelPusher
+from src.utils import validation_checks, distribution_sketch, model_search, ensemble_utils, model_format, main_utils
+from src.entity.model_registry import ModelRegistry
 
 from src.entity.config_entity import (
+    training_pipeline_config,
+    TrainingPipelineConfig,
     DataIngestionConfig, 
     DataValidationConfig, 
     DataTransformationConfig,
     ModelTrainingConfig,
+    ModelPruningConfig,
     ModelEvaluationConfig,
     ModelPusherConfig
 )
@@ -18,23 +24,265 @@ from src.entity.artifact_entity import (
     DataValidationArtifact, 
     DataTransformationArtifcat,
     ModelTrainingArtifact,
+    ModelPruningArtifact,
     ModelEvaluationArtifact,
     ModelPusherArtifact
 )
+from src.pipline.stage_cache import StageCache, PipelineState
+from src.pipline.pipeline_report import PipelineReport
+from src.pipline.profiler import StageProfiler, maybe_profile
+from src.data_access.EPL_data import EplData
+from src.data_access import warehouse, match_lake
+from src.data_access.match_lake import MatchLake
+from src.utils import tracing
+from src.constants import PIPELINE_STATE_FILE_NAME, SCHEMA_FILE_PATH, TRACE_PIPELINE_SAMPLE_RATE
 from src.exception import MyException
 from src.logger import logging
+from dataclasses import replace
+from typing import Optional
+from sklearn.base import clone
 import sys
 
 
 class Training_Piepline:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True, resume_from: Optional[str] = None, trace_memory: bool = True,
+                 profiler: Optional[StageProfiler] = None, sample_fraction: Optional[float] = None,
+                 search_mode: Optional[str] = None, warehouse_backend: Optional[str] = None,
+                 source: Optional[str] = None, seasons: Optional[list] = None,
+                 pipeline_config: Optional[TrainingPipelineConfig] = None, split_date: Optional[str] = None,
+                 model_params: Optional[dict] = None, league: Optional[str] = None):
+        """
+        :param use_cache: reuse stage outputs whose fingerprint matches a previous run
+        :param resume_from: artifact dir of a failed run; its completed stages are reused as-is
+        :param trace_memory: record tracemalloc peaks per stage (adds allocation overhead to timings)
+        :param profiler: profiles every stage into the run's artifact dir when given
+        :param sample_fraction: fraction of ingested rows to keep, for quick runs
+        :param search_mode: 'grid' or 'random' to search model hyperparameters before the final fit
+        :param warehouse_backend: 'mongodb' or 'sqlite' warehouse to ingest from, WAREHOUSE_BACKEND by default
+        :param source: 'warehouse' or 'lake', where ingestion reads the matches from
+        :param seasons: seasons to train on (e.g. ['2023', '2024']), all seasons by default
+        :param pipeline_config: artifact root of the run, this process's training_pipeline_config by default
+        :param split_date: train/test split date, Train_Test_Split_Date by default
+        :param model_params: parameters set on a copy of MODEL, e.g. {'n_estimators': 100}
+        :param league: league ingested, DATA_INGESTION_LEAGUE by default
+        """
         logging.info("Initializing Training Pipeline")
-        self.data_ingestion_config = DataIngestionConfig()
-        self.data_validation_config = DataValidationConfig()
-        self.data_transformation_config = DataTransformationConfig()
-        self.model_training_config = ModelTrainingConfig()
-        self.model_evaluation_config = ModelEvaluationConfig()
-        self.model_pusher_config = ModelPusherConfig()
+        self.training_pipeline_config = pipeline_config or training_pipeline_config
+        artifact_dir = self.training_pipeline_config.artifact_dir
+        self.data_ingestion_config = DataIngestionConfig(artifact_dir=artifact_dir)
+        self.data_validation_config = DataValidationConfig(artifact_dir=artifact_dir)
+        self.data_transformation_config = DataTransformationConfig(artifact_dir=artifact_dir)
+        self.model_training_config = ModelTrainingConfig(artifact_dir=artifact_dir)
+        self.model_pruning_config = ModelPruningConfig(artifact_dir=artifact_dir)
+        self.model_evaluation_config = ModelEvaluationConfig(artifact_dir=artifact_dir)
+        self.model_pusher_config = ModelPusherConfig(artifact_dir=artifact_dir)
+        if sample_fraction is not None:
+            if not 0.0 < sample_fraction <= 1.0:
+                raise ValueError(f"sample_fraction must be in (0, 1], got {sample_fraction}")
+            self.data_ingestion_config.sample_fraction = sample_fraction
+        if search_mode is not None:
+            self.model_training_config.search_mode = search_mode
+        if warehouse_backend is not None:
+            self.data_ingestion_config.warehouse_backend = warehouse_backend
+        if source is not None:
+            self.data_ingestion_config.source = source
+        if seasons is not None:
+            self.data_ingestion_config.seasons = [str(season) for season in seasons]
+        if league is not None:
+            self.data_ingestion_config.league = league
+        if split_date is not None:
+            self.data_transformation_config.split_date = split_date
+        if model_params:
+            self.model_training_config.model = clone(self.model_training_config.model).set_params(**model_params)
+
+        self.profiler = profiler
+        self.use_cache = use_cache
+        self.stage_cache = StageCache(cache_dir=self.training_pipeline_config.stage_cache_dir)
+        self.pipeline_state = PipelineState(
+            state_file_path=self.training_pipeline_config.pipeline_state_file_path,
+            artifact_dir=self.training_pipeline_config.artifact_dir
+        )
+        self.resume_state = None
+        if resume_from is not None:
+            logging.info(f"Resuming completed stages from previous run: {resume_from}")
+            self.resume_state = PipelineState.load(artifact_dir=resume_from, state_file_name=PIPELINE_STATE_FILE_NAME)
+
+        self.pipeline_report = PipelineReport(
+            report_file_path=self.training_pipeline_config.pipeline_report_file_path,
+            run_info={
+                "artifact_dir": self.training_pipeline_config.artifact_dir,
+                "timestamp": self.training_pipeline_config.timestamp,
+                "use_cache": use_cache,
+                "resume_from": resume_from,
+                "split_date": self.data_transformation_config.split_date,
+                "model_params": repr(self.model_training_config.model.get_params()),
+                "sample_fraction": self.data_ingestion_config.sample_fraction,
+                "warehouse_backend": self.data_ingestion_config.warehouse_backend,
+                "source": self.data_ingestion_config.source,
+                "seasons": self.data_ingestion_config.seasons,
+                "league": self.data_ingestion_config.league,
+                "profile_mode": profiler.mode if profiler is not None else None
+            },
+            trace_memory=trace_memory
+        )
+
+    def _run_stage(self, stage_name: str, artifact_cls: type, stage_dir: str, run_stage, fingerprint_fn=None,
+                   input_files=()):
+        """
+        Runs one pipeline stage, reusing the output of a resumed run or of the stage cache when possible.
+        fingerprint_fn is None for stages with side effects outside the artifact dir, which are never cached.
+        input_files are only used to report the stage's input size.
+        """
+        with self.pipeline_report.measure_stage(stage_name, input_files=input_files) as stage_metrics, \
+                maybe_profile(self.profiler, stage_name), tracing.span(stage_name) as stage_span:
+            artifact, source = self._execute_stage(stage_name, artifact_cls, stage_dir, run_stage, fingerprint_fn)
+            stage_metrics.set_outputs(artifact, source=source)
+            stage_span.set(source=source)
+        return artifact
+
+    def _execute_stage(self, stage_name: str, artifact_cls: type, stage_dir: str, run_stage, fingerprint_fn=None):
+        if self.resume_state is not None:
+            artifact = self.resume_state.completed_artifact(stage_name, artifact_cls)
+            if artifact is not None:
+                logging.info(f"Reusing {stage_name} from resumed run")
+                self.pipeline_state.record(stage_name, "completed", artifact=artifact, source="resume")
+                return artifact, "resume"
+
+        fingerprint = None
+        try:
+            if self.use_cache and fingerprint_fn is not None:
+                fingerprint = fingerprint_fn()
+                artifact = self.stage_cache.lookup(
+                    stage_name, fingerprint, artifact_cls, stage_dir, self.training_pipeline_config.artifact_dir
+                )
+                if artifact is not None:
+                    self.pipeline_state.record(stage_name, "completed", fingerprint=fingerprint, artifact=artifact, source="cache")
+                    return artifact, "cache"
+
+            artifact = run_stage()
+
+            if fingerprint is not None:
+                self.stage_cache.store(
+                    stage_name, fingerprint, artifact, stage_dir, self.training_pipeline_config.artifact_dir
+                )
+            self.pipeline_state.record(stage_name, "completed", fingerprint=fingerprint, artifact=artifact)
+            return artifact, "run"
+        except Exception:
+            self.pipeline_state.record(stage_name, "failed", fingerprint=fingerprint)
+            raise
+
+    def _data_ingestion_fingerprint(self) -> str:
+        config = self.data_ingestion_config
+        if config.source == "lake":
+            # The content hashes of the partitions read stand in for the warehouse summary
+            source = {"lake_partitions": {
+                f"{entry['league']}/{entry['season']}": entry["content_hash"]
+                for entry in MatchLake(config.lake_dir).partitions(
+                    leagues=[config.league], seasons=config.seasons,
+                    start_date=config.start_date, end_date=config.end_date
+                )
+            }}
+        else:
+            with EplData(backend=config.warehouse_backend) as data:
+                source = data.collection_fingerprint(collection_name=config.collection_name)
+        return StageCache.fingerprint(
+            "data_ingestion",
+            params={
+                **source,
+                "source": config.source,
+                "league": config.league,
+                "seasons": config.seasons,
+                "warehouse_backend": self.data_ingestion_config.warehouse_backend,
+                "sample_fraction": self.data_ingestion_config.sample_fraction,
+                "sample_seed": self.data_ingestion_config.sample_seed,
+                "start_date": self.data_ingestion_config.start_date,
+                "end_date": self.data_ingestion_config.end_date
+            },
+            input_files=[SCHEMA_FILE_PATH],
+            code_objects=[DataIngestion, EplData, warehouse, match_lake, main_utils]
+        )
+
+    def _data_validation_fingerprint(self, data_ingestion_artifact) -> str:
+        # Drift is scored against the production model's data sketch, so a new production model invalidates the cache
+        baseline_sketch_path = ModelRegistry(self.data_validation_config.baseline_registry_dir).current_data_sketch_path()
+        return StageCache.fingerprint(
+            "data_validation",
+            input_files=[data_ingestion_artifact.trained_file_path, data_ingestion_artifact.test_file_path, SCHEMA_FILE_PATH]
+                        + ([baseline_sketch_path] if baseline_sketch_path is not None else []),
+            params={
+                "failure_sample_size": self.data_validation_config.failure_sample_size,
+                "sketch_exclude_columns": self.data_validation_config.sketch_exclude_columns,
+                "sketch_bin_width": self.data_validation_config.sketch_bin_width,
+                "sketch_max_bins": self.data_validation_config.sketch_max_bins,
+                "sketch_max_categories": self.data_validation_config.sketch_max_categories,
+                "psi_buckets": self.data_validation_config.psi_buckets,
+                "psi_threshold": self.data_validation_config.psi_threshold,
+                "ks_threshold": self.data_validation_config.ks_threshold,
+                "fail_on_drift": self.data_validation_config.fail_on_drift
+            },
+            code_objects=[DataValidation, validation_checks, distribution_sketch, main_utils]
+        )
+
+    def _data_transformation_fingerprint(self, data_ingestion_artifact, data_validation_artifact) -> str:
+        return StageCache.fingerprint(
+            "data_transformation",
+            input_files=[data_ingestion_artifact.trained_file_path],
+            params={
+                "split_date": self.data_transformation_config.split_date,
+                "validation_status": data_validation_artifact.validation_status
+            },
+            code_objects=[DataTransformation]
+        )
+
+    def _model_training_fingerprint(self, data_transformation_artifact) -> str:
+        return StageCache.fingerprint(
+            "model_training",
+            input_files=[data_transformation_artifact.transformed_trained_file_path],
+            params={
+                "model": self.model_training_config.model.get_params(),
+                "early_stopping": self.model_training_config.early_stopping,
+                "validation_fraction": self.model_training_config.validation_fraction,
+                "early_stopping_metric": self.model_training_config.early_stopping_metric,
+                "search_mode": self.model_training_config.search_mode,
+                "search_space": self.model_training_config.search_space if self.model_training_config.search_mode else None,
+                "search_n_iter": self.model_training_config.search_n_iter,
+                "search_cv_splits": self.model_training_config.search_cv_splits,
+                "search_scoring": self.model_training_config.search_scoring,
+                "search_random_state": self.model_training_config.search_random_state,
+                "input_features": self.model_training_config.input_features
+            },
+            code_objects=[ModelTraining, model_search, ensemble_utils]
+        )
+
+    def _model_pruning_fingerprint(self, model_training_artifact, data_transformation_artifact) -> str:
+        return StageCache.fingerprint(
+            "model_pruning",
+            input_files=[model_training_artifact.trained_model_path, data_transformation_artifact.transformed_trained_file_path,
+                         data_transformation_artifact.transformed_test_file_path],
+            params={
+                "enabled": self.model_pruning_config.enabled,
+                "accuracy_tolerance": self.model_pruning_config.accuracy_tolerance,
+                "log_loss_tolerance": self.model_pruning_config.log_loss_tolerance,
+                "validation_fraction": self.model_pruning_config.validation_fraction,
+                "input_features": self.model_pruning_config.input_features
+            },
+            code_objects=[ModelPruning, ensemble_utils]
+        )
+
+    def _model_evaluation_fingerprint(self, model_training_artifact, data_transformation_artifact) -> str:
+        return StageCache.fingerprint(
+            "model_evaluation",
+            input_files=[model_training_artifact.trained_model_path, data_transformation_artifact.transformed_test_file_path],
+            params={
+                "expected_accuracy": self.model_evaluation_config.expected_accuracy,
+                "single_row_p99_budget_ms": self.model_evaluation_config.single_row_p99_budget_ms,
+                "batch_p99_budget_ms": self.model_evaluation_config.batch_p99_budget_ms,
+                "load_time_budget_ms": self.model_evaluation_config.load_time_budget_ms,
+                "size_budget_bytes": self.model_evaluation_config.size_budget_bytes,
+                "input_features": self.model_evaluation_config.input_features
+            },
+            code_objects=[ModelEvaluation, model_format]
+        )
 
     def Data_Ingestion(self) -> DataIngestionArtifact:
         """
@@ -93,6 +341,22 @@ class Training_Piepline:
             logging.error(f"Error in model training: {str(e)}")
             raise MyException(e, sys) from e
 
+    def Model_Pruning(self, model_training_artifact, data_transformation_artifact) -> ModelPruningArtifact:
+        try:
+            logging.info("Entered the model_pruning method of TrainPipeline class")
+            model_pruning = ModelPruning(
+                model_training_artifact=model_training_artifact,
+                data_transformation_artifact=data_transformation_artifact,
+                model_pruning_config=self.model_pruning_config
+            )
+            model_pruning_artifact = model_pruning.initiate_model_pruning()
+            logging.info("Model pruning completed successfully")
+            logging.info("Exited the model_pruning method of TrainPipeline class")
+            return model_pruning_artifact
+        except Exception as e:
+            logging.error(f"Error in model pruning: {str(e)}")
+            raise MyException(e, sys) from e
+
     def Model_Evaluation(self, model_training_artifact, data_transformation_artifact) -> ModelEvaluationArtifact:
         try:
             logging.info("Entered the model_evaluation method of TrainPipeline class")
@@ -109,12 +373,15 @@ class Training_Piepline:
             logging.error(f"Error in model evaluation: {str(e)}")
             raise MyException(e, sys) from e
 
-    def Model_Pusher(self, model_evaluation_artifact) -> ModelPusherArtifact:
+    def Model_Pusher(self, model_evaluation_artifact, data_transformation_artifact=None,
+                     data_validation_artifact=None) -> ModelPusherArtifact:
         try:
             logging.info("Entered the model_pusher method of TrainPipeline class")
             model_pusher = ModelPusher(
                 model_evaluation_artifact=model_evaluation_artifact,
-                model_pusher_config=self.model_pusher_config
+                model_pusher_config=self.model_pusher_config,
+                data_transformation_artifact=data_transformation_artifact,
+                data_validation_artifact=data_validation_artifact
             )
             model_pusher_artifact = model_pusher.initiate_model_pusher()
             logging.info("Model pusher completed successfully")
@@ -125,6 +392,14 @@ class Training_Piepline:
             raise MyException(e, sys) from e
 
     def run_pipeline(self):
+        # The run is one trace: a span per stage, with the components' sub-steps nested under it
+        with tracing.span("training_pipeline", sample_rate=TRACE_PIPELINE_SAMPLE_RATE,
+                          artifact_dir=self.training_pipeline_config.artifact_dir) as pipeline_span:
+            self.pipeline_report.run_info["trace_id"] = pipeline_span.trace_id
+            logging.info(f"Training pipeline trace id: {pipeline_span.trace_id}")
+            self._run_pipeline()
+
+    def _run_pipeline(self):
         try:
             logging.info("="*80)
             logging.info("Starting the Complete Training Pipeline")
@@ -134,7 +409,11 @@ class Training_Piepline:
             logging.info("\n" + "="*80)
             logging.info("Step 1: Data Ingestion")
             logging.info("="*80)
-            data_ingestion_artifact = self.Data_Ingestion()
+            data_ingestion_artifact = self._run_stage(
+                "data_ingestion", DataIngestionArtifact, self.data_ingestion_config.data_ingestion_dir,
+                run_stage=self.Data_Ingestion,
+                fingerprint_fn=self._data_ingestion_fingerprint
+            )
             logging.info(f"Data Ingestion completed. Train file: {data_ingestion_artifact.trained_file_path}")
             logging.info(f"Test file: {data_ingestion_artifact.test_file_path}")
             
@@ -142,7 +421,12 @@ class Training_Piepline:
             logging.info("\n" + "="*80)
             logging.info("Step 2: Data Validation")
             logging.info("="*80)
-            data_validation_artifact = self.Data_validation(data_ingestion_artifact=data_ingestion_artifact)
+            data_validation_artifact = self._run_stage(
+                "data_validation", DataValidationArtifact, self.data_validation_config.data_validation_dir,
+                run_stage=lambda: self.Data_validation(data_ingestion_artifact=data_ingestion_artifact),
+                fingerprint_fn=lambda: self._data_validation_fingerprint(data_ingestion_artifact),
+                input_files=[data_ingestion_artifact.trained_file_path, data_ingestion_artifact.test_file_path]
+            )
             logging.info(f"Data Validation completed. Status: {data_validation_artifact.validation_status}")
             logging.info(f"Validation report: {data_validation_artifact.validation_report_file_path}")
             
@@ -150,9 +434,14 @@ class Training_Piepline:
             logging.info("\n" + "="*80)
             logging.info("Step 3: Data Transformation")
             logging.info("="*80)
-            data_transformation_artifact = self.Data_Transformation(
-                data_ingestion_artifact=data_ingestion_artifact,
-                data_validation_artifact=data_validation_artifact
+            data_transformation_artifact = self._run_stage(
+                "data_transformation", DataTransformationArtifcat, self.data_transformation_config.data_transformation_dir,
+                run_stage=lambda: self.Data_Transformation(
+                    data_ingestion_artifact=data_ingestion_artifact,
+                    data_validation_artifact=data_validation_artifact
+                ),
+                fingerprint_fn=lambda: self._data_transformation_fingerprint(data_ingestion_artifact, data_validation_artifact),
+                input_files=[data_ingestion_artifact.trained_file_path]
             )
             logging.info(f"Data Transformation completed. Transformed train file: {data_transformation_artifact.transformed_trained_file_path}")
             logging.info(f"Transformed test file: {data_transformation_artifact.transformed_test_file_path}")
@@ -161,41 +450,81 @@ class Training_Piepline:
             logging.info("\n" + "="*80)
             logging.info("Step 4: Model Training")
             logging.info("="*80)
-            model_training_artifact = self.Model_Training(
-                data_transformation_artifact=data_transformation_artifact
+            model_training_artifact = self._run_stage(
+                "model_training", ModelTrainingArtifact, self.model_training_config.model_training_dir,
+                run_stage=lambda: self.Model_Training(data_transformation_artifact=data_transformation_artifact),
+                fingerprint_fn=lambda: self._model_training_fingerprint(data_transformation_artifact),
+                input_files=[data_transformation_artifact.transformed_trained_file_path]
             )
             logging.info(f"Model Training completed. Model saved at: {model_training_artifact.trained_model_path}")
             
-            # Step 5: Model Evaluation
+            # Step 5: Model Pruning
             logging.info("\n" + "="*80)
-            logging.info("Step 5: Model Evaluation")
+            logging.info("Step 5: Model Pruning")
             logging.info("="*80)
-            model_evaluation_artifact = self.Model_Evaluation(
-                model_training_artifact=model_training_artifact,
-                data_transformation_artifact=data_transformation_artifact
+            model_pruning_artifact = self._run_stage(
+                "model_pruning", ModelPruningArtifact, self.model_pruning_config.model_pruning_dir,
+                run_stage=lambda: self.Model_Pruning(
+                    model_training_artifact=model_training_artifact,
+                    data_transformation_artifact=data_transformation_artifact
+                ),
+                fingerprint_fn=lambda: self._model_pruning_fingerprint(model_training_artifact, data_transformation_artifact),
+                input_files=[model_training_artifact.trained_model_path, data_transformation_artifact.transformed_test_file_path]
+            )
+            logging.info(
+                f"Model Pruning completed. Trees: {model_pruning_artifact.n_estimators_before} -> "
+                f"{model_pruning_artifact.n_estimators_after}"
+            )
+            # Evaluation and the pusher work on the pruned model from here on
+            model_training_artifact = replace(model_training_artifact, trained_model_path=model_pruning_artifact.pruned_model_path)
+
+            # Step 6: Model Evaluation
+            logging.info("\n" + "="*80)
+            logging.info("Step 6: Model Evaluation")
+            logging.info("="*80)
+            model_evaluation_artifact = self._run_stage(
+                "model_evaluation", ModelEvaluationArtifact, self.model_evaluation_config.model_evaluation_dir,
+                run_stage=lambda: self.Model_Evaluation(
+                    model_training_artifact=model_training_artifact,
+                    data_transformation_artifact=data_transformation_artifact
+                ),
+                fingerprint_fn=lambda: self._model_evaluation_fingerprint(model_training_artifact, data_transformation_artifact),
+                input_files=[model_training_artifact.trained_model_path, data_transformation_artifact.transformed_test_file_path]
             )
             logging.info(f"Model Evaluation completed. Accuracy: {model_evaluation_artifact.accuracy}")
             logging.info(f"Model Accepted: {model_evaluation_artifact.is_model_accepted}")
+            logging.info(f"Within serving budgets: {model_evaluation_artifact.is_within_budget}")
             logging.info(f"Evaluation report: {model_evaluation_artifact.model_test_report_file_path}")
             
-            # Step 6: Model Pusher
+            # Step 7: Model Pusher
             logging.info("\n" + "="*80)
-            logging.info("Step 6: Model Pusher")
+            logging.info("Step 7: Model Pusher")
             logging.info("="*80)
-            model_pusher_artifact = self.Model_Pusher(
-                model_evaluation_artifact=model_evaluation_artifact
+            # The pusher writes to the model registry, outside the artifact dir, so it always runs
+            model_pusher_artifact = self._run_stage(
+                "model_pusher", ModelPusherArtifact, self.model_pusher_config.model_pusher_dir,
+                run_stage=lambda: self.Model_Pusher(
+                    model_evaluation_artifact=model_evaluation_artifact,
+                    data_transformation_artifact=data_transformation_artifact,
+                    data_validation_artifact=data_validation_artifact
+                ),
+                input_files=[model_evaluation_artifact.model_path]
             )
             logging.info(f"Model Pusher completed. Model pushed: {model_pusher_artifact.is_model_pushed}")
             if model_pusher_artifact.is_model_pushed:
+                logging.info(f"Model version: {model_pusher_artifact.model_version}")
                 logging.info(f"Production model path: {model_pusher_artifact.saved_model_path}")
             logging.info(f"Pusher artifact directory: {model_pusher_artifact.model_pusher_dir}")
             
+            self.pipeline_report.write(status="completed")
+
             logging.info("\n" + "="*80)
             logging.info("Training Pipeline Completed Successfully!")
             logging.info("="*80)
             
         except Exception as e:
             logging.error(f"Error in training pipeline: {str(e)}")
+            self.pipeline_report.write(status="failed")
             raise MyException(e, sys) from e    
         
 
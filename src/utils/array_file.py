@@ -0,0 +1,94 @@
+"""
+Read-only, memory-mappable container for a set of numpy arrays:
+
+    [8 bytes magic][8 bytes header length][JSON header][padding][array 0][array 1]...
+
+Every array starts on a 64-byte boundary and the header records its offset, dtype
+and shape. Readers map the file and get numpy views over it, so opening is constant
+time and processes mapping the same file share its pages through the OS page cache.
+"""
+import os
+import sys
+import json
+import struct
+
+import numpy as np
+
+from src.exception import MyException
+
+
+ARRAY_FILE_ALIGNMENT = 64
+_LENGTH_STRUCT = struct.Struct("<Q")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ARRAY_FILE_ALIGNMENT) * ARRAY_FILE_ALIGNMENT
+
+
+def write_array_file(file_path: str, magic: bytes, header: dict, arrays: dict) -> None:
+    """
+    Method Name :   write_array_file
+    Description :   Writes header and arrays to a temp file and swaps it in with os.replace,
+                    so readers map either the previous file or the complete new one
+
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+        header = {**header, "arrays": {}}
+
+        # Offsets depend on the header length, so lay out the arrays relative to the data section first
+        relative_offset = 0
+        for name, array in arrays.items():
+            relative_offset = _align(relative_offset)
+            header["arrays"][name] = {"offset": relative_offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            relative_offset += array.nbytes
+
+        prefix_length = len(magic) + _LENGTH_STRUCT.size
+        # Reserve room for the offsets growing by a few digits once shifted
+        data_start = _align(prefix_length + len(json.dumps(header).encode()) + 16 * (len(arrays) + 1))
+        for spec in header["arrays"].values():
+            spec["offset"] += data_start
+        header_bytes = json.dumps(header).encode()
+        if prefix_length + len(header_bytes) > data_start:
+            raise ValueError(f"Header of {file_path} outgrew its reserved space")
+
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        tmp_file_path = f"{file_path}.tmp.{os.getpid()}"
+        with open(tmp_file_path, "wb") as array_file:
+            array_file.write(magic)
+            array_file.write(_LENGTH_STRUCT.pack(len(header_bytes)))
+            array_file.write(header_bytes)
+            for name, array in arrays.items():
+                array_file.write(b"\0" * (header["arrays"][name]["offset"] - array_file.tell()))
+                array_file.write(array.tobytes())
+        os.replace(tmp_file_path, file_path)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def read_array_file(file_path: str, magic: bytes):
+    """
+    Method Name :   read_array_file
+    Description :   Maps a file written by write_array_file read-only
+
+    Output      :   Returns (header, arrays) with every array a read-only view over the mapping
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        buffer = np.memmap(file_path, dtype=np.uint8, mode="r")
+        if bytes(buffer[:len(magic)]) != magic:
+            raise ValueError(f"{file_path} does not start with {magic!r}")
+
+        header_start = len(magic) + _LENGTH_STRUCT.size
+        (header_length,) = _LENGTH_STRUCT.unpack(bytes(buffer[len(magic):header_start]))
+        header = json.loads(bytes(buffer[header_start:header_start + header_length]))
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=spec["offset"]).reshape(spec["shape"])
+        return header, arrays
+    except Exception as e:
+        raise MyException(e, sys) from e
@@ -0,0 +1,353 @@
+"""
+Compact, mergeable summaries of a dataset's columns for drift detection.
+
+A numeric column is summarised by counts, min/max/sum and a histogram over
+fixed-width bins; a categorical one by its value counts. Both are built chunk by
+chunk and two sketches of the same columns can be merged, so a season's sketch can
+be kept instead of its raw rows and compared later against new data with PSI and
+a KS-style distance.
+
+A numeric merge is exact at the wider of the two bin widths, which is why widths must
+be power-of-two multiples of each other (sketches started from the same bin_width
+always are). A categorical merge is exact until a sketch has folded its rarest values
+into __other__: those counts can no longer be told apart.
+"""
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.exception import MyException
+
+
+SKETCH_FORMAT_VERSION = 1
+OTHER_CATEGORY = "__other__"
+# Keeps empty buckets from making the PSI log ratio infinite
+PSI_EPSILON = 1e-4
+
+
+def _common_bin_width(bin_width: float, other_bin_width: float) -> float:
+    """
+    Wider of two bin widths. Raises ValueError unless one is a power-of-two multiple of the
+    other, the only case in which every narrower bin falls inside exactly one wider bin.
+    """
+    ratio = max(bin_width, other_bin_width) / min(bin_width, other_bin_width)
+    if not np.isclose(ratio, 2.0 ** round(np.log2(ratio))):
+        raise ValueError(f"Cannot merge sketches with bin widths {bin_width} and {other_bin_width}: "
+                         f"their ratio {ratio:g} is not a power of two")
+    return max(bin_width, other_bin_width)
+
+
+class ColumnSketch:
+    """
+    Histogram of one column. Numeric values fall into bins [k * bin_width, (k + 1) * bin_width);
+    when there are more than max_bins bins the width doubles and neighbouring bins merge, so
+    memory stays bounded and sketches started from the same width can still be merged exactly.
+    """
+
+    def __init__(self, kind: str, bin_width: float = 1.0, max_bins: int = 256, max_categories: int = 100):
+        if kind not in ("numeric", "categorical"):
+            raise ValueError(f"Unknown sketch kind {kind}")
+        self.kind = kind
+        self.bin_width = float(bin_width)
+        self.max_bins = max_bins
+        self.max_categories = max_categories
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.bins = {}
+
+    def _add_counts(self, keys, counts) -> None:
+        for key, count in zip(keys, counts):
+            self.bins[key] = self.bins.get(key, 0) + int(count)
+
+    def _coarsen(self, bin_width: float) -> None:
+        factor = bin_width / self.bin_width
+        coarse = {}
+        for key, count in self.bins.items():
+            coarse_key = int(np.floor(key / factor))
+            coarse[coarse_key] = coarse.get(coarse_key, 0) + count
+        self.bins, self.bin_width = coarse, bin_width
+
+    def _limit_categories(self) -> None:
+        if len(self.bins) <= self.max_categories:
+            return
+        ranked = sorted(self.bins.items(), key=lambda item: (-item[1], str(item[0])))
+        kept = dict(ranked[:self.max_categories - 1])
+        kept[OTHER_CATEGORY] = kept.get(OTHER_CATEGORY, 0) + sum(count for _, count in ranked[self.max_categories - 1:])
+        self.bins = kept
+
+    def update(self, column: pd.Series) -> None:
+        """Adds one chunk of the column; values that are missing or not numeric count as nulls."""
+        if self.kind == "categorical":
+            values = column.dropna().astype(str)
+            self.nulls += len(column) - len(values)
+            self.count += len(values)
+            value_counts = values.value_counts(sort=False)
+            self._add_counts(value_counts.index, value_counts.to_numpy())
+            self._limit_categories()
+            return
+
+        values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+        values = values[np.isfinite(values)]
+        self.nulls += len(column) - len(values)
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = float(values.min()) if self.min is None else min(self.min, float(values.min()))
+        self.max = float(values.max()) if self.max is None else max(self.max, float(values.max()))
+        self.sum += float(values.sum())
+        self.sum_sq += float(np.square(values).sum())
+
+        keys, counts = np.unique(np.floor(values / self.bin_width).astype(np.int64), return_counts=True)
+        self._add_counts(keys.tolist(), counts)
+        while len(self.bins) > self.max_bins:
+            self._coarsen(self.bin_width * 2)
+
+    def merge(self, other: "ColumnSketch") -> "ColumnSketch":
+        """
+        Adds the counts of another sketch of the same column into this one. Raises ValueError
+        when the numeric bin widths are not power-of-two multiples of each other.
+        """
+        if other.kind != self.kind:
+            raise ValueError(f"Cannot merge a {other.kind} sketch into a {self.kind} sketch")
+        if self.kind == "numeric":
+            bin_width = _common_bin_width(self.bin_width, other.bin_width)
+            other = other.copy()
+            if self.bin_width != bin_width:
+                self._coarsen(bin_width)
+            if other.bin_width != bin_width:
+                other._coarsen(bin_width)
+            if other.count:
+                self.min = other.min if self.min is None else min(self.min, other.min)
+                self.max = other.max if self.max is None else max(self.max, other.max)
+        self.count += other.count
+        self.nulls += other.nulls
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        self._add_counts(other.bins.keys(), other.bins.values())
+        if self.kind == "numeric":
+            while len(self.bins) > self.max_bins:
+                self._coarsen(self.bin_width * 2)
+        else:
+            self._limit_categories()
+        return self
+
+    def copy(self) -> "ColumnSketch":
+        return ColumnSketch.from_dict(self.to_dict())
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    @property
+    def std(self):
+        if not self.count:
+            return None
+        return float(np.sqrt(max(self.sum_sq / self.count - self.mean ** 2, 0.0)))
+
+    def quantile(self, q: float):
+        """Lower edge of the bin holding the q-th quantile, exact to within one bin width."""
+        if self.kind != "numeric" or not self.count:
+            return None
+        keys = sorted(self.bins)
+        cumulative = np.cumsum([self.bins[key] for key in keys])
+        position = int(np.searchsorted(cumulative, q * self.count, side="left"))
+        return keys[min(position, len(keys) - 1)] * self.bin_width
+
+    def to_dict(self) -> dict:
+        keys = sorted(self.bins, key=str) if self.kind == "categorical" else sorted(self.bins)
+        return {
+            "kind": self.kind,
+            "count": self.count,
+            "nulls": self.nulls,
+            "min": self.min,
+            "max": self.max,
+            "sum": self.sum,
+            "sum_sq": self.sum_sq,
+            "bin_width": self.bin_width,
+            "max_bins": self.max_bins,
+            "max_categories": self.max_categories,
+            "bins": keys,
+            "counts": [self.bins[key] for key in keys]
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "ColumnSketch":
+        sketch = cls(content["kind"], bin_width=content["bin_width"], max_bins=content["max_bins"],
+                     max_categories=content["max_categories"])
+        for field in ("count", "nulls", "min", "max", "sum", "sum_sq"):
+            setattr(sketch, field, content[field])
+        sketch.bins = dict(zip(content["bins"], content["counts"]))
+        return sketch
+
+
+class DatasetSketch:
+    """Sketches of several columns, built in the same chunked pass as the row checks."""
+
+    def __init__(self, column_kinds: dict, bin_width: float = 1.0, max_bins: int = 256, max_categories: int = 100):
+        self.rows = 0
+        self.columns = {
+            column_name: ColumnSketch(kind, bin_width=bin_width, max_bins=max_bins, max_categories=max_categories)
+            for column_name, kind in column_kinds.items()
+        }
+
+    @classmethod
+    def from_schema(cls, schema: dict, exclude_columns=(), **sketch_options) -> "DatasetSketch":
+        column_kinds = {column: "numeric" for column in schema.get("numerical_columns", [])}
+        column_kinds.update({column: "categorical" for column in schema.get("categorical_columns", [])})
+        return cls({column: kind for column, kind in column_kinds.items() if column not in exclude_columns},
+                   **sketch_options)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        try:
+            self.rows += len(chunk)
+            for column_name, sketch in self.columns.items():
+                if column_name in chunk.columns:
+                    sketch.update(chunk[column_name])
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def merge(self, other: "DatasetSketch") -> "DatasetSketch":
+        # Checked up front so a rejected merge leaves this sketch as it was
+        for column_name, sketch in other.columns.items():
+            if column_name in self.columns and sketch.kind == "numeric" == self.columns[column_name].kind:
+                _common_bin_width(self.columns[column_name].bin_width, sketch.bin_width)
+        self.rows += other.rows
+        for column_name, sketch in other.columns.items():
+            if column_name in self.columns:
+                self.columns[column_name].merge(sketch)
+            else:
+                self.columns[column_name] = sketch.copy()
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "format_version": SKETCH_FORMAT_VERSION,
+            "rows": self.rows,
+            "columns": {column_name: sketch.to_dict() for column_name, sketch in self.columns.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "DatasetSketch":
+        if content.get("format_version") != SKETCH_FORMAT_VERSION:
+            raise ValueError(f"Unsupported sketch format version {content.get('format_version')}")
+        sketch = cls({})
+        sketch.rows = content["rows"]
+        sketch.columns = {column_name: ColumnSketch.from_dict(column) for column_name, column in content["columns"].items()}
+        return sketch
+
+    def save(self, file_path: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            with open(file_path, "w") as sketch_file:
+                json.dump(self.to_dict(), sketch_file)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @classmethod
+    def load(cls, file_path: str) -> "DatasetSketch":
+        try:
+            with open(file_path, "r") as sketch_file:
+                return cls.from_dict(json.load(sketch_file))
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+
+def _aligned_distributions(baseline: ColumnSketch, current: ColumnSketch):
+    """
+    Proportions of both sketches over the union of their bins, at a common bin width; only
+    approximate when the widths are not power-of-two multiples of each other.
+    """
+    if baseline.kind == "numeric":
+        bin_width = max(baseline.bin_width, current.bin_width)
+        baseline, current = baseline.copy(), current.copy()
+        for sketch in (baseline, current):
+            if sketch.bin_width != bin_width:
+                sketch._coarsen(bin_width)
+        keys = sorted(set(baseline.bins) | set(current.bins))
+    else:
+        keys = sorted(set(baseline.bins) | set(current.bins), key=str)
+    expected = np.array([baseline.bins.get(key, 0) for key in keys], dtype=np.float64) / max(baseline.count, 1)
+    actual = np.array([current.bins.get(key, 0) for key in keys], dtype=np.float64) / max(current.count, 1)
+    return expected, actual
+
+
+def population_stability_index(baseline: ColumnSketch, current: ColumnSketch, n_buckets: int = 10) -> float:
+    """
+    PSI of current against baseline. Numeric bins are grouped into about n_buckets buckets of
+    equal baseline mass (baseline quantiles); categorical columns use one bucket per category.
+    """
+    expected, actual = _aligned_distributions(baseline, current)
+    if baseline.kind == "numeric":
+        # Bucket of each bin = baseline mass before it, in 1 / n_buckets steps
+        mass_before = np.concatenate([[0.0], np.cumsum(expected)[:-1]])
+        buckets = np.minimum((mass_before * n_buckets).astype(np.int64), n_buckets - 1)
+        expected = np.bincount(buckets, weights=expected, minlength=n_buckets)
+        actual = np.bincount(buckets, weights=actual, minlength=n_buckets)
+    expected = np.clip(expected, PSI_EPSILON, None)
+    actual = np.clip(actual, PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_statistic(baseline: ColumnSketch, current: ColumnSketch):
+    """Largest gap between the two binned CDFs; None for categorical columns, which have no order."""
+    if baseline.kind != "numeric":
+        return None
+    expected, actual = _aligned_distributions(baseline, current)
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual)))) if len(expected) else 0.0
+
+
+def compare_sketches(baseline: DatasetSketch, current: DatasetSketch, psi_threshold: float = 0.25,
+                     ks_threshold: float = 0.1, n_buckets: int = 10) -> dict:
+    """
+    Method Name :   compare_sketches
+    Description :   Scores every column both sketches share with PSI and KS, and flags those above the thresholds
+
+    Output      :   Returns {drift_detected, drifted_columns, columns: {column: scores}}
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        columns = {}
+        for column_name, current_sketch in current.columns.items():
+            baseline_sketch = baseline.columns.get(column_name)
+            if baseline_sketch is None or baseline_sketch.kind != current_sketch.kind:
+                continue
+            if not baseline_sketch.count or not current_sketch.count:
+                continue
+            psi = population_stability_index(baseline_sketch, current_sketch, n_buckets=n_buckets)
+            ks = ks_statistic(baseline_sketch, current_sketch)
+            scores = {
+                "kind": current_sketch.kind,
+                "psi": round(psi, 6),
+                "ks": round(ks, 6) if ks is not None else None,
+                "baseline_null_rate": round(baseline_sketch.nulls / max(baseline_sketch.count + baseline_sketch.nulls, 1), 6),
+                "null_rate": round(current_sketch.nulls / max(current_sketch.count + current_sketch.nulls, 1), 6),
+                "drifted": psi > psi_threshold or (ks is not None and ks > ks_threshold)
+            }
+            if current_sketch.kind == "numeric":
+                scores.update({
+                    "baseline_mean": baseline_sketch.mean,
+                    "mean": current_sketch.mean,
+                    "baseline_median": baseline_sketch.quantile(0.5),
+                    "median": current_sketch.quantile(0.5)
+                })
+            columns[column_name] = scores
+
+        drifted_columns = [column_name for column_name, scores in columns.items() if scores["drifted"]]
+        return {
+            "drift_detected": bool(drifted_columns),
+            "drifted_columns": drifted_columns,
+            "psi_threshold": psi_threshold,
+            "ks_threshold": ks_threshold,
+            "baseline_rows": baseline.rows,
+            "rows": current.rows,
+            "columns": columns
+        }
+    except Exception as e:
+        raise MyException(e, sys) from e
@@ -0,0 +1,87 @@
+import sys
+import copy
+
+import numpy as np
+
+from src.exception import MyException
+
+
+def truncate_adaboost(model, n_estimators: int):
+    """
+    Returns a copy of a fitted AdaBoostClassifier keeping only its first n_estimators boosting rounds;
+    the model passed in is left as it is. predict/predict_proba of the truncated model equal the
+    n_estimators-th output of staged_predict/_proba.
+    """
+    try:
+        if not 1 <= n_estimators <= len(model.estimators_):
+            raise ValueError(f"n_estimators must be in [1, {len(model.estimators_)}], got {n_estimators}")
+        # A shallow copy is enough: the fitted trees are shared, never modified
+        model = copy.copy(model)
+        model.estimators_ = model.estimators_[:n_estimators]
+        model.estimator_weights_ = np.asarray(model.estimator_weights_[:n_estimators])
+        model.estimator_errors_ = np.asarray(model.estimator_errors_[:n_estimators])
+        model.n_estimators = n_estimators
+        return model
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def estimator_class_predictions(model, X) -> np.ndarray:
+    """Returns an (n_estimators, n_samples) array with the class index predicted by every tree."""
+    try:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return np.stack([estimator.tree_.predict(X).argmax(axis=1) for estimator in model.estimators_])
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def samme_predict_proba(class_predictions: np.ndarray, weights: np.ndarray, n_classes: int) -> np.ndarray:
+    """
+    AdaBoostClassifier.predict_proba (SAMME) computed from per-tree class predictions, so any
+    subset or re-weighting of the ensemble can be scored without refitting or re-predicting.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    total = weights.sum()
+    # votes[:, c] = total weight of the trees predicting class c
+    votes = np.stack([weights @ (class_predictions == c) for c in range(n_classes)], axis=1)
+    decision = (votes - (total - votes) / (n_classes - 1)) / total
+
+    if n_classes == 2:
+        decision = decision[:, 1] - decision[:, 0]
+        decision = np.vstack([-decision, decision]).T / 2
+    else:
+        decision = decision / (n_classes - 1)
+    decision = decision - decision.max(axis=1, keepdims=True)
+    exp_decision = np.exp(decision)
+    return exp_decision / exp_decision.sum(axis=1, keepdims=True)
+
+
+def tree_signature(estimator) -> bytes:
+    """
+    Byte signature of a fitted tree's decision logic: split features, thresholds, topology and the
+    class predicted at each leaf. Trees with equal signatures predict identically on every input.
+    """
+    tree = estimator.tree_
+    is_leaf = tree.children_left == -1
+    leaf_class = np.where(is_leaf, tree.value[:, 0, :].argmax(axis=1), -1)
+    threshold = np.where(is_leaf, 0.0, tree.threshold)
+    feature = np.where(is_leaf, -1, tree.feature)
+    return b"".join(array.tobytes() for array in (
+        tree.children_left, tree.children_right, feature, threshold, leaf_class
+    ))
+
+
+def select_estimators(model, indices, weights=None):
+    """Returns a copy of the model keeping the estimators at indices (optionally with new weights)."""
+    try:
+        indices = np.asarray(indices, dtype=int)
+        model = copy.copy(model)
+        model.estimators_ = [model.estimators_[index] for index in indices]
+        model.estimator_weights_ = np.asarray(
+            model.estimator_weights_[indices] if weights is None else weights, dtype=np.float64
+        )
+        model.estimator_errors_ = np.asarray(model.estimator_errors_)[indices]
+        model.n_estimators = len(indices)
+        return model
+    except Exception as e:
+        raise MyException(e, sys) from e
@@ -1,5 +1,6 @@
 import os
 import sys
+import hashlib
 
 import numpy as np
 import dill
@@ -86,6 +87,23 @@ def save_object(file_path: str, obj: object) -> None:
         raise MyException(e, sys) from e
 
 
+def compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Returns the sha256 hex digest of a file's content.
+    file_path: str location of file to hash
+    chunk_size: int number of bytes read per iteration
+    return: str hex digest
+    """
+    try:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
 # def drop_columns(df: DataFrame, cols: list)-> DataFrame:
 
 #     """
@@ -0,0 +1,159 @@
+"""
+Memory-mappable model format for the serving path.
+
+A fitted AdaBoostClassifier over decision trees is flattened into a handful of
+numeric arrays and written as an array file (see src/utils/array_file.py). Loading
+maps the file read-only and builds numpy views over it, so load time does not
+depend on the ensemble size, processes serving the same file share its pages
+through the OS page cache, and no pickle code is ever executed.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import AdaBoostClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.ensemble_utils import samme_predict_proba
+from src.utils.array_file import write_array_file, read_array_file
+
+
+MODEL_FORMAT_MAGIC = b"EPLMDL01"
+
+
+def flatten_adaboost(model: AdaBoostClassifier) -> dict:
+    """
+    Concatenates the nodes of every tree into global node arrays.
+    Leaves point to themselves on both sides, so traversal needs no leaf test: after
+    max_depth steps every sample sits on its leaf in every tree.
+    """
+    try:
+        if not isinstance(model, AdaBoostClassifier) or not all(
+                isinstance(estimator, DecisionTreeClassifier) for estimator in model.estimators_):
+            raise ValueError(f"Only AdaBoostClassifier over decision trees can be compiled, got {type(model).__name__}")
+
+        features, thresholds, lefts, rights, leaf_classes, roots = [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold).astype(np.float64))
+            lefts.append((np.where(is_leaf, node_ids, tree.children_left) + offset).astype(np.int32))
+            rights.append((np.where(is_leaf, node_ids, tree.children_right) + offset).astype(np.int32))
+            leaf_classes.append(tree.value[:, 0, :].argmax(axis=1).astype(np.int32))
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return {
+            "feature": np.concatenate(features),
+            "threshold": np.concatenate(thresholds),
+            "left": np.concatenate(lefts),
+            "right": np.concatenate(rights),
+            "leaf_class": np.concatenate(leaf_classes),
+            "root": np.asarray(roots, dtype=np.int32),
+            "weight": np.asarray(model.estimator_weights_, dtype=np.float64),
+            "max_depth": max_depth
+        }
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def save_compiled_model(model: AdaBoostClassifier, file_path: str, metadata: dict = None) -> None:
+    """
+    Method Name :   save_compiled_model
+    Description :   Writes a fitted AdaBoostClassifier in the memory-mappable format
+
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        flat = flatten_adaboost(model)
+        max_depth = flat.pop("max_depth")
+        feature_names = getattr(model, "feature_names_in_", None)
+
+        header = {
+            "format_version": 1,
+            "model_type": "adaboost_samme",
+            "classes": model.classes_.tolist(),
+            "feature_names": feature_names.tolist() if feature_names is not None else None,
+            "n_features": int(model.n_features_in_),
+            "max_depth": int(max_depth),
+            "metadata": metadata or {}
+        }
+        write_array_file(file_path, MODEL_FORMAT_MAGIC, header, flat)
+        logging.info(f"Compiled model with {len(flat['root'])} trees saved to: {file_path}")
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def load_compiled_model(file_path: str) -> "CompiledEnsemble":
+    """
+    Method Name :   load_compiled_model
+    Description :   Maps a compiled model file read-only; the arrays are views over the mapping
+
+    Output      :   Returns a CompiledEnsemble
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        header, arrays = read_array_file(file_path, MODEL_FORMAT_MAGIC)
+        if header["model_type"] != "adaboost_samme":
+            raise ValueError(f"Unsupported compiled model type {header['model_type']}")
+        return CompiledEnsemble(header, arrays)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+class CompiledEnsemble:
+    """
+    predict / predict_proba of the compiled AdaBoost ensemble. All trees are traversed
+    together, one vectorized step per tree level, and outputs match the sklearn model.
+    """
+
+    def __init__(self, header: dict, arrays: dict):
+        self.header = header
+        self.classes_ = np.asarray(header["classes"])
+        self.feature_names_in_ = header["feature_names"]
+        self.n_features_in_ = header["n_features"]
+        self.metadata = header["metadata"]
+        self.max_depth = header["max_depth"]
+        self._feature = arrays["feature"]
+        self._threshold = arrays["threshold"]
+        self._left = arrays["left"]
+        self._right = arrays["right"]
+        self._leaf_class = arrays["leaf_class"]
+        self._root = arrays["root"]
+        self.estimator_weights_ = arrays["weight"]
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self._root)
+
+    def _as_array(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame) and self.feature_names_in_ is not None:
+            X = X[self.feature_names_in_]
+        # Trees compare float32 features against float64 thresholds, as sklearn does
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got array of shape {X.shape}")
+        return X
+
+    def leaf_classes(self, X) -> np.ndarray:
+        """(n_estimators, n_samples) class index predicted by every tree."""
+        X = self._as_array(X)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self._root, (len(X), len(self._root)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self._feature[nodes]] <= self._threshold[nodes]
+            nodes = np.where(go_left, self._left[nodes], self._right[nodes])
+        return self._leaf_class[nodes].T
+
+    def predict_proba(self, X) -> np.ndarray:
+        return samme_predict_proba(self.leaf_classes(X), self.estimator_weights_, len(self.classes_))
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
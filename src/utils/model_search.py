@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import ParameterGrid, ParameterSampler, TimeSeriesSplit
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.shared_arrays import SharedArrays, attach_worker_arrays, worker_array
+
+
+SEARCH_MODES = ("grid", "random")
+SEARCH_SCORINGS = ("log_loss", "accuracy")
+
+
+def build_candidates(search_mode: str, search_space: dict, n_iter: int, random_state: int) -> list:
+    """
+    Expands a declarative search space into a list of parameter dicts.
+    grid:   every combination of the listed values (sklearn ParameterGrid)
+    random: n_iter draws from lists or scipy.stats distributions (sklearn ParameterSampler)
+    """
+    if search_mode == "grid":
+        return list(ParameterGrid(search_space))
+    if search_mode == "random":
+        return list(ParameterSampler(search_space, n_iter=n_iter, random_state=random_state))
+    raise ValueError(f"Unknown search mode '{search_mode}', expected one of {SEARCH_MODES}")
+
+
+def _to_builtin(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def score_probabilities(y_codes: np.ndarray, probabilities: np.ndarray, model_classes: np.ndarray, n_classes: int) -> dict:
+    """
+    Accuracy and log loss of predict_proba output whose columns are model_classes, codes into
+    range(n_classes). Classes missing from a short training window get zero probability.
+    """
+    classes = np.arange(n_classes)
+    full_probabilities = np.zeros((len(probabilities), n_classes))
+    full_probabilities[:, model_classes] = probabilities
+    return {
+        "accuracy": float(accuracy_score(y_codes, classes[full_probabilities.argmax(axis=1)])),
+        "log_loss": float(log_loss(y_codes, np.clip(full_probabilities, 1e-15, 1), labels=classes))
+    }
+
+
+def _evaluate_candidate(task):
+    """
+    Worker task: cross-validates one parameter candidate on the shared X/y arrays.
+    Runs inside a pool process, so it only receives the candidate and fold indices.
+    """
+    candidate_index, estimator, params, folds, n_classes = task
+    X, y = worker_array("X"), worker_array("y")
+
+    fold_scores = []
+    for train_index, test_index in folds:
+        model = clone(estimator).set_params(**params)
+
+        fit_start = time.perf_counter()
+        model.fit(X[train_index], y[train_index])
+        fit_time = time.perf_counter() - fit_start
+
+        probabilities = model.predict_proba(X[test_index])
+        fold_scores.append({
+            **score_probabilities(y[test_index], probabilities, model.classes_, n_classes),
+            "fit_time_s": fit_time
+        })
+
+    return candidate_index, fold_scores
+
+
+def run_search(estimator, X: np.ndarray, y: np.ndarray, candidates: list, cv_splits: int,
+               scoring: str = "log_loss", n_jobs: int = -1) -> list:
+    """
+    Evaluates every candidate with time-ordered folds (rows must be sorted by date) in a
+    process pool. X and y are published once in shared memory and attached by each worker.
+
+    Returns one result dict per candidate, best first.
+    """
+    try:
+        if scoring not in SEARCH_SCORINGS:
+            raise ValueError(f"Unknown scoring '{scoring}', expected one of {SEARCH_SCORINGS}")
+
+        classes, y_codes = np.unique(y, return_inverse=True)
+        folds = list(TimeSeriesSplit(n_splits=cv_splits).split(X))
+        n_jobs = os.cpu_count() if n_jobs is None or n_jobs < 1 else n_jobs
+        n_jobs = min(n_jobs, len(candidates))
+        logging.info(f"Searching {len(candidates)} candidates x {cv_splits} time-ordered folds on {n_jobs} processes")
+
+        results = [None] * len(candidates)
+        with SharedArrays({"X": np.asarray(X, dtype=np.float64), "y": y_codes}) as shared:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=attach_worker_arrays,
+                                     initargs=(shared.specs,)) as executor:
+                tasks = [(index, estimator, params, folds, len(classes)) for index, params in enumerate(candidates)]
+                for candidate_index, fold_scores in executor.map(_evaluate_candidate, tasks):
+                    params = {key: _to_builtin(value) for key, value in candidates[candidate_index].items()}
+                    result = {"params": params, "folds": len(fold_scores)}
+                    for metric in ("accuracy", "log_loss", "fit_time_s"):
+                        values = [fold[metric] for fold in fold_scores]
+                        result[f"mean_{metric}"] = float(np.mean(values))
+                        result[f"std_{metric}"] = float(np.std(values))
+                    results[candidate_index] = result
+                    logging.info(
+                        f"Candidate {candidate_index + 1}/{len(candidates)} {params}: "
+                        f"log_loss={result['mean_log_loss']:.4f} accuracy={result['mean_accuracy']:.4f}"
+                    )
+
+        if scoring == "log_loss":
+            results.sort(key=lambda result: (result["mean_log_loss"], -result["mean_accuracy"]))
+        else:
+            results.sort(key=lambda result: (-result["mean_accuracy"], result["mean_log_loss"]))
+        for rank, result in enumerate(results, start=1):
+            result["rank"] = rank
+        return results
+    except Exception as e:
+        raise MyException(e, sys) from e
@@ -1,38 +1,93 @@
+import os
+import time
+from contextlib import contextmanager
+
 import pandas as pd
 import numpy as np
-import soccerdata as sd
+
+from src.constants import PREDICTION_HISTORY_FILE_PATH, PREDICTION_HISTORY_MAX_AGE_HOURS, DATA_INGESTION_LAKE_DIR, MODEL_INPUT_FEATURES
+from src.logger import logging
+from src.utils.array_file import write_array_file, read_array_file
+from src.data_access.match_lake import MatchLake
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; publishing is then unsynchronised
+    fcntl = None
+
+
+HISTORY_FILE_MAGIC = b"EPLHST01"
+HISTORY_STAT_COLUMNS = [
+    "home_goals", "away_goals",
+    "home_shots", "away_shots",
+    "home_shots_on_target", "away_shots_on_target"
+]
+
+
+@contextmanager
+def _exclusive_file_lock(lock_file_path):
+    os.makedirs(os.path.dirname(lock_file_path) or ".", exist_ok=True)
+    with open(lock_file_path, "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 
 class EPLMatchPredictorPreprocessor:
+    """
+    Builds the feature row for a match from each team's last 5 matches.
+
+    The match history is kept as compact numpy columns: team codes, dates, the
+    per-match stats and, per team, the indices of its matches in date order. It can
+    be published to a memory-mapped file once and attached read-only by every
+    API worker (see shared()), so workers share one copy of it through the page
+    cache instead of each downloading and holding its own DataFrame.
+    """
 
-    def __init__(self, seasons, league="ENG-Premier League"):
+    def __init__(self, seasons, league="ENG-Premier League", lake_dir=DATA_INGESTION_LAKE_DIR):
         self.seasons = seasons
         self.league = league
+        self.lake_dir = lake_dir
         self.df = None
+        self.history_file_path = None
+        self._history_file_stat = None
+        self._history = None
+        self.teams = []
+        self._team_codes = {}
 
-        self.input_features = [
-            'home_shots_on_target_avg_last5',
-            'away_shots_on_target_avg_last5',
-            'home_shots_avg_last5',
-            'away_shots_avg_last5',
-            'home_team_goals_conceded_avg_last5',
-            'away_team_goals_conceded_avg_last5',
-            'home_goals_avg_last5',
-            'away_goals_avg_last5',
-            'home_points_last5_matches',
-            'away_points_last5_matches',
-            'points_diff_last5',
-            'goal_diff_avg5',
-            'shots_diff_avg5',
-            'x_defense_diff',
-            'home_advantage',
-            'shots_on_target_diff_avg5'
-        ]
+        self.input_features = MODEL_INPUT_FEATURES
 
     # -------------------------------
     # LOAD & PREPARE DATA
     # -------------------------------
     def load_data(self):
+        """
+        Loads the seasons from the local lake when it holds all of them, reading only their
+        partitions; otherwise downloads them.
+        """
+        lake = MatchLake(self.lake_dir)
+        lake_seasons = {entry["season"] for entry in lake.partitions(leagues=[self.league], seasons=self.seasons)}
+        if lake_seasons == {str(season) for season in self.seasons}:
+            df = lake.read(leagues=[self.league], seasons=self.seasons,
+                           columns=["date", "home_team", "away_team"] + HISTORY_STAT_COLUMNS)
+            logging.info(f"Loaded {len(df)} matches of seasons {self.seasons} from the lake: {self.lake_dir}")
+        else:
+            df = self._download_matches()
+
+        df["date"] = pd.to_datetime(df["date"])
+        df = df.sort_values("date").reset_index(drop=True)
+
+        self.df = df
+        self._set_history(self.build_history(df), teams=self._teams_of(df))
+
+    def _download_matches(self):
+        # Imported here so workers that only attach a published history never load soccerdata
+        import soccerdata as sd
+
         dfs = []
         for season in self.seasons:
             mh = sd.MatchHistory(leagues=self.league, seasons=season)
@@ -54,68 +109,158 @@ class EPLMatchPredictorPreprocessor:
             "HST": "home_shots_on_target",
             "AST": "away_shots_on_target",
         }, inplace=True)
+        return df
 
-        df["date"] = pd.to_datetime(df["date"])
-        df = df.sort_values("date").reset_index(drop=True)
+    @staticmethod
+    def _teams_of(df) -> list:
+        return sorted(set(df["home_team"]).union(df["away_team"]))
 
-        self.df = df
+    @classmethod
+    def build_history(cls, df) -> dict:
+        """Compact columns of a date-sorted match DataFrame, plus a per-team match index."""
+        teams = cls._teams_of(df)
+        team_codes = {team: code for code, team in enumerate(teams)}
+        home = df["home_team"].map(team_codes).to_numpy(dtype=np.int16)
+        away = df["away_team"].map(team_codes).to_numpy(dtype=np.int16)
+
+        history = {
+            "date": df["date"].to_numpy(dtype="datetime64[ns]"),
+            "home_team": home,
+            "away_team": away
+        }
+        for column in HISTORY_STAT_COLUMNS:
+            history[column] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float32)
+
+        # team_matches[team_offsets[t]:team_offsets[t + 1]] are the rows team t played in, in date order
+        rows = np.concatenate([np.arange(len(df)), np.arange(len(df))])
+        row_teams = np.concatenate([home, away])
+        order = np.lexsort((rows, row_teams))
+        history["team_matches"] = rows[order].astype(np.int32)
+        history["team_offsets"] = np.concatenate(
+            [[0], np.cumsum(np.bincount(row_teams, minlength=len(teams)))]
+        ).astype(np.int64)
+        return history
+
+    def _set_history(self, history: dict, teams: list):
+        self._history = history
+        self.teams = list(teams)
+        self._team_codes = {team: code for code, team in enumerate(self.teams)}
+
+    # -------------------------------
+    # SHARED HISTORY ACROSS WORKERS
+    # -------------------------------
+    def publish_history(self, history_file_path=PREDICTION_HISTORY_FILE_PATH):
+        """Writes the loaded history to a memory-mappable file, replacing any previous one atomically."""
+        if self._history is None:
+            raise ValueError("No match history loaded to publish")
+        write_array_file(history_file_path, HISTORY_FILE_MAGIC, {
+            "league": self.league,
+            "seasons": [str(season) for season in self.seasons],
+            "teams": self.teams,
+            "published_at": time.time()
+        }, self._history)
+        logging.info(f"Published match history of {len(self._history['date'])} matches to {history_file_path}")
+
+    def attach_history(self, history_file_path=PREDICTION_HISTORY_FILE_PATH):
+        """Maps a published history read-only; the DataFrame is dropped so only the shared pages remain."""
+        stat = os.stat(history_file_path)
+        header, arrays = read_array_file(history_file_path, HISTORY_FILE_MAGIC)
+        self._set_history(arrays, teams=header["teams"])
+        self.df = None
+        self.history_file_path = history_file_path
+        self._history_file_stat = (stat.st_ino, stat.st_mtime_ns)
+        logging.info(f"Attached match history of {len(arrays['date'])} matches from {history_file_path}")
+
+    def _is_published(self, history_file_path, max_age_hours) -> bool:
+        """True when a history for the same league and seasons was published less than max_age_hours ago."""
+        if not os.path.exists(history_file_path):
+            return False
+        header, _ = read_array_file(history_file_path, HISTORY_FILE_MAGIC)
+        return (
+            header["league"] == self.league
+            and header["seasons"] == [str(season) for season in self.seasons]
+            and time.time() - header["published_at"] < max_age_hours * 3600
+        )
+
+    def needs_refresh(self, max_age_hours=PREDICTION_HISTORY_MAX_AGE_HOURS) -> bool:
+        """True when the attached file was replaced by another worker or has gone stale."""
+        if self.history_file_path is None:
+            return False
+        try:
+            stat = os.stat(self.history_file_path)
+        except FileNotFoundError:
+            return True
+        return (stat.st_ino, stat.st_mtime_ns) != self._history_file_stat or \
+            time.time() - stat.st_mtime > max_age_hours * 3600
+
+    @classmethod
+    def shared(cls, seasons, league="ENG-Premier League", history_file_path=PREDICTION_HISTORY_FILE_PATH,
+               max_age_hours=PREDICTION_HISTORY_MAX_AGE_HOURS, lake_dir=DATA_INGESTION_LAKE_DIR):
+        """
+        Returns a preprocessor attached to the published history, loading and publishing
+        it first when it is missing or stale. Workers serialise on a lock file, so only
+        the first one loads; the others wait and then attach to what it published.
+        """
+        preprocessor = cls(seasons=seasons, league=league, lake_dir=lake_dir)
+        if not preprocessor._is_published(history_file_path, max_age_hours):
+            with _exclusive_file_lock(f"{history_file_path}.lock"):
+                if not preprocessor._is_published(history_file_path, max_age_hours):
+                    preprocessor.load_data()
+                    preprocessor.publish_history(history_file_path)
+        preprocessor.attach_history(history_file_path)
+        return preprocessor
 
     # -------------------------------
     # LAST 5 MATCHES (HOME + AWAY)
     # -------------------------------
     def _get_last5_matches(self, team, before_date):
-        df = self.df[
-            ((self.df["home_team"] == team) | (self.df["away_team"] == team)) &
-            (self.df["date"] < before_date)
-        ].sort_values("date").tail(5)
+        """Row indices of the team's last 5 matches before before_date, oldest first."""
+        code = self._team_codes.get(team)
+        if code is None:
+            raise ValueError(f"Not enough history for {team}")
 
-        if len(df) < 5:
+        history = self._history
+        rows = history["team_matches"][history["team_offsets"][code]:history["team_offsets"][code + 1]]
+        end = np.searchsorted(history["date"][rows], np.datetime64(before_date, "ns"), side="left")
+        if end < 5:
             raise ValueError(f"Not enough history for {team}")
 
-        return df
+        return rows[end - 5:end]
 
     # -------------------------------
     # TEAM FORM (MEANS)
     # -------------------------------
-    def _compute_team_form(self, matches, team):
-        goals, shots, shots_ot, conceded = [], [], [], []
-
-        for _, r in matches.iterrows():
-            if r["home_team"] == team:
-                goals.append(r["home_goals"])
-                shots.append(r["home_shots"])
-                shots_ot.append(r["home_shots_on_target"])
-                conceded.append(r["away_goals"])
-            else:
-                goals.append(r["away_goals"])
-                shots.append(r["away_shots"])
-                shots_ot.append(r["away_shots_on_target"])
-                conceded.append(r["home_goals"])
+    def _team_perspective(self, matches, team):
+        """Goals, shots, shots on target for and goals against the team in the given rows."""
+        history = self._history
+        is_home = history["home_team"][matches] == self._team_codes[team]
+
+        def pick(home_column, away_column):
+            return np.where(is_home, history[home_column][matches], history[away_column][matches]).astype(np.float64)
 
         return {
-            "goals_avg": np.mean(goals),
-            "shots_avg": np.mean(shots),
-            "shots_ot_avg": np.mean(shots_ot),
-            "conceded_avg": np.mean(conceded)
+            "goals": pick("home_goals", "away_goals"),
+            "shots": pick("home_shots", "away_shots"),
+            "shots_ot": pick("home_shots_on_target", "away_shots_on_target"),
+            "conceded": pick("away_goals", "home_goals")
+        }
+
+    def _compute_team_form(self, matches, team):
+        stats = self._team_perspective(matches, team)
+        return {
+            "goals_avg": np.mean(stats["goals"]),
+            "shots_avg": np.mean(stats["shots"]),
+            "shots_ot_avg": np.mean(stats["shots_ot"]),
+            "conceded_avg": np.mean(stats["conceded"])
         }
 
     # -------------------------------
     # POINTS FROM LAST 5 MATCHES
     # -------------------------------
     def _compute_points_last5(self, matches, team):
-        points = 0
-        for _, r in matches.iterrows():
-            if r["home_team"] == team:
-                gf, ga = r["home_goals"], r["away_goals"]
-            else:
-                gf, ga = r["away_goals"], r["home_goals"]
-
-            if gf > ga:
-                points += 3
-            elif gf == ga:
-                points += 1
-
-        return points
+        stats = self._team_perspective(matches, team)
+        gf, ga = stats["goals"], stats["conceded"]
+        return int(3 * np.sum(gf > ga) + np.sum(gf == ga))
 
     # -------------------------------
     # BUILD ONE ROW FOR PREDICTION
@@ -123,12 +268,12 @@ class EPLMatchPredictorPreprocessor:
     def make_prediction_row(self, home_team, away_team, match_date):
         """
         Generate a single row of features for prediction.
-        
+
         Args:
             home_team (str): Name of the home team
             away_team (str): Name of the away team
             match_date (str or datetime): Date of the match
-            
+
         Returns:
             pd.DataFrame: Single row DataFrame with all required features
         """
@@ -0,0 +1,63 @@
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.exception import MyException
+
+
+class SharedArrays:
+    """
+    Publishes a set of numpy arrays in POSIX shared memory so worker processes can
+    attach to them by name instead of receiving a pickled copy per task.
+
+    Usage:
+        with SharedArrays({"X": X, "y": y}) as shared:
+            pool = ProcessPoolExecutor(initializer=attach_worker_arrays, initargs=(shared.specs,))
+    """
+
+    def __init__(self, arrays: dict):
+        try:
+            self._blocks = []
+            self.specs = {}
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                self._blocks.append(block)
+                self.specs[name] = (block.name, array.shape, array.dtype.str)
+        except Exception as e:
+            self.close()
+            raise MyException(e, sys) from e
+
+    def close(self) -> None:
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+# Arrays attached by attach_worker_arrays, keyed by name, for the lifetime of a worker process
+_worker_arrays = {}
+_worker_blocks = []
+
+
+def attach_worker_arrays(specs: dict) -> None:
+    """Process pool initializer: maps the published arrays read-only into this worker."""
+    for name, (block_name, shape, dtype) in specs.items():
+        # Pool workers share the publishing process's resource tracker, which unlinks the segment once
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        _worker_blocks.append(block)
+        _worker_arrays[name] = array
+
+
+def worker_array(name: str) -> np.ndarray:
+    return _worker_arrays[name]
@@ -0,0 +1,221 @@
+"""
+Lightweight tracing: nested, timed spans grouped by a trace id that doubles as the
+correlation id of an API request or a training run.
+
+    with tracing.span("training_pipeline", sample_rate=1.0):
+        with tracing.span("data_transformation", rows=len(df)):
+            ...
+
+The current span lives in a context variable, so spans nest across function calls and
+async handlers without being passed around. Whether a trace is recorded is decided once,
+at its root span, with probability sample_rate; spans under an unsampled root cost one
+context lookup. When the root span ends, the spans of the trace are appended to a
+JSON-lines file, one span per line, in a single write.
+
+summarize_spans and collapse_spans turn the file into per-span timings and into collapsed
+stacks (the format of the sample profiler, loadable by speedscope or flamegraph.pl).
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import threading
+import contextvars
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+from src.constants import TRACE_FILE_PATH, TRACE_SAMPLE_RATE
+from src.exception import MyException
+from src.logger import logging
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent", "name", "attributes", "sampled", "start", "_start_ns", "_spans")
+
+    def __init__(self, name: str, trace_id: str, parent: Optional["Span"], sampled: bool, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.parent = parent
+        self.sampled = sampled
+        self.attributes = attributes
+        self.span_id = os.urandom(8).hex() if sampled else None
+        # Finished spans of the trace, shared by all its spans and exported with the root
+        self._spans = parent._spans if parent is not None else []
+        self.start = time.time()
+        self._start_ns = time.perf_counter_ns()
+
+    def set(self, **attributes) -> None:
+        """Adds attributes known only once the span is running (row counts, status codes, ...)."""
+        if self.sampled:
+            self.attributes.update(attributes)
+
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+export_file_path = TRACE_FILE_PATH
+default_sample_rate = TRACE_SAMPLE_RATE
+
+
+def configure_tracing(file_path: Optional[str] = None, sample_rate: Optional[float] = None) -> None:
+    """Sets the file spans are exported to and the sample rate of root spans that do not set their own."""
+    global export_file_path, default_sample_rate
+    if file_path is not None:
+        export_file_path = file_path
+    if sample_rate is not None:
+        default_sample_rate = sample_rate
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Correlation id of the running trace, also set when the trace is not sampled."""
+    span_ = _current_span.get()
+    return span_.trace_id if span_ is not None else None
+
+
+@contextmanager
+def span(name: str, trace_id: Optional[str] = None, sample_rate: Optional[float] = None, **attributes):
+    """
+    Times the block as a child of the current span, or as the root of a new trace when there is
+    none; trace_id and sample_rate only apply to a root (trace_id defaults to a new uuid).
+    Yields the Span, so attributes can be added with span.set(...).
+    """
+    parent = _current_span.get()
+    if parent is None:
+        sampled = random.random() < (default_sample_rate if sample_rate is None else sample_rate)
+        span_ = Span(name, trace_id or uuid.uuid4().hex, None, sampled, attributes)
+    elif not parent.sampled:
+        # Unsampled traces keep their root span current, only for the correlation id
+        yield parent
+        return
+    else:
+        span_ = Span(name, parent.trace_id, parent, True, attributes)
+
+    token = _current_span.set(span_)
+    status, error = "ok", None
+    try:
+        yield span_
+    except BaseException as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        if span_.sampled:
+            _finish(span_, status, error)
+
+
+def _finish(span_: Span, status: str, error: Optional[str]) -> None:
+    record = {
+        "trace_id": span_.trace_id,
+        "span_id": span_.span_id,
+        "parent_id": span_.parent.span_id if span_.parent is not None else None,
+        "name": span_.name,
+        "start": round(span_.start, 6),
+        "duration_ms": round((time.perf_counter_ns() - span_._start_ns) / 1e6, 3),
+        "status": status,
+        "pid": os.getpid()
+    }
+    if error is not None:
+        record["error"] = error
+    if span_.attributes:
+        record["attributes"] = span_.attributes
+    span_._spans.append(record)
+    if span_.parent is None:
+        _export(span_._spans)
+
+
+def _export(spans: list) -> None:
+    # Tracing must never fail the request or the run it observes
+    try:
+        lines = "".join(json.dumps(record, default=str) + "\n" for record in spans)
+        os.makedirs(os.path.dirname(export_file_path) or ".", exist_ok=True)
+        with _export_lock, open(export_file_path, "a") as trace_file:
+            trace_file.write(lines)
+    except Exception as e:
+        logging.warning(f"Could not export {len(spans)} spans to {export_file_path}: {e}")
+
+
+def read_spans(file_path: Optional[str] = None, trace_id: Optional[str] = None, root_name: Optional[str] = None) -> list:
+    """
+    Method Name :   read_spans
+    Description :   Reads the exported spans, only those of one trace or of the traces whose root
+                    span has the given name when asked
+
+    Output      :   Returns the span records in export order
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        with open(file_path or export_file_path, "r") as trace_file:
+            spans = [json.loads(line) for line in trace_file if line.strip()]
+        if trace_id is not None:
+            spans = [record for record in spans if record["trace_id"] == trace_id]
+        if root_name is not None:
+            trace_ids = {record["trace_id"] for record in spans if record["parent_id"] is None and record["name"] == root_name}
+            spans = [record for record in spans if record["trace_id"] in trace_ids]
+        return spans
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def _span_paths(spans: list) -> dict:
+    """span_id -> "root;child;...;span" name path of every span."""
+    by_id = {record["span_id"]: record for record in spans}
+    paths = {}
+
+    def path_of(record):
+        if record["span_id"] not in paths:
+            parent = by_id.get(record["parent_id"])
+            paths[record["span_id"]] = record["name"] if parent is None else f"{path_of(parent)};{record['name']}"
+        return paths[record["span_id"]]
+
+    for record in spans:
+        path_of(record)
+    return paths
+
+
+def summarize_spans(spans: list) -> dict:
+    """Count, total, p50, p95 and max duration in ms of every span path, slowest total first."""
+    paths = _span_paths(spans)
+    durations = defaultdict(list)
+    for record in spans:
+        durations[paths[record["span_id"]]].append(record["duration_ms"])
+    summary = {
+        path: {
+            "count": len(values),
+            "total_ms": round(float(np.sum(values)), 3),
+            "p50_ms": round(float(np.percentile(values, 50)), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3),
+            "max_ms": round(float(np.max(values)), 3)
+        }
+        for path, values in durations.items()
+    }
+    return dict(sorted(summary.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+
+def collapse_spans(spans: list, collapsed_file_path: str) -> str:
+    """
+    Writes the spans as collapsed stacks weighted by self time in microseconds (a span's
+    duration minus that of its children), summed over traces, for flame graph viewers.
+    """
+    paths = _span_paths(spans)
+    child_time = Counter()
+    for record in spans:
+        if record["parent_id"] is not None:
+            child_time[record["parent_id"]] += record["duration_ms"]
+    stacks = Counter()
+    for record in spans:
+        self_time_us = int(round((record["duration_ms"] - child_time[record["span_id"]]) * 1000))
+        stacks[paths[record["span_id"]]] += max(self_time_us, 0)
+
+    os.makedirs(os.path.dirname(collapsed_file_path) or ".", exist_ok=True)
+    with open(collapsed_file_path, "w") as collapsed_file:
+        for stack, weight in stacks.most_common():
+            collapsed_file.write(f"{stack} {weight}\n")
+    return collapsed_file_path
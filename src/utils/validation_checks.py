@@ -0,0 +1,208 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.exception import MyException
+
+
+INTEGER_DTYPES = ("int",)
+
+
+class RowCheck:
+    """One vectorized rule: failures(chunk) returns the boolean mask of rows breaking it."""
+
+    def __init__(self, name: str, kind: str, columns: list, failures):
+        self.name = name
+        self.kind = kind
+        self.columns = columns
+        self.failures = failures
+
+
+def _numeric(column: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(column):
+        return column
+    return pd.to_numeric(column, errors="coerce")
+
+
+def _integer_coercion_failures(column_name: str):
+    def failures(chunk: pd.DataFrame) -> pd.Series:
+        column = chunk[column_name]
+        if pd.api.types.is_integer_dtype(column):
+            return pd.Series(False, index=chunk.index)
+        numeric = _numeric(column)
+        return column.notna() & (numeric.isna() | (numeric % 1 != 0))
+    return failures
+
+
+def _datetime_coercion_failures(column_name: str):
+    def failures(chunk: pd.DataFrame) -> pd.Series:
+        column = chunk[column_name]
+        if pd.api.types.is_datetime64_any_dtype(column):
+            return pd.Series(False, index=chunk.index)
+        return column.notna() & pd.to_datetime(column, errors="coerce").isna()
+    return failures
+
+
+def _null_failures(column_name: str):
+    def failures(chunk: pd.DataFrame) -> pd.Series:
+        return chunk[column_name].isna()
+    return failures
+
+
+def _negative_failures(column_name: str):
+    def failures(chunk: pd.DataFrame) -> pd.Series:
+        return _numeric(chunk[column_name]) < 0
+    return failures
+
+
+def _greater_than_failures(column_name: str, upper_column_name: str):
+    def failures(chunk: pd.DataFrame) -> pd.Series:
+        return _numeric(chunk[column_name]) > _numeric(chunk[upper_column_name])
+    return failures
+
+
+def compile_checks(schema: dict) -> list:
+    """
+    Turns the column types and the constraints section of config/schema.yaml into
+    vectorized row checks. Columns missing from the schema's column list are skipped,
+    the column existence checks already report them, and so are the exclude_columns.
+    """
+    try:
+        constraints = schema.get("constraints", {})
+        excluded = set(constraints.get("exclude_columns", []))
+        columns = {column_name: dtype for column_name, dtype in schema["columns"].items() if column_name not in excluded}
+        checks = []
+
+        for column_name, dtype in columns.items():
+            if dtype in INTEGER_DTYPES:
+                checks.append(RowCheck(f"{column_name}_is_integer", "dtype", [column_name],
+                                       _integer_coercion_failures(column_name)))
+        for column_name in constraints.get("datetime_columns", []):
+            checks.append(RowCheck(f"{column_name}_is_datetime", "dtype", [column_name],
+                                   _datetime_coercion_failures(column_name)))
+
+        # Nulls are checked per row for sampling; the rate is compared against max_null_rate in the report
+        for column_name in columns:
+            checks.append(RowCheck(f"{column_name}_not_null", "null_rate", [column_name], _null_failures(column_name)))
+
+        for column_name in constraints.get("non_negative", []):
+            checks.append(RowCheck(f"{column_name}_non_negative", "range", [column_name],
+                                   _negative_failures(column_name)))
+        for column_name, upper_column_name in constraints.get("less_equal", []):
+            checks.append(RowCheck(f"{column_name}_le_{upper_column_name}", "range", [column_name, upper_column_name],
+                                   _greater_than_failures(column_name, upper_column_name)))
+        return checks
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+class SchemaValidator:
+    """
+    Runs the compiled checks chunk by chunk and keeps only counts, the hashes of
+    the unique key seen so far and a few failing rows per check, so a file of any
+    size is validated in a single pass with bounded memory (8 bytes per row for
+    the duplicate key check).
+    """
+
+    def __init__(self, schema: dict, sample_size: int = 5):
+        try:
+            constraints = schema.get("constraints", {})
+            self.checks = compile_checks(schema)
+            self.sample_size = sample_size
+            self.unique_key = constraints.get("unique_key", [])
+            null_rates = constraints.get("max_null_rate", {})
+            self.max_null_rates = {
+                column_name: null_rates.get(column_name, null_rates.get("default", 0.0))
+                for column_name in schema["columns"]
+            }
+
+            self.n_rows = 0
+            self.failed_rows = {check.name: 0 for check in self.checks}
+            self.samples = {check.name: [] for check in self.checks}
+            self.duplicate_rows = 0
+            self.duplicate_samples = []
+            self._seen_keys = np.empty(0, dtype=np.uint64)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _add_samples(self, samples: list, chunk: pd.DataFrame, mask: pd.Series, columns: list) -> None:
+        missing = self.sample_size - len(samples)
+        if missing <= 0:
+            return
+        context_columns = [column for column in self.unique_key + columns if column in chunk.columns]
+        context_columns = list(dict.fromkeys(context_columns))
+        for row_number, values in chunk.loc[mask, context_columns].head(missing).iterrows():
+            samples.append({
+                "row": int(row_number),
+                "values": {key: (None if pd.isna(value) else value if isinstance(value, str) else str(value))
+                           for key, value in values.items()}
+            })
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Validates one chunk; its index must be the row number within the file."""
+        try:
+            self.n_rows += len(chunk)
+            for check in self.checks:
+                if not all(column in chunk.columns for column in check.columns):
+                    continue
+                mask = check.failures(chunk).fillna(False).astype(bool)
+                n_failed = int(mask.sum())
+                if n_failed:
+                    self.failed_rows[check.name] += n_failed
+                    self._add_samples(self.samples[check.name], chunk, mask, check.columns)
+
+            if self.unique_key and all(column in chunk.columns for column in self.unique_key):
+                hashes = pd.util.hash_pandas_object(chunk[self.unique_key].astype(str), index=False).to_numpy()
+                duplicated = pd.Series(hashes, index=chunk.index).duplicated().to_numpy()
+                if len(self._seen_keys):
+                    positions = np.searchsorted(self._seen_keys, hashes).clip(max=len(self._seen_keys) - 1)
+                    duplicated |= self._seen_keys[positions] == hashes
+                if duplicated.any():
+                    mask = pd.Series(duplicated, index=chunk.index)
+                    self.duplicate_rows += int(duplicated.sum())
+                    self._add_samples(self.duplicate_samples, chunk, mask, [])
+                self._seen_keys = np.union1d(self._seen_keys, hashes)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def report(self) -> dict:
+        """Per-check results; 'passed' is False for every check that should fail validation."""
+        results = []
+        for check in self.checks:
+            failed_rows = self.failed_rows[check.name]
+            failure_rate = failed_rows / self.n_rows if self.n_rows else 0.0
+            if check.kind == "null_rate":
+                threshold = self.max_null_rates[check.columns[0]]
+                passed = failure_rate <= threshold
+            else:
+                threshold = 0.0
+                passed = failed_rows == 0
+            if failed_rows or not passed:
+                results.append({
+                    "check": check.name,
+                    "kind": check.kind,
+                    "columns": check.columns,
+                    "failed_rows": failed_rows,
+                    "failure_rate": round(failure_rate, 6),
+                    "max_failure_rate": threshold,
+                    "passed": passed,
+                    "samples": self.samples[check.name]
+                })
+        if self.unique_key:
+            results.append({
+                "check": "unique_" + "_".join(self.unique_key),
+                "kind": "duplicate_key",
+                "columns": self.unique_key,
+                "failed_rows": self.duplicate_rows,
+                "failure_rate": round(self.duplicate_rows / self.n_rows, 6) if self.n_rows else 0.0,
+                "max_failure_rate": 0.0,
+                "passed": self.duplicate_rows == 0,
+                "samples": self.duplicate_samples
+            })
+        return {
+            "rows": self.n_rows,
+            "checks_run": len(self.checks) + (1 if self.unique_key else 0),
+            "failed_checks": [result["check"] for result in results if not result["passed"]],
+            "results": results
+        }
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.distribution_sketch import (
+    ColumnSketch,
+    DatasetSketch,
+    compare_sketches,
+    ks_statistic,
+    population_stability_index,
+)
+
+
+def _values(seed, size=1000, loc=10.0):
+    return pd.Series(np.random.default_rng(seed).normal(loc=loc, scale=3.0, size=size))
+
+
+def test_chunked_merge_equals_one_pass():
+    values = _values(0)
+    whole = ColumnSketch("numeric", bin_width=0.5, max_bins=16)
+    whole.update(values)
+
+    first, second = (ColumnSketch("numeric", bin_width=0.5, max_bins=16) for _ in range(2))
+    first.update(values[:300])
+    second.update(values[300:])
+    merged = first.merge(second)
+
+    assert merged.bin_width == whole.bin_width
+    assert merged.bins == whole.bins
+    assert (merged.count, merged.min, merged.max) == (whole.count, whole.min, whole.max)
+    assert merged.sum == pytest.approx(whole.sum)
+
+
+def test_merge_across_power_of_two_widths_is_exact():
+    values = _values(1)
+    narrow, wide, reference = (ColumnSketch("numeric", bin_width=width) for width in (0.25, 1.0, 1.0))
+    narrow.update(values[:500])
+    wide.update(values[500:])
+    reference.update(values)
+
+    assert wide.merge(narrow).bins == reference.bins
+
+
+def test_merge_rejects_incompatible_widths_unchanged():
+    sketch, other = ColumnSketch("numeric", bin_width=1.0), ColumnSketch("numeric", bin_width=0.3)
+    sketch.update(_values(2))
+    other.update(_values(3))
+    before = sketch.to_dict()
+
+    with pytest.raises(ValueError, match="power of two"):
+        sketch.merge(other)
+    with pytest.raises(ValueError, match="power of two"):
+        DatasetSketch({"x": "numeric"}, bin_width=1.0).merge(DatasetSketch({"x": "numeric"}, bin_width=0.3))
+    assert sketch.to_dict() == before
+
+
+def test_round_trip_and_identical_data_scores_zero(tmp_path):
+    sketch = DatasetSketch({"x": "numeric", "team": "categorical"})
+    sketch.update(pd.DataFrame({"x": _values(8), "team": ["Arsenal", "Chelsea"] * 500}))
+    sketch.save(str(tmp_path / "sketch.json"))
+    loaded = DatasetSketch.load(str(tmp_path / "sketch.json"))
+
+    assert loaded.to_dict() == sketch.to_dict()
+    for name in ("x", "team"):
+        assert population_stability_index(sketch.columns[name], loaded.columns[name]) == pytest.approx(0.0)
+        assert ks_statistic(sketch.columns[name], loaded.columns[name]) in (None, pytest.approx(0.0))
+    assert not compare_sketches(sketch, loaded)["drift_detected"]
+
+
+def test_categorical_sketch_folds_rare_values():
+    sketch = ColumnSketch("categorical", max_categories=3)
+    sketch.update(pd.Series(["a"] * 5 + ["b"] * 4 + ["c", "d", None]))
+
+    assert sketch.bins == {"a": 5, "b": 4, "__other__": 2}
+    assert (sketch.count, sketch.nulls) == (11, 1)
+
+
+def test_compare_flags_only_the_shifted_column():
+    baseline = DatasetSketch({"stable": "numeric", "shifted": "numeric"})
+    current = DatasetSketch.from_dict(baseline.to_dict())
+    baseline.update(pd.DataFrame({"stable": _values(4), "shifted": _values(5)}))
+    current.update(pd.DataFrame({"stable": _values(6), "shifted": _values(7, loc=16.0)}))
+
+    report = compare_sketches(baseline, current)
+
+    assert report["drift_detected"]
+    assert report["drifted_columns"] == ["shifted"]
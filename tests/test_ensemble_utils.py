@@ -0,0 +1,54 @@
+import numpy as np
+from sklearn.ensemble import AdaBoostClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from src.utils.ensemble_utils import (
+    estimator_class_predictions,
+    samme_predict_proba,
+    select_estimators,
+    truncate_adaboost
+)
+
+
+def _fitted_adaboost(n_classes, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(300, 4))
+    signal = X[:, 0] - X[:, 1] + rng.normal(scale=1.0, size=len(X))
+    y = np.digitize(signal, np.quantile(signal, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    model = AdaBoostClassifier(estimator=DecisionTreeClassifier(max_depth=2), n_estimators=25, random_state=seed)
+    return model.fit(X, y), X
+
+
+def test_samme_predict_proba_matches_predict_proba():
+    for n_classes in (2, 3):
+        model, X = _fitted_adaboost(n_classes)
+
+        probabilities = samme_predict_proba(estimator_class_predictions(model, X), model.estimator_weights_, n_classes)
+
+        np.testing.assert_allclose(probabilities, model.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_truncate_adaboost_matches_staged_predict_proba_and_copies():
+    model, X = _fitted_adaboost(3)
+    staged = list(model.staged_predict_proba(X))
+
+    for n_estimators in (1, 7, len(model.estimators_)):
+        truncated = truncate_adaboost(model, n_estimators)
+        np.testing.assert_allclose(truncated.predict_proba(X), staged[n_estimators - 1], rtol=0, atol=1e-12)
+
+    assert model.n_estimators == 25
+    assert len(model.estimators_) == len(staged)
+
+
+def test_select_estimators_returns_a_reweighted_copy():
+    model, X = _fitted_adaboost(2)
+    keep = [0, 2, 4]
+
+    selected = select_estimators(model, keep, weights=np.ones(len(keep)))
+
+    assert len(selected.estimators_) == 3
+    assert len(model.estimators_) == 25
+    np.testing.assert_allclose(
+        selected.predict_proba(X),
+        samme_predict_proba(estimator_class_predictions(model, X)[keep], np.ones(len(keep)), 2), rtol=0, atol=1e-12
+    )
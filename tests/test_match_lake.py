@@ -0,0 +1,36 @@
+import pandas as pd
+
+from src.data_access.match_lake import MatchLake, season_of
+
+
+def _matches(dates):
+    return pd.DataFrame({
+        "date": dates,
+        "home_team": [f"Home{index}" for index in range(len(dates))],
+        "away_team": [f"Away{index}" for index in range(len(dates))],
+        "home_goals": list(range(len(dates)))
+    })
+
+
+def test_season_of_keeps_integer_names_next_to_a_missing_date():
+    seasons = season_of(pd.Series(["2023-08-12", None, "2024-03-02", "2024-08-17"]))
+
+    assert seasons.tolist()[0] == "2023"
+    assert pd.isna(seasons.iloc[1])
+    assert seasons.tolist()[2:] == ["2023", "2024"]
+
+
+def test_write_twice_then_read_back(tmp_path):
+    lake = MatchLake(str(tmp_path))
+    clean = _matches(["2023-08-12", "2023-12-26", "2024-08-17", "2025-01-04"])
+    with_null_date = pd.concat([clean, _matches([None])], ignore_index=True)
+
+    first = lake.write(with_null_date, "EPL")
+    second = lake.write(clean, "EPL")
+
+    assert first["dropped_rows"] == 1
+    assert sorted(first["written"]) == ["EPL/2023", "EPL/2024"]
+    assert sorted(second["unchanged"]) == ["EPL/2023", "EPL/2024"]
+    assert not second["written"]
+    pd.testing.assert_frame_equal(lake.read(), clean, check_dtype=False)
+    assert lake.read(seasons=["2023"])["date"].tolist() == ["2023-08-12", "2023-12-26"]
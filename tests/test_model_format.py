@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import AdaBoostClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from src.utils.model_format import save_compiled_model, load_compiled_model
+
+
+def _fitted_adaboost(n_classes, max_depth, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=["a", "b", "c", "d"])
+    signal = X["a"] + 0.5 * X["b"] + rng.normal(scale=1.0, size=len(X))
+    labels = np.array(["A", "D", "H"])[:n_classes]
+    y = labels[np.digitize(signal, np.quantile(signal, np.linspace(0, 1, n_classes + 1)[1:-1]))]
+    model = AdaBoostClassifier(estimator=DecisionTreeClassifier(max_depth=max_depth), n_estimators=30, random_state=seed)
+    return model.fit(X, y), X
+
+
+@pytest.mark.parametrize("n_classes, max_depth", [(2, 3), (3, 2), (3, 1)])
+def test_compiled_model_matches_sklearn(tmp_path, n_classes, max_depth):
+    model, X = _fitted_adaboost(n_classes, max_depth)
+    file_path = str(tmp_path / "model.epm")
+
+    save_compiled_model(model, file_path, metadata={"run": "test"})
+    compiled = load_compiled_model(file_path)
+
+    assert compiled.n_estimators == len(model.estimators_)
+    assert compiled.metadata == {"run": "test"}
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    # Columns are selected by name, in the order the model was fitted with
+    np.testing.assert_allclose(compiled.predict_proba(X[["d", "c", "b", "a"]]), model.predict_proba(X), rtol=0, atol=1e-12)
@@ -0,0 +1,27 @@
+import numpy as np
+from sklearn.ensemble import AdaBoostClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from src.utils.model_search import run_search, score_probabilities
+
+
+def test_score_probabilities_gives_missing_classes_zero_probability():
+    probabilities = np.array([[0.8, 0.2], [0.3, 0.7]])
+
+    scores = score_probabilities(np.array([0, 2]), probabilities, np.array([0, 2]), n_classes=3)
+
+    assert scores["accuracy"] == 1.0
+    assert np.isclose(scores["log_loss"], -(np.log(0.8) + np.log(0.7)) / 2)
+
+
+def test_search_survives_an_early_fold_without_every_class():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 3))
+    # The first fold trains on the first 15 rows, none of which is a draw
+    y = np.concatenate([np.tile(["H", "A"], 8), rng.choice(["H", "A", "D"], size=44)])
+    estimator = AdaBoostClassifier(estimator=DecisionTreeClassifier(max_depth=1), n_estimators=5, random_state=0)
+
+    results = run_search(estimator, X, y, [{"learning_rate": 0.5}, {"learning_rate": 1.0}], cv_splits=3, n_jobs=1)
+
+    assert [result["rank"] for result in results] == [1, 2]
+    assert all(np.isfinite(result["mean_log_loss"]) for result in results)
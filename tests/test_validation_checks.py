@@ -0,0 +1,72 @@
+import pandas as pd
+
+from src.utils.validation_checks import SchemaValidator, compile_checks
+
+SCHEMA = {
+    "columns": {"_id": "str", "date": "str", "home_team": "str", "away_team": "str",
+                "home_goals": "int", "home_ht_goals": "int", "time": "str"},
+    "constraints": {
+        "exclude_columns": ["_id"],
+        "max_null_rate": {"default": 0.0, "time": 1.0},
+        "non_negative": ["home_goals"],
+        "less_equal": [["home_ht_goals", "home_goals"]],
+        "unique_key": ["date", "home_team", "away_team"],
+    },
+}
+
+
+def _chunk(rows, start):
+    columns = ["_id", "date", "home_team", "away_team", "home_goals", "home_ht_goals", "time"]
+    return pd.DataFrame(rows, columns=columns, index=range(start, start + len(rows)))
+
+
+def _validate(chunks):
+    validator = SchemaValidator(SCHEMA)
+    for chunk in chunks:
+        validator.update(chunk)
+    return {result["check"]: result for result in validator.report()["results"]}
+
+
+def _failed_checks(results):
+    return [name for name, result in results.items() if not result["passed"]]
+
+
+def test_excluded_columns_get_no_checks():
+    names = [check.name for check in compile_checks(SCHEMA)]
+
+    assert "home_goals_is_integer" in names
+    assert not [name for name in names if name.startswith("_id")]
+
+
+def test_nulls_within_the_allowed_rate_pass():
+    results = _validate([
+        _chunk([["a", "2024-08-16", "Arsenal", "Chelsea", 2, 1, None]], 0),
+        _chunk([["b", "2024-08-17", "Chelsea", "Arsenal", 0, 0, "15:00"]], 1),
+    ])
+
+    assert _failed_checks(results) == []
+    assert results["time_not_null"]["failed_rows"] == 1
+    assert sorted(results) == ["time_not_null", "unique_date_home_team_away_team"]
+
+
+def test_row_checks_count_failures_across_chunks():
+    results = _validate([
+        _chunk([["a", "2024-08-16", "Arsenal", "Chelsea", "two", 0, None],
+                ["b", "2024-08-17", "Everton", "Fulham", -1, -2, None]], 0),
+        _chunk([["c", "2024-08-18", "Leeds", "Wolves", 1, 3, None],
+                ["d", "2024-08-19", None, "Spurs", 1, 0, None],
+                ["e", "2024-08-16", "Arsenal", "Chelsea", 1, 0, None]], 2),
+    ])
+
+    assert results["home_goals_is_integer"]["failed_rows"] == 1
+    assert results["home_goals_non_negative"]["failed_rows"] == 1
+    assert results["home_ht_goals_le_home_goals"]["samples"][0]["row"] == 2
+    assert results["home_team_not_null"]["samples"][0]["row"] == 3
+    assert results["time_not_null"]["passed"]
+    duplicate = results["unique_date_home_team_away_team"]
+    assert (duplicate["failed_rows"], duplicate["passed"]) == (1, False)
+    assert duplicate["samples"][0]["row"] == 4
+    assert sorted(_failed_checks(results)) == sorted([
+        "home_goals_is_integer", "home_goals_non_negative", "home_ht_goals_le_home_goals",
+        "home_team_not_null", "unique_date_home_team_away_team",
+    ])
@@ -0,0 +1,71 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from ETL.data_load import DataLoad
+from src.constants import COLLECTION_NAME
+from src.data_access import warehouse
+from src.data_access.EPL_data import EplData
+
+
+@pytest.fixture
+def sqlite_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(warehouse, "WAREHOUSE_SQLITE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _matches():
+    return pd.DataFrame({
+        "date": ["2024-08-17", "2024-08-17", "2024-08-24"],
+        "home_team": ["Arsenal", "Chelsea", "Arsenal"],
+        "away_team": ["Wolves", "Man City", "Aston Villa"],
+        "home_goals": [2, 0, 2],
+        "away_goals": [0, 2, 0],
+        "time": ["15:00:00", "16:30:00", "17:30:00"]
+    })
+
+
+def test_sqlite_upsert_find_and_close(sqlite_dir):
+    with warehouse.get_warehouse("sqlite", database_name="test") as store:
+        documents = [{"date": "2024-08-17", "home_team": "A", "away_team": "B", "home_goals": 1},
+                     {"date": "2024-08-24", "home_team": "C", "away_team": "D", "home_goals": 3}]
+        assert store.upsert("matches", ["date", "home_team", "away_team"], documents) == \
+            {"inserted": 2, "updated": 0, "unchanged": 0}
+        documents[0]["home_goals"] = 2
+        assert store.upsert("matches", ["date", "home_team", "away_team"], documents) == \
+            {"inserted": 0, "updated": 1, "unchanged": 1}
+
+        assert store.count("matches") == 2
+        assert store.count("matches", {"date": {"$gte": "2024-08-20"}}) == 1
+        assert [document["home_goals"] for document in store.find("matches", {"date": {"$in": ["2024-08-17"]}},
+                                                                  fields=["home_goals"])] == [2]
+        assert store.latest_id("matches") is not None
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.connection.execute("SELECT 1")
+
+
+def test_load_records_changes_for_corrected_matches(sqlite_dir):
+    matches = _matches()
+    first = DataLoad(df=matches, backend="sqlite").load_data_MongoDB()
+    unchanged = DataLoad(df=matches, backend="sqlite").load_data_MongoDB()
+    with EplData(backend="sqlite") as data:
+        _, first_loaded_at = data.changes_since(COLLECTION_NAME)
+        fingerprint_before = data.collection_fingerprint(COLLECTION_NAME)
+
+    corrected = matches.copy()
+    corrected.loc[2, "away_goals"] = 1
+    second = DataLoad(df=corrected, backend="sqlite").load_data_MongoDB()
+
+    assert (first["inserted"], first["updated"]) == (3, 0)
+    assert (unchanged["inserted"], unchanged["updated"], unchanged["unchanged"]) == (0, 0, 3)
+    assert (second["updated"], second["unchanged"]) == (1, 2)
+    with EplData(backend="sqlite") as data:
+        changed_dates, _ = data.changes_since(COLLECTION_NAME, since=first_loaded_at)
+        fingerprint_after = data.collection_fingerprint(COLLECTION_NAME)
+        stored = data.export_collection_as_dataframe(COLLECTION_NAME)
+    assert changed_dates == ["2024-08-24"]
+    assert fingerprint_after["document_count"] == fingerprint_before["document_count"]
+    assert fingerprint_after != fingerprint_before
+    assert stored.loc[stored["home_team"] == "Arsenal", "away_goals"].tolist() == [0, 1]